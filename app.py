@@ -4,14 +4,17 @@ Flask Web Uygulaması - TDK Chatbot.
 Modern, kullanıcı dostu web arayüzü.
 """
 
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context
 import sys
 import os
+import threading
+import time
 
 # src klasörünü path'e ekle
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
 from chatbot import TDKChatbot
+from web_common import MAX_BATCH_SIZE, admin_authorized, format_sources, sse_event
 
 # Flask uygulaması
 app = Flask(__name__)
@@ -21,15 +24,74 @@ app.config['SECRET_KEY'] = 'tdk-chatbot-secret-key-2024'
 print("🚀 Flask uygulaması başlatılıyor...")
 chatbot = None
 
+# Aynı anda gelen ilk istekler chatbot'u birden fazla kez oluşturmasın
+_chatbot_lock = threading.Lock()
 
-def get_chatbot():
-    """Chatbot instance'ını döndürür (lazy loading)."""
+# Başlatma durumu (/readyz): starting -> loading -> loaded -> warming -> ready | failed
+init_state = {
+    'status': 'starting',
+    'error': None,
+    'warmup': None,
+    'load_seconds': None
+}
+
+
+def get_chatbot(warmup=True):
+    """
+    Chatbot instance'ını döndürür.
+
+    İlk çağrı chatbot'u yükleyip ısıtır; aynı anda gelen diğer
+    çağrılar kilit üzerinde bekler ve aynı instance'ı kullanır.
+
+    Args:
+        warmup: False ise sadece yüklenir (pre-fork sunucuda ana process
+                yükler, ısınma her worker'da ayrıca yapılır)
+    """
     global chatbot
-    if chatbot is None:
-        chatbot = TDKChatbot()
+    if chatbot is None or (warmup and init_state['status'] != 'ready'):
+        with _chatbot_lock:
+            if chatbot is None:
+                started = time.perf_counter()
+                try:
+                    init_state['status'] = 'loading'
+                    chatbot = TDKChatbot()
+                except Exception as e:
+                    init_state['status'] = 'failed'
+                    init_state['error'] = str(e)
+                    raise
+                init_state['load_seconds'] = round(time.perf_counter() - started, 3)
+                init_state['status'] = 'loaded'
+
+            if warmup and init_state['status'] != 'ready':
+                try:
+                    init_state['status'] = 'warming'
+                    init_state['warmup'] = chatbot.warmup()
+                except Exception as e:
+                    init_state['status'] = 'failed'
+                    init_state['error'] = str(e)
+                    raise
+                init_state['status'] = 'ready'
     return chatbot
 
 
+def start_initialization():
+    """
+    Chatbot'u arka planda yüklemeye başlar (sunucu açılışında çağrılır).
+
+    Sunucu bu sırada /healthz'e yanıt verir, /readyz ise ısınma
+    bitene kadar 503 döndürür.
+    """
+    def initialize():
+        try:
+            get_chatbot()
+        except Exception as e:
+            print(f"Chatbot başlatılamadı: {e}")
+
+    thread = threading.Thread(target=initialize, name="chatbot-init", daemon=True)
+    thread.start()
+    return thread
+
+
 @app.route('/')
 def home():
     """Ana sayfa."""
@@ -50,7 +112,9 @@ def chat():
     Response JSON:
         {
             "response": "chatbot yanıtı",
-            "sources": [{"kelime": "...", "anlam": "..."}]
+            "sources": [{"kelime": "...", "anlam": "..."}],
+            "retrieval": {"stages": [...], "answered_by": "...", "encoded": false},
+            "cache": {"hit": true, "type": "exact" | "semantic", "similarity": 0.97}
         }
     """
     try:
@@ -75,20 +139,14 @@ def chat():
         result = bot.chat(message, top_k=top_k)
 
         # Kaynakları formatla
-        sources = []
-        for r in result.get('results', [])[:3]:  # İlk 3 kaynağı göster
-            doc = r['document']
-            sources.append({
-                'kelime': doc.get('kelime', ''),
-                'anlam': doc.get('anlam', '')[:200] + '...' if len(doc.get('anlam', '')) > 200 else doc.get('anlam',
-                                                                                                            ''),
-                'score': round(r.get('score', 0), 4)
-            })
+        sources = format_sources(result.get('results', []))
 
         # Yanıtı döndür
         return jsonify({
             'response': result['response'],
-            'sources': sources
+            'sources': sources,
+            'retrieval': result.get('retrieval'),
+            'cache': result.get('cache')
         })
 
     except Exception as e:
@@ -101,6 +159,203 @@ def chat():
         }), 500
 
 
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """
+    Streaming chatbot endpoint'i (Server-Sent Events).
+
+    Request JSON:
+        {
+            "message": "kullanıcı mesajı",
+            "top_k": 5  (opsiyonel)
+        }
+
+    Response (text/event-stream):
+        event: sources  data: {"sources": [...], "retrieval": {...}, "cache": {...}}
+        event: token    data: {"text": "..."}   (birden fazla)
+        event: done     data: {"response": "tam yanıt"}
+        event: error    data: {"error": "..."}  (hata olursa)
+    """
+    data = request.get_json()
+
+    if not data or 'message' not in data:
+        return jsonify({
+            'error': 'Mesaj bulunamadı'
+        }), 400
+
+    message = data['message'].strip()
+    top_k = data.get('top_k', 5)
+
+    if not message:
+        return jsonify({
+            'error': 'Boş mesaj gönderilemez'
+        }), 400
+
+    bot = get_chatbot()
+
+    def generate():
+        try:
+            for event in bot.chat_stream(message, top_k=top_k):
+                if event['type'] == 'sources':
+                    yield sse_event('sources', {
+                        'sources': format_sources(event['results']),
+                        'retrieval': event['retrieval'],
+                        'cache': event['cache']
+                    })
+                elif event['type'] == 'token':
+                    yield sse_event('token', {'text': event['text']})
+                elif event['type'] == 'done':
+                    yield sse_event('done', {'response': event['response']})
+                else:
+                    yield sse_event('error', {'error': event['error']})
+        except Exception as e:
+            print(f"Hata: {e}")
+            yield sse_event('error', {'error': f'Bir hata oluştu: {str(e)}'})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # Nginx arkasında buffer'lamayı kapat
+        }
+    )
+
+
+@app.route('/chat/batch', methods=['POST'])
+def chat_batch():
+    """
+    Toplu chatbot endpoint'i.
+
+    Request JSON:
+        {
+            "messages": ["mesaj 1", "mesaj 2", ...],
+            "top_k": 5  (opsiyonel)
+        }
+
+    Response JSON:
+        {
+            "results": [
+                {"response": "...", "sources": [...], "retrieval": {...}, "cache": {...}},
+                {"error": "..."},
+                ...
+            ]
+        }
+    """
+    try:
+        data = request.get_json()
+
+        if not data or not isinstance(data.get('messages'), list):
+            return jsonify({
+                'error': 'Mesaj listesi bulunamadı'
+            }), 400
+
+        messages = data['messages']
+        top_k = data.get('top_k', 5)
+
+        if len(messages) > MAX_BATCH_SIZE:
+            return jsonify({
+                'error': f'En fazla {MAX_BATCH_SIZE} mesaj gönderilebilir'
+            }), 400
+
+        # Chatbot'tan toplu yanıt al
+        bot = get_chatbot()
+        items = bot.chat_batch(messages, top_k=top_k)
+
+        results = []
+        for item in items:
+            if item.get('error'):
+                results.append({'error': item['error']})
+            else:
+                results.append({
+                    'response': item['response'],
+                    'sources': format_sources(item.get('results', [])),
+                    'retrieval': item.get('retrieval'),
+                    'cache': item.get('cache')
+                })
+
+        return jsonify({'results': results})
+
+    except Exception as e:
+        print(f"Hata: {e}")
+        import traceback
+        traceback.print_exc()
+
+        return jsonify({
+            'error': f'Bir hata oluştu: {str(e)}'
+        }), 500
+
+
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    """Canlılık kontrolü: process çalışıyor mu (chatbot yüklenmesini beklemez)."""
+    return jsonify({'status': 'ok'})
+
+
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    """
+    Hazırlık kontrolü: chatbot yüklenip ısındıysa 200, aksi halde 503.
+
+    Response JSON:
+        {"status": "ready" | "starting" | "loading" | "loaded" | "warming" | "failed", ...}
+    """
+    return jsonify(init_state), 200 if init_state['status'] == 'ready' else 503
+
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    """
+    Chatbot istatistikleri.
+
+    Response JSON:
+        {
+            "retrieval": {...},  (çalışan aşamalar, atlanan encoder çağrıları)
+            "embedding": {...},  (mikro-batch boyutu, kuyruk bekleme süresi, embedding önbelleği)
+            "response_cache": {...}  (tam / benzer soru isabetleri)
+        }
+    """
+    bot = get_chatbot()
+    return jsonify(bot.get_stats())
+
+
+@app.route('/admin/index', methods=['GET'])
+def admin_index():
+    """
+    Canlı index sürümü.
+
+    Response JSON:
+        {
+            "version": "20250101-120000-ab12cd",
+            "built_at": "...", "loaded_at": "...",
+            "documents": 133337,
+            "reload": {"status": "idle" | "loading" | "failed", ...},
+            "retiring": [...]  (aramaları bitmeyi bekleyen eski sürümler)
+        }
+    """
+    if not admin_authorized(request.headers):
+        return jsonify({'error': 'Yetkisiz'}), 401
+    return jsonify(get_chatbot().get_index_info())
+
+
+@app.route('/admin/index/reload', methods=['POST'])
+def admin_index_reload():
+    """
+    Diskteki yeni index sürümünü arka planda yükleyip canlıya alır.
+
+    Request JSON (isteğe bağlı):
+        {"force": true}  (sürüm değişmemiş olsa da yükle)
+
+    Response JSON (202):
+        {"started": true, ...}  (+ /admin/index alanları)
+    """
+    if not admin_authorized(request.headers):
+        return jsonify({'error': 'Yetkisiz'}), 401
+    data = request.get_json(silent=True)
+    force = isinstance(data, dict) and bool(data.get('force'))
+    bot = get_chatbot()
+    started = bot.reload_index(force=force)
+    return jsonify({'started': started, **bot.get_index_info()}), 202
 
 
 if __name__ == '__main__':
@@ -110,9 +365,15 @@ if __name__ == '__main__':
     print("=" * 70)
     print("Uygulama: http://127.0.0.1:8080")
 
+    debug = True
+
+    # Debug modunda reloader ana process'i sadece dosyaları izler,
+    # chatbot'u sadece asıl sunucu process'inde yükle
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_initialization()
 
     app.run(
         host='0.0.0.0',
         port=8080,
-        debug=True
+        debug=debug
     )
\ No newline at end of file
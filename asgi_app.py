@@ -0,0 +1,225 @@
+"""
+ASGI Web Uygulaması - TDK Chatbot (asyncio).
+
+app.py ile aynı endpoint'leri sunar; fark olarak Gemini çağrıları
+asenkron beklenir, embedding ve FAISS işleri sınırlı bir thread
+havuzunda çalışır. Tek process yüzlerce eşzamanlı sohbeti taşıyabilir.
+
+Çalıştırma:
+    uvicorn asgi_app:app --host 0.0.0.0 --port 8080
+"""
+
+import asyncio
+import contextlib
+import os
+import sys
+
+from starlette.applications import Starlette
+from starlette.responses import FileResponse, JSONResponse, StreamingResponse
+from starlette.routing import Mount, Route
+from starlette.staticfiles import StaticFiles
+
+# src klasörünü path'e ekle
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(BASE_DIR, 'src'))
+
+from chatbot import TDKChatbot
+from async_chatbot import AsyncTDKChatbot
+from web_common import MAX_BATCH_SIZE, admin_authorized, format_sources, sse_event
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    """Chatbot'u sunucu açılırken bir kere yükler ve ısıtır."""
+    print("🚀 ASGI uygulaması başlatılıyor...")
+    app.state.ready = False
+    loop = asyncio.get_running_loop()
+    # Model ve index yüklemesi bloklayıcı, event loop dışında yap
+    chatbot = await loop.run_in_executor(None, TDKChatbot)
+    app.state.warmup = await loop.run_in_executor(None, chatbot.warmup)
+    app.state.ready = True
+    app.state.bot = AsyncTDKChatbot(
+        chatbot,
+        cpu_workers=int(os.getenv('TDK_CPU_WORKERS', '0')) or None,
+        max_concurrent_llm=int(os.getenv('TDK_MAX_CONCURRENT_LLM', '1024'))
+    )
+    yield
+    app.state.bot.close()
+
+
+async def read_message(request):
+    """
+    İstekten mesajı okur.
+
+    Returns:
+        tuple: (mesaj, top_k, hata yanıtı veya None)
+    """
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+
+    if not data or 'message' not in data:
+        return None, None, JSONResponse({'error': 'Mesaj bulunamadı'}, status_code=400)
+
+    message = data['message'].strip()
+    if not message:
+        return None, None, JSONResponse({'error': 'Boş mesaj gönderilemez'}, status_code=400)
+
+    return message, data.get('top_k', 5), None
+
+
+async def home(request):
+    """Ana sayfa."""
+    return FileResponse(os.path.join(BASE_DIR, 'templates', 'index.html'))
+
+
+async def chat(request):
+    """Chatbot endpoint'i (app.py /chat ile aynı format)."""
+    message, top_k, error = await read_message(request)
+    if error is not None:
+        return error
+
+    try:
+        result = await request.app.state.bot.chat(message, top_k=top_k)
+        return JSONResponse({
+            'response': result['response'],
+            'sources': format_sources(result.get('results', [])),
+            'retrieval': result.get('retrieval'),
+            'cache': result.get('cache')
+        })
+
+    except Exception as e:
+        print(f"Hata: {e}")
+        return JSONResponse({'error': f'Bir hata oluştu: {str(e)}'}, status_code=500)
+
+
+async def chat_stream(request):
+    """Streaming chatbot endpoint'i (app.py /chat/stream ile aynı olaylar)."""
+    message, top_k, error = await read_message(request)
+    if error is not None:
+        return error
+
+    bot = request.app.state.bot
+
+    async def generate():
+        try:
+            async for event in bot.chat_stream(message, top_k=top_k):
+                if event['type'] == 'sources':
+                    yield sse_event('sources', {
+                        'sources': format_sources(event['results']),
+                        'retrieval': event['retrieval'],
+                        'cache': event['cache']
+                    })
+                elif event['type'] == 'token':
+                    yield sse_event('token', {'text': event['text']})
+                elif event['type'] == 'done':
+                    yield sse_event('done', {'response': event['response']})
+                else:
+                    yield sse_event('error', {'error': event['error']})
+        except Exception as e:
+            print(f"Hata: {e}")
+            yield sse_event('error', {'error': f'Bir hata oluştu: {str(e)}'})
+
+    return StreamingResponse(
+        generate(),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+async def chat_batch(request):
+    """Toplu chatbot endpoint'i (app.py /chat/batch ile aynı format)."""
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+
+    if not data or not isinstance(data.get('messages'), list):
+        return JSONResponse({'error': 'Mesaj listesi bulunamadı'}, status_code=400)
+
+    messages = data['messages']
+    if len(messages) > MAX_BATCH_SIZE:
+        return JSONResponse({'error': f'En fazla {MAX_BATCH_SIZE} mesaj gönderilebilir'}, status_code=400)
+
+    items = await request.app.state.bot.chat_batch(messages, top_k=data.get('top_k', 5))
+
+    results = []
+    for item in items:
+        if item.get('error'):
+            results.append({'error': item['error']})
+        else:
+            results.append({
+                'response': item['response'],
+                'sources': format_sources(item.get('results', [])),
+                'retrieval': item.get('retrieval'),
+                'cache': item.get('cache')
+            })
+
+    return JSONResponse({'results': results})
+
+
+async def healthz(request):
+    """Canlılık kontrolü."""
+    return JSONResponse({'status': 'ok'})
+
+
+async def readyz(request):
+    """Hazırlık kontrolü: chatbot yüklenip ısındıysa 200, aksi halde 503."""
+    if getattr(request.app.state, 'ready', False):
+        return JSONResponse({'status': 'ready', 'warmup': request.app.state.warmup})
+    return JSONResponse({'status': 'starting'}, status_code=503)
+
+
+async def stats(request):
+    """Chatbot istatistikleri."""
+    return JSONResponse(request.app.state.bot.bot.get_stats())
+
+
+async def admin_index(request):
+    """Canlı index sürümü ve yeniden yükleme durumu."""
+    if not admin_authorized(request.headers):
+        return JSONResponse({'error': 'Yetkisiz'}, status_code=401)
+    return JSONResponse(request.app.state.bot.bot.get_index_info())
+
+
+async def admin_index_reload(request):
+    """Diskteki yeni index sürümünü arka planda yükleyip canlıya alır."""
+    if not admin_authorized(request.headers):
+        return JSONResponse({'error': 'Yetkisiz'}, status_code=401)
+    try:
+        data = await request.json()
+    except ValueError:
+        data = {}
+    force = isinstance(data, dict) and bool(data.get('force'))
+    chatbot = request.app.state.bot.bot
+    started = chatbot.reload_index(force=force)
+    return JSONResponse({'started': started, **chatbot.get_index_info()}, status_code=202)
+
+
+app = Starlette(
+    routes=[
+        Route('/', home),
+        Route('/chat', chat, methods=['POST']),
+        Route('/chat/stream', chat_stream, methods=['POST']),
+        Route('/chat/batch', chat_batch, methods=['POST']),
+        Route('/healthz', healthz),
+        Route('/readyz', readyz),
+        Route('/stats', stats),
+        Route('/admin/index', admin_index),
+        Route('/admin/index/reload', admin_index_reload, methods=['POST']),
+        Mount('/static', StaticFiles(directory=os.path.join(BASE_DIR, 'static')), name='static'),
+    ],
+    lifespan=lifespan
+)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    print("\n" + "=" * 70)
+    print("TDK CHATBOT WEB UYGULAMASI (ASGI)")
+    print("=" * 70)
+    print("Uygulama: http://127.0.0.1:8080")
+
+    uvicorn.run(app, host='0.0.0.0', port=8080)
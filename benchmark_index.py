@@ -0,0 +1,128 @@
+"""
+Index tipleri için recall@k / gecikme raporu.
+
+Bu script:
+1. Kaydedilmiş embedding'leri yükler
+2. Bir kısmını sorgu olarak ayırır
+3. Flat (kesin) index ile gerçek top-k sonuçlarını bulur
+4. HNSW, IVF-Flat, IVF-PQ ve sıkıştırılmış (SQ8, PQ, OPQ) index'leri
+   farklı nprobe / efSearch / yeniden sıralama değerleriyle bu sonuçlara
+   göre karşılaştırır (recall, gecikme, vektör başına byte)
+
+Kullanım:
+    python benchmark_index.py --queries 1000 --top-k 10
+"""
+
+import argparse
+import sys
+import os
+import time
+
+import numpy as np
+
+# src klasörünü path'e ekle
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from embeddings import EmbeddingModel
+from vector_store import FAISSVectorStore, recall_at_k
+
+
+# (index tipi, index parametreleri, taranacak sorgu parametreleri)
+CONFIGS = [
+    ('hnsw', {}, [{'ef_search': ef} for ef in (16, 32, 64, 128, 256)]),
+    ('ivf_flat', {}, [{'nprobe': n} for n in (1, 4, 16, 64)]),
+    ('ivf_pq', {}, [{'nprobe': n} for n in (1, 4, 16, 64)]),
+    ('sq8', {}, [{}]),
+    ('pq', {}, [{}]),
+    ('opq', {}, [{}]),
+    # Sıkıştırılmış index + orijinal vektörlerle kesin yeniden sıralama
+    ('pq', {'rerank_factor': 4}, [{}]),
+    ('opq', {'rerank_factor': 4}, [{}]),
+    ('ivf_pq', {'rerank_factor': 4}, [{'nprobe': n} for n in (4, 16, 64)]),
+]
+
+
+def measure(store, queries, top_k, **search_params):
+    """
+    Sorguları tek tek (sunucudaki gibi) çalıştırır.
+
+    Returns:
+        tuple: (bulunan id'ler, sorgu başına gecikmeler - ms)
+    """
+    found = []
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        _, indices = store.search_raw(query, top_k, **search_params)
+        latencies.append((time.perf_counter() - start) * 1000)
+        found.append(indices[0])
+    return np.array(found), np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FAISS index tipleri için recall@k / gecikme raporu")
+    parser.add_argument('--embeddings', default='./data/embeddings.npy', help="Embedding dosyası (.npy veya eski format .pkl)")
+    parser.add_argument('--metric', default='cosine', choices=FAISSVectorStore.METRICS)
+    parser.add_argument('--queries', type=int, default=1000, help="Sorgu olarak ayrılacak vektör sayısı")
+    parser.add_argument('--top-k', type=int, default=10)
+    args = parser.parse_args()
+
+    data = EmbeddingModel.load_embeddings(args.embeddings)
+    if data is None:
+        return
+
+    embeddings = np.asarray(data['embeddings'], dtype='float32')
+    documents = data['documents']
+
+    # Sorguları ayır (index'e eklenmeyen vektörler)
+    rng = np.random.default_rng(42)
+    query_ids = rng.choice(len(embeddings), args.queries, replace=False)
+    mask = np.ones(len(embeddings), dtype=bool)
+    mask[query_ids] = False
+    base = embeddings[mask]
+    base_docs = [doc for doc, keep in zip(documents, mask) if keep]
+    queries = embeddings[query_ids]
+
+    dim = embeddings.shape[1]
+    rows = []
+
+    # Referans: flat index (kesin sonuç)
+    flat = FAISSVectorStore(embedding_dim=dim, metric=args.metric, index_type='flat')
+    start = time.perf_counter()
+    flat.create_index(base, base_docs)
+    build_time = time.perf_counter() - start
+    true_ids, latencies = measure(flat, queries, args.top_k)
+    flat_ms = latencies.mean()
+    rows.append(('flat', '-', build_time, flat.memory_usage()['bytes_per_vector'],
+                 1.0, flat_ms, np.percentile(latencies, 95)))
+
+    for index_type, index_params, sweep in CONFIGS:
+        store = FAISSVectorStore(embedding_dim=dim, metric=args.metric,
+                                 index_type=index_type, index_params=index_params)
+        start = time.perf_counter()
+        store.create_index(base, base_docs)
+        build_time = time.perf_counter() - start
+        bytes_per_vector = store.memory_usage()['bytes_per_vector']
+
+        for search_params in sweep:
+            found, latencies = measure(store, queries, args.top_k, **search_params)
+            label = ", ".join(f"{k}={v}" for k, v in {**index_params, **search_params}.items()) or '-'
+            rows.append((index_type, label, build_time, bytes_per_vector, recall_at_k(found, true_ids),
+                         latencies.mean(), np.percentile(latencies, 95)))
+
+    # Raporu göster
+    print("\n" + "=" * 112)
+    print(f"INDEX KARŞILAŞTIRMASI - {len(base)} vektör, {args.queries} sorgu, "
+          f"recall@{args.top_k}, metrik: {args.metric}")
+    print("=" * 112)
+    print(f"{'Index':<10} {'Parametre':<28} {'Oluşturma (s)':>14} {'Byte/vektör':>12} {'Recall':>8} "
+          f"{'Ort. (ms)':>10} {'p95 (ms)':>10} {'Hızlanma':>10}")
+    print("-" * 112)
+    for index_type, label, build_time, bytes_per_vector, recall, mean_ms, p95_ms in rows:
+        print(f"{index_type:<10} {label:<28} {build_time:>14.2f} {bytes_per_vector:>12.1f} {recall:>8.4f} "
+              f"{mean_ms:>10.3f} {p95_ms:>10.3f} {flat_ms / mean_ms:>9.1f}x")
+    print("=" * 112)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Veri işleme modları için hız ve çıktı karşılaştırması.
+
+Bu script:
+1. TDK veri setini yükler (isteğe bağlı ilk N satır)
+2. Aynı veriyi 'python' (satır satır) ve 'columnar' (Arrow string
+   fonksiyonları) modlarıyla işler, satır/sn hızını ölçer
+3. İki modun JSON çıktılarının byte byte aynı olduğunu (ve varsa
+   mevcut processed_tdk.json ile aynı olduğunu) kontrol eder
+
+Kullanım:
+    python benchmark_processing.py --rows 50000 --num-proc 4
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import time
+
+from datasets import disable_caching
+
+# src klasörünü path'e ekle
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from data_loader import TDKDataLoader, write_documents
+
+
+MODES = ('python', 'columnar')
+
+
+def file_digest(filepath):
+    digest = hashlib.sha1()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Veri işleme modları için satır/sn karşılaştırması")
+    parser.add_argument('--rows', type=int, default=0, help="İşlenecek satır sayısı (0 = tümü)")
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--num-proc', type=int, default=0, help="map process sayısı (0 = tek process)")
+    parser.add_argument('--repeat', type=int, default=3, help="Her mod için tekrar sayısı (en iyisi raporlanır)")
+    parser.add_argument('--reference', default='./data/processed_tdk.json',
+                        help="Karşılaştırılacak mevcut JSON çıktısı (--rows 0 iken)")
+    args = parser.parse_args()
+
+    # Önbellekten okunmasın, her çalıştırma gerçekten işlesin
+    disable_caching()
+
+    loader = TDKDataLoader(cache_dir="./data")
+    if loader.load_dataset() is None:
+        return
+    if args.rows:
+        loader.dataset['train'] = loader.dataset['train'].select(range(min(args.rows, len(loader.dataset['train']))))
+    n_rows = len(loader.dataset['train'])
+
+    rows = []
+    digests = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for mode in MODES:
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                loader.process_data(batch_size=args.batch_size, num_proc=args.num_proc or None, mode=mode)
+                timings.append(time.perf_counter() - start)
+
+            # Eski format (tek JSON dizisi) ile yazılıp karşılaştırılır
+            output = os.path.join(tmp_dir, f"{mode}.json")
+            n_docs = write_documents(loader.iter_processed(), output)
+            digests[mode] = file_digest(output)
+
+            best = min(timings)
+            rows.append((mode, n_docs, best, n_rows / best))
+
+    # Raporu göster
+    print("\n" + "=" * 72)
+    print(f"VERİ İŞLEME KARŞILAŞTIRMASI - {n_rows} satır, batch: {args.batch_size}, "
+          f"process: {args.num_proc or 1}")
+    print("=" * 72)
+    print(f"{'Mod':<10} {'Doküman':>10} {'Süre (s)':>10} {'Satır/sn':>12} {'Hızlanma':>10} {'SHA1':>16}")
+    print("-" * 72)
+    python_seconds = rows[0][2]
+    for mode, n_docs, seconds, rows_per_s in rows:
+        print(f"{mode:<10} {n_docs:>10} {seconds:>10.2f} {rows_per_s:>12.0f} "
+              f"{python_seconds / seconds:>9.1f}x {digests[mode][:16]:>16}")
+    print("=" * 72)
+
+    identical = len(set(digests.values())) == 1
+    print(f"Çıktılar byte byte aynı: {'evet' if identical else 'HAYIR'}")
+    if not args.rows and os.path.exists(args.reference):
+        same = file_digest(args.reference) == digests['columnar']
+        print(f"{args.reference} ile aynı: {'evet' if same else 'HAYIR'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Gunicorn pre-fork sunucu ayarları (production).
+
+Ana process embedding modelini, FAISS index'ini ve doküman deposunu
+bir kere yükler, sonra worker'ları fork'lar. Worker'lar bu belleği
+copy-on-write paylaşır; gc.freeze() ile yüklenen nesneler GC
+taramasından çıkarılır, böylece GC'nin referans sayacı / başlık
+yazmaları paylaşılan sayfaların kopyalanmasına yol açmaz.
+
+Çalıştırma:
+    gunicorn app:app
+
+Environment variables:
+    TDK_BIND: Dinlenecek adres (varsayılan 0.0.0.0:8080)
+    TDK_WORKERS: Worker process sayısı (varsayılan çekirdek sayısı)
+    TDK_WORKER_THREADS: Worker başına istek thread'i (Gemini beklemeleri için, varsayılan 16)
+    TDK_TORCH_THREADS: Worker başına torch/FAISS thread'i (varsayılan çekirdek / worker)
+"""
+
+import gc
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from runtime import limit_threads, threads_per_worker
+
+
+bind = os.getenv('TDK_BIND', '0.0.0.0:8080')
+workers = int(os.getenv('TDK_WORKERS', str(os.cpu_count() or 1)))
+worker_class = 'gthread'
+threads = int(os.getenv('TDK_WORKER_THREADS', '16'))
+timeout = 120
+
+# Uygulama (ve chatbot) ana process'te yüklenir, worker'lar fork ile paylaşır
+preload_app = True
+
+torch_threads = int(os.getenv('TDK_TORCH_THREADS', '0')) or threads_per_worker(workers)
+
+# torch / FAISS import edilmeden önce ayarlanmalı
+limit_threads(torch_threads)
+
+
+def when_ready(server):
+    """Ana process: worker'lar fork'lanmadan önce chatbot'u yükler."""
+    import app
+
+    # Isınma worker'larda yapılır (fork'tan önce OpenMP havuzu başlatılmasın)
+    app.get_chatbot(warmup=False)
+
+    # Yüklenen nesneleri kalıcı nesil (permanent generation) olarak işaretle
+    gc.collect()
+    gc.freeze()
+    server.log.info("Chatbot yüklendi, %s nesne donduruldu", gc.get_freeze_count())
+
+
+def post_fork(server, worker):
+    """Worker process: thread sınırı, fork sonrası kaynaklar ve ısınma."""
+    import app
+
+    limit_threads(torch_threads)
+    app.chatbot.after_fork()
+    app.get_chatbot(warmup=True)
+    server.log.info("Worker %s hazır (torch/FAISS thread: %s)", worker.pid, torch_threads)
@@ -0,0 +1,193 @@
+"""
+Yük testi - Flask (app.py) ve ASGI (asgi_app.py) sunucularının karşılaştırması.
+
+Gemini yerine gecikmeli sahte model (TDK_FAKE_LLM) kullanılır, böylece
+sadece sunucunun eşzamanlı bekleyen istekleri nasıl taşıdığı ölçülür.
+
+Kullanım:
+    # İki sunucuyu da başlatıp karşılaştır
+    python load_test.py --compare --concurrency 200 --requests 1000
+
+    # Çalışan bir sunucuya yük gönder
+    python load_test.py --url http://127.0.0.1:8080/chat --concurrency 100
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from urllib.parse import urlparse
+
+import numpy as np
+
+
+SAMPLE_WORDS = ['kitap', 'sevgi', 'bilgisayar', 'merhaba', 'dulda', 'ev', 'göz', 'su', 'yol', 'dil']
+
+
+async def post_json(url, payload, timeout):
+    """
+    Tek bir HTTP POST isteği gönderir (sadece standart kütüphane).
+
+    Returns:
+        int: HTTP durum kodu
+    """
+    parsed = urlparse(url)
+    body = json.dumps(payload).encode('utf-8')
+
+    reader, writer = await asyncio.wait_for(
+        asyncio.open_connection(parsed.hostname, parsed.port or 80), timeout
+    )
+    try:
+        writer.write(
+            f"POST {parsed.path or '/'} HTTP/1.1\r\n"
+            f"Host: {parsed.hostname}:{parsed.port or 80}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: close\r\n\r\n".encode('ascii') + body
+        )
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), timeout)
+    finally:
+        writer.close()
+
+    status_line = response.split(b'\r\n', 1)[0]
+    return int(status_line.split()[1])
+
+
+async def run_load(url, n_requests, concurrency, timeout=120.0):
+    """
+    Belirtilen eşzamanlılıkla istek gönderir.
+
+    Args:
+        url: /chat endpoint'i
+        n_requests: Toplam istek sayısı
+        concurrency: Aynı anda açık istek sayısı
+        timeout: İstek başına zaman aşımı (saniye)
+
+    Returns:
+        dict: throughput, gecikme yüzdelikleri, hata sayısı
+    """
+    latencies = []
+    errors = 0
+    counter = iter(range(n_requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            # Her istek farklı olsun (yanıt önbelleği sonucu etkilemesin)
+            message = f"{SAMPLE_WORDS[i % len(SAMPLE_WORDS)]} ne demek {i}"
+            started = time.perf_counter()
+            try:
+                status = await post_json(url, {'message': message, 'top_k': 3}, timeout)
+                if status != 200:
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies = np.array(latencies) * 1000
+    return {
+        'requests': n_requests,
+        'concurrency': concurrency,
+        'elapsed_s': elapsed,
+        'throughput_rps': n_requests / elapsed,
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'errors': errors
+    }
+
+
+def wait_ready(base_url, timeout=600):
+    """Sunucu /readyz'de hazır olana kadar bekler (chatbot yüklenip ısınana kadar)."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(base_url + '/readyz', timeout=10) as response:
+                if response.status == 200:
+                    return True
+        except Exception:
+            time.sleep(1)
+    return False
+
+
+def start_server(kind, port, env):
+    """Flask veya ASGI sunucusunu alt process olarak başlatır."""
+    if kind == 'flask':
+        # debug/reloader olmadan, thread'li geliştirme sunucusu
+        cmd = [sys.executable, '-c',
+               f"import app; app.start_initialization(); "
+               f"app.app.run(host='127.0.0.1', port={port}, threaded=True)"]
+    else:
+        cmd = [sys.executable, '-m', 'uvicorn', 'asgi_app:app',
+               '--host', '127.0.0.1', '--port', str(port), '--log-level', 'warning']
+    return subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+
+
+def print_report(rows):
+    """Sonuç tablosunu yazdırır."""
+    print("\n" + "=" * 90)
+    print(f"{'Sunucu':<10}{'İstek':>8}{'Eşzamanlı':>11}{'Süre (s)':>10}{'İstek/s':>10}"
+          f"{'p50 (ms)':>10}{'p95 (ms)':>10}{'p99 (ms)':>10}{'Hata':>8}")
+    print("-" * 90)
+    for name, r in rows:
+        print(f"{name:<10}{r['requests']:>8}{r['concurrency']:>11}{r['elapsed_s']:>10.2f}"
+              f"{r['throughput_rps']:>10.1f}{r['p50_ms']:>10.0f}{r['p95_ms']:>10.0f}"
+              f"{r['p99_ms']:>10.0f}{r['errors']:>8}")
+    print("=" * 90)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TDK Chatbot yük testi")
+    parser.add_argument('--url', help="Yük gönderilecek /chat endpoint'i")
+    parser.add_argument('--compare', action='store_true', help="Flask ve ASGI sunucularını başlatıp karşılaştır")
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--llm-latency', type=float, default=1.0, help="Sahte modelin yanıt gecikmesi (saniye)")
+    args = parser.parse_args()
+
+    if args.url:
+        result = asyncio.run(run_load(args.url, args.requests, args.concurrency))
+        print_report([(urlparse(args.url).netloc, result)])
+        return
+
+    if not args.compare:
+        parser.error("--url veya --compare gerekli")
+
+    env = dict(os.environ)
+    env.update({
+        'TDK_FAKE_LLM': '1',
+        'TDK_FAKE_LLM_LATENCY': str(args.llm_latency),
+        'TDK_RESPONSE_CACHE': 'off'
+    })
+
+    rows = []
+    for kind, port in [('flask', 8091), ('asgi', 8092)]:
+        print(f"{kind} sunucusu başlatılıyor (port {port})...")
+        server = start_server(kind, port, env)
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            if not wait_ready(base_url):
+                print(f"{kind} sunucusu hazır olmadı!")
+                continue
+            result = asyncio.run(run_load(base_url + '/chat', args.requests, args.concurrency))
+            rows.append((kind, result))
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f"\nSahte LLM gecikmesi: {args.llm_latency} s")
+    print_report(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+ONNX embedding backend'i için export ve doğrulama aracı.
+
+export:   Modeli ONNX'e aktarır, isteğe bağlı int8 dinamik quantization uygular.
+validate: ONNX embedding'lerinin torch embedding'leriyle kosinüs uyumunu
+          ve hız farkını raporlar.
+
+Kullanım:
+    python onnx_export.py export --quantize
+    python onnx_export.py validate --file onnx/model_qint8.onnx
+
+Sonra chatbot'u ONNX ile çalıştırmak için:
+    TDK_EMBED_BACKEND=onnx TDK_ONNX_FILE=onnx/model_qint8.onnx python app.py
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# src klasörünü path'e ekle
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+DEFAULT_MODEL = "emrecan/bert-base-turkish-cased-mean-nli-stsb-tr"
+
+SAMPLE_QUERIES = [
+    "kitap ne demek?", "sevgi kelimesinin anlamı nedir?", "bilgisayar nedir?",
+    "merhaba kelimesini açıklar mısın?", "dulda", "gökyüzünde uçan taşıt",
+    "çok sevinmek anlamına gelen deyim", "ağaç", "İstanbul'un fethi", "ışık hızı"
+]
+
+
+def export(args):
+    """Modeli ONNX'e aktarır (ve isteğe bağlı quantize eder)."""
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    print(f"Model ONNX'e aktarılıyor: {args.model}")
+    # backend="onnx": optimum ile export edilir, pooling katmanı aynen korunur
+    model = SentenceTransformer(args.model, backend="onnx")
+    model.save(args.output)
+    print(f"ONNX modeli kaydedildi: {os.path.join(args.output, 'onnx', 'model.onnx')}")
+
+    if args.quantize:
+        print(f"int8 dinamik quantization ({args.quantization_config})...")
+        export_dynamic_quantized_onnx_model(
+            model,
+            quantization_config=args.quantization_config,
+            model_name_or_path=args.output,
+            file_suffix="qint8"
+        )
+        print(f"Quantize model kaydedildi: {os.path.join(args.output, 'onnx', 'model_qint8.onnx')}")
+
+
+def load_texts(n_texts):
+    """Doğrulama metinleri: işlenmiş veri varsa oradan, yoksa örnek sorgular."""
+    texts = list(SAMPLE_QUERIES)
+    from data_loader import TDKDataLoader, iter_documents
+
+    processed_file = TDKDataLoader(cache_dir="./data").processed_path()
+    if processed_file:
+        documents = list(iter_documents(processed_file))
+        rng = np.random.default_rng(0)
+        picks = rng.choice(len(documents), size=min(n_texts, len(documents)), replace=False)
+        texts += [documents[i]['text'] for i in picks]
+    return texts
+
+
+def measure(embedder, texts, batch_size):
+    """
+    Tekli sorgu gecikmesi ve toplu encode hızını ölçer.
+
+    Returns:
+        dict: embeddings, single_ms, batch_texts_per_s
+    """
+    queries = SAMPLE_QUERIES
+    embedder.warmup(queries, rounds=1)
+
+    started = time.perf_counter()
+    for query in queries:
+        embedder.encode_queries([query], batch_size=1, use_cache=False)
+    single_ms = (time.perf_counter() - started) / len(queries) * 1000
+
+    started = time.perf_counter()
+    embeddings = embedder.encode_queries(texts, batch_size=batch_size, use_cache=False)
+    batch_seconds = time.perf_counter() - started
+
+    return {
+        'embeddings': np.asarray(embeddings, dtype='float32'),
+        'single_ms': single_ms,
+        'batch_texts_per_s': len(texts) / batch_seconds
+    }
+
+
+def cosine_rows(a, b):
+    """İki embedding matrisinin satır satır kosinüs benzerliği."""
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return (a * b).sum(axis=1)
+
+
+def validate(args):
+    """ONNX ve torch backend'lerini karşılaştırır."""
+    from embeddings import EmbeddingModel
+
+    texts = load_texts(args.texts)
+    print(f"{len(texts)} metin ile doğrulama yapılıyor\n")
+
+    # ONNX önce yüklenir: torch henüz import edilmemişken açılış süresi ölçülür
+    rows = []
+    for file_name in args.file:
+        started = time.perf_counter()
+        embedder = EmbeddingModel(args.model, backend='onnx', onnx_dir=args.output, onnx_file=file_name)
+        load_seconds = time.perf_counter() - started
+        rows.append((f"onnx ({file_name})", load_seconds, measure(embedder, texts, args.batch_size)))
+
+    started = time.perf_counter()
+    torch_embedder = EmbeddingModel(args.model, backend='torch')
+    torch_load = time.perf_counter() - started
+    reference = measure(torch_embedder, texts, args.batch_size)
+
+    print("\n" + "=" * 100)
+    print(f"{'Backend':<32}{'Yükleme (s)':>12}{'Tekli (ms)':>12}{'Hızlanma':>10}"
+          f"{'Batch (metin/s)':>17}{'Hızlanma':>10}{'Kosinüs ort/min':>17}")
+    print("-" * 100)
+    print(f"{'torch':<32}{torch_load:>12.2f}{reference['single_ms']:>12.2f}{'1.00x':>10}"
+          f"{reference['batch_texts_per_s']:>17.1f}{'1.00x':>10}{'-':>17}")
+    for name, load_seconds, result in rows:
+        cosines = cosine_rows(reference['embeddings'], result['embeddings'])
+        print(f"{name:<32}{load_seconds:>12.2f}{result['single_ms']:>12.2f}"
+              f"{reference['single_ms'] / result['single_ms']:>9.2f}x"
+              f"{result['batch_texts_per_s']:>17.1f}"
+              f"{result['batch_texts_per_s'] / reference['batch_texts_per_s']:>9.2f}x"
+              f"{cosines.mean():>10.4f}/{cosines.min():.4f}")
+    print("=" * 100)
+    print("Not: torch yükleme süresi, ONNX ölçümünden sonra yapıldığı için import süresini içerir.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ONNX embedding backend aracı")
+    parser.add_argument('--model', default=DEFAULT_MODEL)
+    parser.add_argument('--output', default="./data/onnx_model", help="ONNX model klasörü")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export', help="Modeli ONNX'e aktar")
+    export_parser.add_argument('--quantize', action='store_true', help="int8 dinamik quantization uygula")
+    export_parser.add_argument('--quantization-config', default='avx2',
+                               choices=['arm64', 'avx2', 'avx512', 'avx512_vnni'])
+
+    validate_parser = subparsers.add_parser('validate', help="torch ile kosinüs uyumu ve hız karşılaştırması")
+    validate_parser.add_argument('--file', nargs='+', default=['onnx/model.onnx'],
+                                 help="Karşılaştırılacak ONNX dosyaları (ör. onnx/model.onnx onnx/model_qint8.onnx)")
+    validate_parser.add_argument('--texts', type=int, default=500, help="İşlenmiş veriden örnek metin sayısı")
+    validate_parser.add_argument('--batch-size', type=int, default=32)
+
+    args = parser.parse_args()
+    if args.command == 'export':
+        export(args)
+    else:
+        validate(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,10 +6,33 @@ Bu script:
 2. Veriyi işler
 3. Embedding'leri oluşturur
 4. Vector store'u hazırlar
+
+Embedding adımı paralel ve kaldığı yerden devam edebilir çalışır:
+    TDK_EMBED_WORKERS: Encode process sayısı (varsayılan çekirdek sayısı, en fazla 4)
+    TDK_EMBED_SHARD_SIZE: Parça başına doküman sayısı (varsayılan 2048)
+    TDK_EMBED_BACKEND: 'torch' veya 'onnx'
+
+Encode öncesi tekrar eden anlamlar ayıklanır:
+    TDK_DEDUP: 'merge' (varsayılan, sadece tekrarları birleştir), 'group'
+               (anlamlar madde başına bağlanır, arama madde başı başına tek
+               sonuç döndürür) veya 'off'
+    TDK_DEDUP_THRESHOLD: Yakın tekrar Jaccard eşiği (varsayılan 0.8)
+    TDK_DEDUP_BENCH_SAMPLE: Encode süresine etkisinin ölçüleceği örnek madde
+                            başı sayısı (varsayılan 300, 0 = ölçme)
+
+Vector store'un yanına metin araması için BM25 index'i yazılır:
+    TDK_BM25_STEM: '1' ise terimlerin ekleri atılır (tam yeniden oluşturmada)
+
+Veri işleme batch'ler halinde yapılır:
+    TDK_PROCESS_WORKERS: Veri temizleme process sayısı (varsayılan 1)
+    TDK_PROCESS_MODE: 'columnar' (Arrow, varsayılan) veya 'python' (satır satır)
 """
 
 import sys
 import os
+import time
+
+import numpy as np
 
 # src klasörünü path'e ekle
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
@@ -17,6 +40,79 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 from data_loader import TDKDataLoader
 from embeddings import EmbeddingModel
 from vector_store import FAISSVectorStore
+from sharded_embedding import ShardedEmbedder
+from index_manifest import IndexManifest, documents_fingerprint
+from dedup import Deduplicator
+from bm25_index import BM25Index
+
+
+def load_updatable_store(vector_store_path, model_id):
+    """
+    Artımlı güncellenebilecek mevcut vector store'u ve manifest'ini yükler.
+
+    Returns:
+        tuple: (FAISSVectorStore, IndexManifest) veya tam yeniden oluşturma
+               gerekiyorsa (None, None)
+    """
+    manifest = IndexManifest.load(vector_store_path)
+    if manifest is None:
+        return None, None
+    if manifest.model_name != model_id:
+        print(f"Embedding modeli değişmiş ({manifest.model_name} -> {model_id}), index yeniden oluşturulacak")
+        return None, None
+
+    store = FAISSVectorStore()
+    if not store.load(vector_store_path):
+        return None, None
+    if not store.supports_updates():
+        print(f"{store.index_type} index'i artımlı güncellenemiyor, yeniden oluşturulacak")
+        return None, None
+    # Index kaydedilip manifest kaydedilemeden kesildiyse ikisi uyuşmaz
+    if store.index.ntotal != len(manifest):
+        print("Manifest index ile uyuşmuyor, index yeniden oluşturulacak")
+        return None, None
+
+    return store, manifest
+
+
+def encode_texts(sharded, texts):
+    """
+    Artımlı güncellemede değişen metinleri encode eder.
+    Az sayıda metin için process havuzu yerine aynı process kullanılır.
+    Parçalı encode'da birleştirilmiş matris belleğe alınır, parça dosyaları
+    ve geçici matris silinir (sonraki çalıştırmalara artık bırakılmaz).
+    """
+    if len(texts) > sharded.shard_size:
+        merged_path = os.path.join(sharded.shard_dir, "embeddings.npy")
+        merged = sharded.encode(texts, merged_path)
+        embeddings = np.array(merged)
+        del merged
+        os.remove(merged_path)
+        sharded.cleanup()
+        return embeddings
+
+    embedder = EmbeddingModel(sharded.model_name, backend=sharded.backend)
+    return embedder.encode_queries(texts, batch_size=sharded.batch_size, use_cache=False)
+
+
+def load_current_embeddings(embeddings_file, fingerprint, model_name):
+    """
+    Kaydedilmiş embedding'leri, güncel doküman listesiyle oluşturulmuşlarsa yükler.
+    Matris ve dokümanlar mmap ile açılır (kopyalanmaz).
+
+    Returns:
+        dict veya None (dosya yoksa ya da dokümanlar / model değişmişse)
+    """
+    if not os.path.exists(embeddings_file):
+        return None
+    print("Daha önce oluşturulmuş embedding'ler bulundu, yükleniyor...")
+    embedding_data = EmbeddingModel.load_embeddings(embeddings_file)
+    if embedding_data is None:
+        return None
+    if embedding_data['fingerprint'] != fingerprint or embedding_data['model_name'] != model_name:
+        print("Kaydedilmiş embedding'ler güncel değil, yeniden oluşturulacak")
+        return None
+    return embedding_data
 
 
 def main():
@@ -35,24 +131,29 @@ def main():
 
     loader = TDKDataLoader(cache_dir="./data")
 
-    # Daha önce işlenmiş veri var mı kontrol et
-    processed_file = "./data/processed_tdk.json"
+    # Daha önce işlenmiş veri var mı kontrol et (.jsonl, .parquet veya eski .json)
+    processed_file = loader.processed_path()
 
-    if os.path.exists(processed_file):
+    if processed_file:
         print("Daha önce işlenmiş veri bulundu, yükleniyor...")
-        documents = loader.load_processed_data()
     else:
         print("Veri ilk kez yükleniyor...")
         loader.load_dataset()
         loader.explore_data()
-        documents = loader.process_data()
+        # Batch'li map; sonuç diskteki Arrow önbelleğinde, dosyaya akış halinde yazılır
+        loader.process_data(
+            num_proc=int(os.getenv('TDK_PROCESS_WORKERS', '0')) or None,
+            mode=os.getenv('TDK_PROCESS_MODE', 'columnar')
+        )
         loader.save_processed_data()
 
-    if not documents:
+    # Dokümanlar dosyadan okundukça işlenir (tam liste bir kez oluşturulur)
+    documents = loader.load_processed_data(lazy=True)
+
+    if documents is None:
         print("Veri yüklenemedi!")
         return
 
-    print(f"Toplam {len(documents)} doküman hazır")
     print()
 
     # ============================================
@@ -61,28 +162,89 @@ def main():
     print("ADIM 2: Embedding Oluşturma")
     print("-" * 70)
 
-    embeddings_file = "./data/embeddings.pkl"
-
-    # Daha önce oluşturulmuş embedding var mı kontrol et
-    if os.path.exists(embeddings_file):
-        print("Daha önce oluşturulmuş embedding'ler bulundu, yükleniyor...")
-        embedding_data = EmbeddingModel.load_embeddings(embeddings_file)
-        embeddings = embedding_data['embeddings']
-        valid_documents = embedding_data['documents']
-    else:
-        print("Embedding'ler oluşturuluyor (bu işlem biraz zaman alabilir)...")
+    embeddings_file = "./data/embeddings.npy"
+    documents_file = "./data/documents.docs"
+    vector_store_path = "./data/vector_store"
 
-        # Embedding modelini yükle
-        embedder = EmbeddingModel()
+    total_documents = 0
+    valid_documents = []
+    for doc in documents:
+        total_documents += 1
+        if doc.get('text') and isinstance(doc['text'], str):
+            valid_documents.append(doc)
+    print(f"Toplam {total_documents} doküman, {len(valid_documents)} geçerli doküman bulundu")
 
-        # Dokümanları embedding'e çevir
-        embeddings, valid_documents = embedder.encode_documents(documents)
+    if not valid_documents:
+        print("Veri yüklenemedi!")
+        return
 
-        # Kaydet
-        embedder.save_embeddings(embeddings, valid_documents, embeddings_file)
+    # Tekrar eden anlamlar birleştirilir ('group' modunda anlamlar madde başına bağlanır)
+    dedup_mode = os.getenv('TDK_DEDUP', 'merge')
+    dedup = None
+    raw_documents = valid_documents
+    if dedup_mode != 'off':
+        dedup = Deduplicator(
+            threshold=float(os.getenv('TDK_DEDUP_THRESHOLD', '0.8')),
+            group_senses=(dedup_mode == 'group')
+        )
+        valid_documents = dedup.deduplicate(valid_documents)
+        print(f"Tekrar ayıklama sonrası {len(valid_documents)} kayıt")
+
+    # Parçalar halinde paralel encode; yarıda kalırsa tamamlanan parçalar korunur
+    sharded = ShardedEmbedder(
+        shard_dir="./data/embedding_shards",
+        backend=os.getenv('TDK_EMBED_BACKEND', 'torch'),
+        shard_size=int(os.getenv('TDK_EMBED_SHARD_SIZE', '2048')),
+        workers=int(os.getenv('TDK_EMBED_WORKERS', '0')) or None,
+        dtype=os.getenv('TDK_EMBED_DTYPE', 'float32')
+    )
+    model_id = f"{sharded.model_name}:{sharded.backend}"
+
+    # Mevcut index ve manifest varsa sadece değişen dokümanlar encode edilir
+    store, manifest = load_updatable_store(vector_store_path, model_id)
+    encode_seconds = None
+    if store is None:
+        fingerprint = documents_fingerprint(valid_documents)
+        embedding_data = load_current_embeddings(embeddings_file, fingerprint, sharded.model_name)
+
+    if store is not None:
+        added_documents, added_hashes, removed_ids = manifest.diff(valid_documents)
+        print(f"Artımlı güncelleme: {len(added_documents)} yeni/değişmiş, "
+              f"{len(removed_ids)} silinmiş doküman")
+        if added_documents:
+            embeddings = encode_texts(sharded, [doc['text'] for doc in added_documents])
+        else:
+            embeddings = np.zeros((0, store.embedding_dim), dtype='float32')
+    else:
+        if embedding_data is None:
+            print("Embedding'ler oluşturuluyor (bu işlem biraz zaman alabilir)...")
+            # Parçalar doğrudan son dosyada birleştirilir
+            started = time.perf_counter()
+            embeddings = sharded.encode([doc['text'] for doc in valid_documents], embeddings_file)
+            encode_seconds = time.perf_counter() - started
+
+            # Kaydet: matris + id listesi + paylaşılan doküman deposu
+            EmbeddingModel.write_embeddings(
+                embeddings, valid_documents, sharded.model_name, embeddings_file,
+                documents_path=documents_file, dtype=sharded.dtype, fingerprint=fingerprint
+            )
+            sharded.cleanup()
+            embedding_data = EmbeddingModel.load_embeddings(embeddings_file)
+
+        # Matris ve dokümanlar mmap'li; vector store aynı doküman deposunu kullanır
+        embeddings = embedding_data['embeddings']
+        index_documents = embedding_data['documents']
 
-    print(f"{len(valid_documents)} doküman için embedding hazır")
     print(f"Embedding shape: {embeddings.shape}")
+    embedder = None
+    bench_sample = int(os.getenv('TDK_DEDUP_BENCH_SAMPLE', '300'))
+    if dedup is not None and encode_seconds is not None and bench_sample:
+        # Tekrar ayıklamanın encode süresine etkisi aynı örnek üzerinde ölçülür
+        embedder = EmbeddingModel(model_name=sharded.model_name, backend=sharded.backend)
+        dedup.measure_encode(lambda texts: embedder.encode_batch(texts, show_progress=False),
+                             raw_documents, sample_headwords=bench_sample)
+    if dedup is not None:
+        dedup.print_report(embedding_dim=embeddings.shape[1], encode_seconds=encode_seconds)
     print()
 
     # ============================================
@@ -91,14 +253,24 @@ def main():
     print("ADIM 3: Vector Store Oluşturma")
     print("-" * 70)
 
-    vector_store_path = "./data/vector_store"
-
-    # Vector store oluştur
-    store = FAISSVectorStore(embedding_dim=embeddings.shape[1])
-    store.create_index(embeddings, valid_documents)
+    if store is not None:
+        if added_documents or removed_ids:
+            new_ids = store.update(embeddings, added_documents, removed_ids)
+            manifest.apply(added_hashes, new_ids, removed_ids)
+            store.save(vector_store_path)
+            manifest.save(vector_store_path)
+        else:
+            print("Index güncel, değişiklik yok")
+    else:
+        # Vector store oluştur
+        # Kosinüs metriği: skorlar -1..1 arasında, eşikler anlamlı
+        store = FAISSVectorStore(embedding_dim=embeddings.shape[1], metric='cosine',
+                                 bm25_params={'use_stem': os.getenv('TDK_BM25_STEM', '0') == '1'})
+        store.create_index(embeddings, index_documents)
 
-    # Kaydet
-    store.save(vector_store_path)
+        # Kaydet
+        store.save(vector_store_path)
+        IndexManifest.from_documents(model_id, valid_documents).save(vector_store_path)
 
     # İstatistikleri göster
     store.get_stats()
@@ -110,8 +282,9 @@ def main():
     print("ADIM 4: Sistem Testi")
     print("-" * 70)
 
-    # Embedding modelini test için yükle
-    embedder = EmbeddingModel()
+    # Embedding modelini test için yükle (ölçümde yüklendiyse aynı model)
+    if embedder is None:
+        embedder = EmbeddingModel()
 
     # Test sorguları
     test_queries = [
@@ -150,10 +323,16 @@ def main():
     print("=" * 70)
     print()
     print("Oluşturulan dosyalar:")
-    print(f"  - {processed_file}")
-    print(f"  - {embeddings_file}")
+    print(f"  - {loader.processed_path()}")
+    print(f"  - {embeddings_file} (+ {', '.join(EmbeddingModel.embedding_paths(embeddings_file))})")
+    print(f"  - {documents_file}")
     print(f"  - {vector_store_path}.index")
+    if os.path.exists(f"{vector_store_path}.docs"):
+        # Artımlı güncellenen index kendi doküman deposunu tutar
+        print(f"  - {vector_store_path}.docs")
+    print(f"  - {BM25Index.path_for(vector_store_path)}")
     print(f"  - {vector_store_path}.pkl")
+    print(f"  - {IndexManifest.path_for(vector_store_path)}")
     print()
     print("Artık chatbot'u çalıştırmaya hazırsınız!")
     print()
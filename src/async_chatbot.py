@@ -0,0 +1,186 @@
+"""
+TDKChatbot için asyncio arayüzü.
+
+Gemini çağrıları ağ beklemesidir; thread başına bir istek yerine
+asyncio ile yüzlerce sohbet aynı anda beklemede tutulabilir.
+CPU yoğun işler (embedding, FAISS araması, önbellek) event loop'u
+bloklamamak için sınırlı bir thread havuzunda çalıştırılır.
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AsyncTDKChatbot:
+    """TDKChatbot'u asyncio ile kullanmak için sarmalayıcı."""
+
+    def __init__(self, chatbot, cpu_workers=None, max_concurrent_llm=1024):
+        """
+        Args:
+            chatbot: Yüklenmiş TDKChatbot
+            cpu_workers: Embedding/FAISS işleri için thread sayısı
+                         (None = çekirdek sayısı, en fazla 8)
+            max_concurrent_llm: Aynı anda beklenen en fazla Gemini çağrısı
+        """
+        self.bot = chatbot
+        self.cpu_workers = cpu_workers or min(8, os.cpu_count() or 1)
+        self.executor = ThreadPoolExecutor(max_workers=self.cpu_workers, thread_name_prefix="tdk-cpu")
+        self.max_concurrent_llm = max_concurrent_llm
+        self._llm_slots = None
+
+    async def _run_cpu(self, fn, *args):
+        """Fonksiyonu CPU thread havuzunda çalıştırır."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, fn, *args)
+
+    def _slots(self):
+        # Semaphore, çalışan event loop içinde oluşturulmalı
+        if self._llm_slots is None:
+            self._llm_slots = asyncio.Semaphore(self.max_concurrent_llm)
+        return self._llm_slots
+
+    async def _generate(self, query, context):
+        """Gemini'den asenkron yanıt alır (hataları yukarı iletir)."""
+        prompt = self.bot.build_prompt(query, context)
+        async with self._slots():
+            response = await self.bot.model.generate_content_async(prompt)
+        return response.text
+
+    async def _prepare(self, query, top_k):
+        """
+        Retrieval, önbellek kontrolü ve context oluşturma (CPU havuzunda).
+
+        Returns:
+            tuple: (sonuçlar, retrieval, önbellekteki yanıt, önbellek bilgisi, context,
+                    sorgu embedding'i)
+        """
+        def prepare():
+            results, retrieval, embedding = self.bot.retrieve(query, top_k=top_k, return_embedding=True)
+            if not results:
+                return results, retrieval, None, None, None, embedding
+            response, cache = self.bot.lookup_cached_response(query, results, embedding)
+            context = self.bot.create_context(results) if response is None else None
+            return results, retrieval, response, cache, context, embedding
+
+        return await self._run_cpu(prepare)
+
+    async def chat(self, query, top_k=5):
+        """
+        TDKChatbot.chat() ile aynı sonucu döndürür, Gemini beklenirken loop serbesttir.
+
+        Args:
+            query: Kullanıcı sorusu
+            top_k: Kaç doküman kullanılacak
+
+        Returns:
+            dict: Yanıt ve metadata
+        """
+        if not query or not query.strip():
+            return {
+                'response': "Lütfen bir soru sorun.",
+                'context': None,
+                'results': []
+            }
+
+        results, retrieval, response, cache, context, embedding = await self._prepare(query, top_k)
+
+        if not results:
+            return {
+                'response': "Bu konuda TDK Sözlük'te bilgi bulamadım. Başka bir şey sorar mısınız?",
+                'context': None,
+                'results': [],
+                'retrieval': retrieval
+            }
+
+        if response is None:
+            try:
+                response = await self._generate(query, context)
+            except Exception as e:
+                response = f"Yanıt oluşturulurken hata: {str(e)}"
+            else:
+                # Önbellek hatası yanıtı değiştirmez (store_response hatayı yazdırır)
+                await self._run_cpu(self.bot.store_response, query, results, response, embedding)
+
+        return {
+            'response': response,
+            'results': results,
+            'query': query,
+            'retrieval': retrieval,
+            'cache': cache
+        }
+
+    async def chat_batch(self, queries, top_k=5):
+        """
+        Birden fazla soruyu eşzamanlı yanıtlar.
+
+        Returns:
+            list: Her soru için chat() formatında sonuç ('error' alanı hata varsa)
+        """
+        async def one(query):
+            if not isinstance(query, str) or not query.strip():
+                return {'response': "Lütfen bir soru sorun.", 'context': None,
+                        'results': [], 'error': "Boş mesaj"}
+            try:
+                return await self.chat(query, top_k=top_k)
+            except Exception as e:
+                return {'response': None, 'results': [], 'query': query,
+                        'error': f"Arama hatası: {str(e)}"}
+
+        return await asyncio.gather(*(one(query) for query in queries))
+
+    async def chat_stream(self, query, top_k=5):
+        """
+        TDKChatbot.chat_stream() olaylarını asenkron üretir.
+
+        Yields:
+            dict: 'sources', 'token' (birden fazla), 'done' veya 'error' olayları
+        """
+        if not query or not query.strip():
+            async for event in self._single_response([], None, None, "Lütfen bir soru sorun."):
+                yield event
+            return
+
+        results, retrieval, response, cache, context, embedding = await self._prepare(query, top_k)
+
+        if not results:
+            response = "Bu konuda TDK Sözlük'te bilgi bulamadım. Başka bir şey sorar mısınız?"
+            async for event in self._single_response([], retrieval, None, response):
+                yield event
+            return
+
+        if response is not None:
+            async for event in self._single_response(results, retrieval, cache, response):
+                yield event
+            return
+
+        yield {'type': 'sources', 'results': results, 'retrieval': retrieval, 'cache': cache}
+
+        chunks = []
+        try:
+            prompt = self.bot.build_prompt(query, context)
+            async with self._slots():
+                stream = await self.bot.model.generate_content_async(prompt, stream=True)
+                async for chunk in stream:
+                    text = chunk.text
+                    if text:
+                        chunks.append(text)
+                        yield {'type': 'token', 'text': text}
+        except Exception as e:
+            yield {'type': 'error', 'error': f"Yanıt oluşturulurken hata: {str(e)}"}
+            return
+
+        response = ''.join(chunks)
+        await self._run_cpu(self.bot.store_response, query, results, response, embedding)
+        yield {'type': 'done', 'response': response}
+
+    @staticmethod
+    async def _single_response(results, retrieval, cache, response):
+        """Hazır yanıtı streaming olayları olarak döndürür."""
+        yield {'type': 'sources', 'results': results, 'retrieval': retrieval, 'cache': cache}
+        yield {'type': 'token', 'text': response}
+        yield {'type': 'done', 'response': response}
+
+    def close(self):
+        """CPU thread havuzunu kapatır."""
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,156 @@
+"""
+Dinamik mikro-batching.
+
+Eşzamanlı gelen tekil istekleri kısa bir süre (veya en fazla
+max_batch_size istek birikene kadar) bekleterek tek bir toplu
+çağrıda işler ve sonuçları bekleyen çağıranlara dağıtır.
+Örneğin her istek thread'inin ayrı ayrı yaptığı batch-size-1 BERT
+çağrıları yerine tek bir toplu encode yapılır.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """Eşzamanlı istekleri toplayıp tek bir batch fonksiyonuyla işler."""
+
+    def __init__(self, batch_fn, max_batch_size=32, max_wait_ms=5.0, name="micro-batcher"):
+        """
+        Args:
+            batch_fn: Öğe listesi alıp aynı sırada sonuç listesi döndüren fonksiyon
+            max_batch_size: Bir batch'teki en fazla öğe sayısı
+            max_wait_ms: İlk öğe geldikten sonra diğerleri için beklenecek süre
+            name: Arka plan thread'inin adı
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+
+        self._queue = queue.Queue()
+        self._closed = False
+
+        self._lock = threading.Lock()
+        self._stats = {
+            'batches': 0,
+            'items': 0,
+            'max_batch_size': 0,
+            'total_queue_delay': 0.0,
+            'max_queue_delay': 0.0,
+            'batch_sizes': {}
+        }
+
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item, timeout=None):
+        """
+        Öğeyi kuyruğa ekler ve sonucunu bekler.
+
+        Args:
+            item: İşlenecek öğe
+            timeout: En fazla bekleme süresi (saniye, None = sınırsız)
+
+        Returns:
+            batch_fn'in bu öğe için döndürdüğü sonuç
+        """
+        return self.submit_async(item).result(timeout=timeout)
+
+    def submit_async(self, item):
+        """
+        Öğeyi kuyruğa ekler, beklemeden Future döndürür.
+
+        Returns:
+            Future: Sonuç hazır olduğunda tamamlanır
+        """
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Micro-batcher kapatıldı!")
+            self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    def _run(self):
+        """Arka plan döngüsü: kuyruktan batch toplar ve işler."""
+        while True:
+            first = self._queue.get()
+            if first is None:
+                break
+
+            batch = [first]
+            deadline = first[2] + self.max_wait
+
+            # Süre dolana veya batch dolana kadar topla
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    entry = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if entry is None:
+                    # Kapatma sinyali: mevcut batch'i bitirip çık
+                    self._queue.put(None)
+                    break
+                batch.append(entry)
+
+            self._process(batch)
+
+    def _process(self, batch):
+        """Bir batch'i işler ve sonuçları Future'lara dağıtır."""
+        started = time.perf_counter()
+        items = [item for item, _, _ in batch]
+
+        try:
+            results = self.batch_fn(items)
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+
+        delays = [started - submitted for _, _, submitted in batch]
+        with self._lock:
+            stats = self._stats
+            stats['batches'] += 1
+            stats['items'] += len(batch)
+            stats['max_batch_size'] = max(stats['max_batch_size'], len(batch))
+            stats['total_queue_delay'] += sum(delays)
+            stats['max_queue_delay'] = max(stats['max_queue_delay'], max(delays))
+            stats['batch_sizes'][len(batch)] = stats['batch_sizes'].get(len(batch), 0) + 1
+
+    def get_stats(self):
+        """
+        Batch boyutu ve kuyruk bekleme istatistikleri.
+
+        Returns:
+            dict: batches, items, avg/max batch size, avg/max queue delay (ms),
+                  batch boyutu histogramı
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['batch_sizes'] = dict(sorted(self._stats['batch_sizes'].items()))
+
+        batches = stats['batches'] or 1
+        items = stats['items'] or 1
+        return {
+            'batches': stats['batches'],
+            'items': stats['items'],
+            'avg_batch_size': stats['items'] / batches,
+            'max_batch_size': stats['max_batch_size'],
+            'avg_queue_delay_ms': stats['total_queue_delay'] / items * 1000,
+            'max_queue_delay_ms': stats['max_queue_delay'] * 1000,
+            'batch_sizes': stats['batch_sizes']
+        }
+
+    def close(self):
+        """Arka plan thread'ini durdurur (kuyruktaki öğeler işlenir)."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join()
@@ -0,0 +1,375 @@
+"""
+Dokümanların metinleri üzerinde BM25 ters (inverted) index'i.
+
+Kelime index'i sadece madde başlarına bakar; bir kelime tanımın veya
+örnek cümlenin içinde geçiyorsa bulunamaz. Bu index dokümanların
+metnindeki tüm kelimeleri posting listelerinde tutar ve BM25 ile skorlar.
+
+Kompakt format (CSR): tüm posting'ler tek bir doc_id dizisinde (uint32),
+terim frekansları ayrı bir dizide (uint16), her terimin başlangıcı bir
+offset tablosunda. Index vector store'un yanına .bm25.npz olarak
+kaydedilir; yüklemede sadece diziler okunur, Python nesnesi oluşturulmaz
+(kelime listesi hariç).
+"""
+
+import json
+import math
+import os
+import re
+import unicodedata
+from array import array
+from collections import Counter
+
+import numpy as np
+
+from document_store import field_values
+from text_utils import turkish_lower
+
+
+_TOKEN = re.compile(r'\w+')
+
+# Doküman metnindeki alan etiketleri ("Kelime:", "Anlam:", "Örnek kullanım:")
+# her dokümanda geçer, index'e alınmaz
+FIELD_LABELS = frozenset({'kelime', 'anlam', 'örnek', 'kullanım', 'detaylı'})
+
+# Hafif Türkçe kök bulma için ek listesi (uzundan kısaya denenir)
+_SUFFIXES = sorted({
+    'lar', 'ler', 'ları', 'leri', 'ların', 'lerin', 'larda', 'lerde', 'lardan', 'lerden',
+    'nın', 'nin', 'nun', 'nün', 'ın', 'in', 'un', 'ün',
+    'yı', 'yi', 'yu', 'yü', 'ı', 'i', 'u', 'ü',
+    'ya', 'ye', 'a', 'e', 'da', 'de', 'ta', 'te', 'dan', 'den', 'tan', 'ten',
+    'yla', 'yle', 'la', 'le', 'ca', 'ce', 'ça', 'çe',
+    'dır', 'dir', 'dur', 'dür', 'tır', 'tir', 'tur', 'tür',
+    'lık', 'lik', 'luk', 'lük', 'sı', 'si', 'su', 'sü', 'ki',
+    'mak', 'mek', 'ması', 'mesi'
+}, key=len, reverse=True)
+
+MIN_STEM = 3
+
+
+def stem(token):
+    """
+    Kelimenin sonundaki yaygın ekleri atar (en fazla iki ek, kök en az 3 harf).
+
+    Sözlük tabanlı değildir; aynı fonksiyon hem index'te hem sorguda
+    kullanıldığı için çekimli biçimler aynı köke düşer.
+    """
+    for _ in range(2):
+        for suffix in _SUFFIXES:
+            if token.endswith(suffix) and len(token) - len(suffix) >= MIN_STEM:
+                token = token[:-len(suffix)]
+                break
+        else:
+            break
+    return token
+
+
+def tokenize(text, use_stem=False, stop_words=()):
+    """
+    Metni Türkçe kurallarına göre küçük harfe çevirip kelimelere ayırır.
+
+    Args:
+        text: Metin
+        use_stem: Ekleri at
+        stop_words: Atlanacak kelimeler
+
+    Returns:
+        list: Terimler (2 harften kısa kelimeler atlanır)
+    """
+    text = unicodedata.normalize('NFC', turkish_lower(text))
+    tokens = [t for t in _TOKEN.findall(text) if len(t) > 1 and t not in stop_words]
+    if use_stem:
+        tokens = [stem(t) for t in tokens]
+    return tokens
+
+
+def _postings(documents, first_id, term_ids, field, use_stem):
+    """
+    Dokümanları tokenize edip posting dizilerini oluşturur.
+
+    Args:
+        documents: Doküman listesi veya DocumentStore
+        first_id: İlk dokümanın id'si
+        term_ids: Terim -> id sözlüğü (yeni terimler eklenir)
+        field: Index'lenecek alan
+        use_stem: Ekleri at
+
+    Returns:
+        tuple: (terim id'leri, doküman id'leri, terim frekansları, doküman uzunlukları)
+    """
+    postings_term = array('I')
+    postings_doc = array('I')
+    postings_tf = array('H')
+    doc_lengths = array('I')
+
+    for doc_id, text in enumerate(field_values(documents, field, None), first_id):
+        tokens = tokenize(text, use_stem=use_stem, stop_words=FIELD_LABELS) if text else []
+        doc_lengths.append(len(tokens))
+        for term, tf in Counter(tokens).items():
+            postings_term.append(term_ids.setdefault(term, len(term_ids)))
+            postings_doc.append(doc_id)
+            postings_tf.append(min(tf, 0xFFFF))
+
+    return (np.frombuffer(postings_term, dtype=np.uint32),
+            np.frombuffer(postings_doc, dtype=np.uint32),
+            np.frombuffer(postings_tf, dtype=np.uint16),
+            np.frombuffer(doc_lengths, dtype=np.uint32).copy())
+
+
+def _offsets(terms, n_terms):
+    """Terim id'lerinden CSR offset tablosu (n_terms + 1)."""
+    counts = np.bincount(terms, minlength=n_terms)
+    offsets = np.zeros(n_terms + 1, dtype=np.uint64)
+    np.cumsum(counts, out=offsets[1:])
+    return offsets
+
+
+class BM25Index:
+    """Doküman metinleri üzerinde BM25 araması."""
+
+    VERSION = 1
+
+    def __init__(self, vocabulary, offsets, doc_ids, term_freqs, doc_lengths,
+                 use_stem=False, field='text', version=None, k1=1.2, b=0.75):
+        """
+        Args:
+            vocabulary: Terim listesi (terim id'si sırasıyla)
+            offsets: Terim başına posting başlangıçları (n_terms + 1)
+            doc_ids: Posting'lerin doküman id'leri (terim sırasıyla, her terimde artan)
+            term_freqs: Posting'lerin terim frekansları
+            doc_lengths: Doküman başına terim sayısı
+            use_stem: Terimler kök bulma ile oluşturulduysa True
+            field: Index'lenen doküman alanı
+            version: Index'in oluşturulduğu vector store sürümü
+            k1, b: BM25 parametreleri
+        """
+        self.vocabulary = vocabulary
+        self.term_ids = {term: i for i, term in enumerate(vocabulary)}
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.term_freqs = term_freqs
+        self.doc_lengths = doc_lengths
+        self.use_stem = use_stem
+        self.field = field
+        self.version = version
+        self.k1 = k1
+        self.b = b
+
+        # Silinmiş (boş) dokümanlar istatistiklere girmez
+        self.n_docs = int(np.count_nonzero(doc_lengths))
+        self.avg_length = float(doc_lengths.sum()) / max(self.n_docs, 1)
+
+    @classmethod
+    def build(cls, documents, field='text', use_stem=False, version=None):
+        """
+        Dokümanlardan index oluşturur.
+
+        Args:
+            documents: Doküman listesi veya DocumentStore
+            field: Index'lenecek alan
+            use_stem: Ekleri at
+            version: Vector store sürümü
+
+        Returns:
+            BM25Index
+        """
+        term_ids = {}
+        terms, doc_ids, term_freqs, doc_lengths = _postings(documents, 0, term_ids, field, use_stem)
+
+        # Kararlı sıralama: her terimin doküman id'leri artan kalır
+        order = np.argsort(terms, kind='stable')
+
+        return cls(
+            vocabulary=list(term_ids),
+            offsets=_offsets(terms, len(term_ids)),
+            doc_ids=doc_ids[order],
+            term_freqs=term_freqs[order],
+            doc_lengths=doc_lengths,
+            use_stem=use_stem,
+            field=field,
+            version=version
+        )
+
+    def update(self, documents, new_ids, remove_ids=()):
+        """
+        Index'i yeniden oluşturmadan doküman ekler ve siler.
+
+        Sadece yeni dokümanlar tokenize edilir; mevcut posting'ler dizi
+        işlemleriyle yeni CSR'a taşınır. Silinen dokümanların posting'leri
+        atılır ve uzunlukları sıfırlanır (id'ler değişmez, vector store ile aynı).
+
+        Args:
+            documents: Yeni dokümanlar
+            new_ids: Yeni dokümanların id'leri (ardışık, mevcut id'lerden büyük)
+            remove_ids: Silinen doküman id'leri
+        """
+        first_id = int(new_ids[0]) if len(new_ids) else len(self.doc_lengths)
+        n_total = first_id + len(documents)
+        if first_id < len(self.doc_lengths):
+            raise ValueError("Yeni doküman id'leri mevcut id'lerden büyük olmalı!")
+
+        term_ids = dict(self.term_ids)
+        new_terms, new_docs, new_tfs, new_lengths = _postings(documents, first_id, term_ids, self.field, self.use_stem)
+
+        doc_lengths = np.zeros(n_total, dtype=np.uint32)
+        doc_lengths[:len(self.doc_lengths)] = self.doc_lengths
+        doc_lengths[first_id:] = new_lengths
+        remove_ids = np.asarray(remove_ids, dtype=np.int64)
+        doc_lengths[remove_ids[remove_ids < n_total]] = 0
+
+        # Mevcut posting'lerin terim id'leri CSR offset'lerinden çıkarılır
+        old_terms = np.repeat(np.arange(len(self.vocabulary), dtype=np.uint32),
+                              np.diff(self.offsets).astype(np.int64))
+        keep = doc_lengths[self.doc_ids] > 0 if len(remove_ids) else slice(None)
+
+        # Yeni id'ler eskilerden büyük ve sona eklendiği için kararlı sıralama
+        # her terimde artan doküman id'lerini korur
+        terms = np.concatenate([old_terms[keep], new_terms])
+        order = np.argsort(terms, kind='stable')
+
+        self.vocabulary = list(term_ids)
+        self.term_ids = term_ids
+        self.offsets = _offsets(terms, len(term_ids))
+        self.doc_ids = np.concatenate([self.doc_ids[keep], new_docs])[order]
+        self.term_freqs = np.concatenate([self.term_freqs[keep], new_tfs])[order]
+        self.doc_lengths = doc_lengths
+        self.n_docs = int(np.count_nonzero(doc_lengths))
+        self.avg_length = float(doc_lengths.sum()) / max(self.n_docs, 1)
+
+    @staticmethod
+    def path_for(vector_store_path):
+        return f"{vector_store_path}.bm25.npz"
+
+    def save(self, filepath):
+        """Index'i tek bir .npz dosyasına atomik olarak kaydeder."""
+        meta = {
+            'format': self.VERSION,
+            'use_stem': self.use_stem,
+            'field': self.field,
+            'version': self.version,
+            'k1': self.k1,
+            'b': self.b
+        }
+        tmp_path = f"{filepath}.tmp.npz"
+        np.savez(
+            tmp_path,
+            meta=np.frombuffer(json.dumps(meta).encode('utf-8'), dtype=np.uint8),
+            vocabulary=np.frombuffer('\n'.join(self.vocabulary).encode('utf-8'), dtype=np.uint8),
+            offsets=self.offsets,
+            doc_ids=self.doc_ids,
+            term_freqs=self.term_freqs,
+            doc_lengths=self.doc_lengths
+        )
+        os.replace(tmp_path, filepath)
+
+    @classmethod
+    def load(cls, filepath):
+        """
+        Kaydedilmiş index'i yükler.
+
+        Returns:
+            BM25Index veya None (dosya yoksa ya da format eskiyse)
+        """
+        if not os.path.exists(filepath):
+            return None
+        with np.load(filepath) as data:
+            meta = json.loads(data['meta'].tobytes().decode('utf-8'))
+            if meta.get('format') != cls.VERSION:
+                return None
+            vocabulary = data['vocabulary'].tobytes().decode('utf-8')
+            return cls(
+                vocabulary=vocabulary.split('\n') if vocabulary else [],
+                offsets=data['offsets'],
+                doc_ids=data['doc_ids'],
+                term_freqs=data['term_freqs'],
+                doc_lengths=data['doc_lengths'],
+                use_stem=meta['use_stem'],
+                field=meta['field'],
+                version=meta['version'],
+                k1=meta['k1'],
+                b=meta['b']
+            )
+
+    @classmethod
+    def for_store(cls, vector_store, vector_store_path):
+        """
+        Vector store'un yanındaki index'i yükler; yoksa veya başka bir
+        sürüme aitse dokümanlardan bellekte oluşturur.
+
+        Args:
+            vector_store: Yüklenmiş FAISSVectorStore
+            vector_store_path: Vector store dosya yolu (uzantısız)
+
+        Returns:
+            BM25Index
+        """
+        index = cls.load(cls.path_for(vector_store_path))
+        if index is not None and index.version == vector_store.version:
+            return index
+
+        print("BM25 index'i bulunamadı veya güncel değil, dokümanlardan oluşturuluyor...")
+        return cls.build(vector_store.documents, **vector_store.bm25_params, version=vector_store.version)
+
+    def search(self, query, top_k=5, stop_words=(), max_df_ratio=0.5):
+        """
+        Sorguyu BM25 ile skorlar.
+
+        Args:
+            query: Sorgu metni
+            top_k: Kaç doküman döndürülecek
+            stop_words: Sorgudan atılacak kelimeler
+            max_df_ratio: Dokümanların bu oranından fazlasında geçen terimler,
+                          sorguda daha seçici bir terim varsa atlanır (skora etkisi
+                          çok az, posting listesi çok uzun)
+
+        Returns:
+            list: (doc_id, skor) listesi, skora göre azalan
+        """
+        postings = []
+        for term in set(tokenize(query, use_stem=self.use_stem, stop_words=stop_words)):
+            term_id = self.term_ids.get(term)
+            if term_id is not None:
+                postings.append((int(self.offsets[term_id]), int(self.offsets[term_id + 1])))
+
+        # Çok yaygın terimler, sorguda daha seçici bir terim varsa atlanır
+        selective = [(start, end) for start, end in postings if end - start <= max_df_ratio * self.n_docs]
+        if selective:
+            postings = selective
+
+        matched_docs = []
+        matched_scores = []
+        for start, end in postings:
+            df = end - start
+            docs = self.doc_ids[start:end]
+            tf = self.term_freqs[start:end].astype(np.float32)
+            norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[docs] / self.avg_length)
+            idf = math.log(1 + (self.n_docs - df + 0.5) / (df + 0.5))
+            matched_docs.append(docs)
+            matched_scores.append(idf * tf * (self.k1 + 1) / (tf + norm))
+
+        if not matched_docs:
+            return []
+
+        # Aynı dokümana düşen terim skorlarını topla
+        doc_ids, inverse = np.unique(np.concatenate(matched_docs), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(matched_scores))
+
+        if len(scores) > top_k:
+            top = np.argpartition(-scores, top_k)[:top_k]
+        else:
+            top = np.arange(len(scores))
+        # Eşit skorlarda küçük id önce (sonuç sırası deterministik)
+        top = top[np.lexsort((doc_ids[top], -scores[top]))]
+        return [(int(doc_ids[i]), float(scores[i])) for i in top]
+
+    def memory_usage(self):
+        """Dizilerin byte cinsinden boyutu."""
+        return int(self.offsets.nbytes + self.doc_ids.nbytes + self.term_freqs.nbytes + self.doc_lengths.nbytes)
+
+    def get_info(self):
+        return {
+            'terms': len(self.vocabulary),
+            'postings': int(len(self.doc_ids)),
+            'bytes': self.memory_usage(),
+            'stem': self.use_stem
+        }
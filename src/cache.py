@@ -0,0 +1,439 @@
+"""
+Önbellek (cache) katmanları.
+
+- LRUCache: Process içi, boyut ve süre (TTL) sınırlı LRU önbellek
+- SqliteCache: Diskte kalıcı önbellek (yeniden başlatmalarda korunur)
+- TieredCache: Önce bellek, sonra disk; diskte bulunan kayıt belleğe taşınır
+- QueryEmbeddingCache: Normalize edilmiş sorgu -> embedding önbelleği
+- ResponseCache: (sorgu, getirilen dokümanlar) -> LLM yanıtı önbelleği
+"""
+
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from text_utils import normalize_query
+
+
+class LRUCache:
+    """Boyut ve TTL sınırlı, thread-safe LRU önbellek."""
+
+    def __init__(self, max_size=10000, ttl=None):
+        """
+        Args:
+            max_size: En fazla kayıt sayısı (dolunca en eski kullanılan silinir)
+            ttl: Kayıt ömrü (saniye, None = süresiz)
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """Kaydı döndürür (yoksa veya süresi dolmuşsa None)."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, stored_at = entry
+            if self.ttl is not None and time.time() - stored_at > self.ttl:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Kaydı ekler, gerekirse en eski kullanılanı siler."""
+        with self._lock:
+            self._data[key] = (value, time.time())
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def items(self):
+        """Süresi dolmamış (anahtar, değer) çiftleri (en eskiden en yeniye)."""
+        now = time.time()
+        with self._lock:
+            return [(key, value) for key, (value, stored_at) in self._data.items()
+                    if self.ttl is None or now - stored_at <= self.ttl]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def after_fork(self):
+        """Fork sonrası child process'te çağrılır (kilit yeniden oluşturulur)."""
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get_stats(self):
+        """Hit/miss sayaçları."""
+        total = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations
+        }
+
+
+class SqliteCache:
+    """SQLite dosyasında kalıcı önbellek (değerler pickle ile saklanır)."""
+
+    def __init__(self, filepath, max_size=100000, ttl=None):
+        """
+        Args:
+            filepath: SQLite dosya yolu
+            max_size: En fazla kayıt sayısı (dolunca en eski kullanılanlar silinir)
+            ttl: Kayıt ömrü (saniye, None = süresiz)
+        """
+        os.makedirs(os.path.dirname(filepath) or '.', exist_ok=True)
+        self.filepath = filepath
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+        self.hits = 0
+        self.misses = 0
+
+    def _connect(self):
+        conn = sqlite3.connect(self.filepath, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value BLOB, stored_at REAL, used_at REAL)"
+        )
+        conn.commit()
+        return conn
+
+    def after_fork(self):
+        """Fork sonrası child process'te çağrılır: SQLite bağlantısı process'ler arası paylaşılamaz."""
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+
+    def get(self, key):
+        """Kaydı döndürür (yoksa veya süresi dolmuşsa None)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, stored_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or (self.ttl is not None and time.time() - row[1] > self.ttl):
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE cache SET used_at = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+
+        return pickle.loads(row[0])
+
+    def put(self, key, value):
+        """Kaydı ekler, gerekirse eski kayıtları siler."""
+        now = time.time()
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, stored_at, used_at) VALUES (?, ?, ?, ?)",
+                (key, blob, now, now)
+            )
+            if self.ttl is not None:
+                self._conn.execute("DELETE FROM cache WHERE stored_at < ?", (now - self.ttl,))
+            self._conn.execute(
+                "DELETE FROM cache WHERE key IN ("
+                "SELECT key FROM cache ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_size,)
+            )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def get_stats(self):
+        """Hit/miss sayaçları."""
+        total = self.hits + self.misses
+        return {
+            'size': len(self),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'path': self.filepath
+        }
+
+
+class TieredCache:
+    """Bellek + disk önbelleği. Diskteki kayıtlar okununca belleğe taşınır."""
+
+    def __init__(self, memory, disk=None):
+        """
+        Args:
+            memory: Bellek katmanı (LRUCache)
+            disk: Disk katmanı (SqliteCache, None = sadece bellek)
+        """
+        self.memory = memory
+        self.disk = disk
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.put(key, value)
+        return value
+
+    def put(self, key, value):
+        self.memory.put(key, value)
+        if self.disk is not None:
+            self.disk.put(key, value)
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def after_fork(self):
+        self.memory.after_fork()
+        if self.disk is not None:
+            self.disk.after_fork()
+
+    def get_stats(self):
+        return {
+            'memory': self.memory.get_stats(),
+            'disk': self.disk.get_stats() if self.disk is not None else None
+        }
+
+
+class QueryEmbeddingCache:
+    """
+    Sorgu embedding önbelleği.
+
+    Anahtar normalize edilmiş sorgudur (Türkçe küçük harf, noktalama ve
+    boşluk temizliği); "Kitap ne demek?" ve "kitap ne demek" aynı
+    embedding'i kullanır.
+    """
+
+    def __init__(self, max_size=10000, ttl=None, filepath=None, model_name=None):
+        """
+        Args:
+            max_size: Bellekteki en fazla kayıt sayısı
+            ttl: Kayıt ömrü (saniye, None = süresiz)
+            filepath: Kalıcı disk katmanı için SQLite dosyası (None = sadece bellek)
+            model_name: Anahtara eklenir (model değişince eski kayıtlar kullanılmaz)
+        """
+        disk = SqliteCache(filepath, max_size=max_size * 10, ttl=ttl) if filepath else None
+        self.cache = TieredCache(LRUCache(max_size=max_size, ttl=ttl), disk)
+        self.model_name = model_name or ''
+
+    def key(self, query):
+        """Sorgunun önbellek anahtarı."""
+        return f"{self.model_name}\x00{normalize_query(query)}"
+
+    def get(self, query):
+        return self.cache.get(self.key(query))
+
+    def put(self, query, embedding):
+        self.cache.put(self.key(query), embedding)
+
+    def after_fork(self):
+        self.cache.after_fork()
+
+    def get_stats(self):
+        return self.cache.get_stats()
+
+
+def make_cache_backend(kind='memory', max_size=10000, ttl=None, filepath=None):
+    """
+    Önbellek backend'i oluşturur.
+
+    Args:
+        kind: 'memory' (process içi LRU) veya 'disk' (SQLite)
+        max_size: En fazla kayıt sayısı
+        ttl: Kayıt ömrü (saniye, None = süresiz)
+        filepath: 'disk' için SQLite dosya yolu
+
+    Returns:
+        get/put/clear/get_stats metotları olan önbellek
+    """
+    if kind == 'memory':
+        return LRUCache(max_size=max_size, ttl=ttl)
+    if kind == 'disk':
+        if not filepath:
+            raise ValueError("Disk önbelleği için dosya yolu gerekli!")
+        return SqliteCache(filepath, max_size=max_size, ttl=ttl)
+    raise ValueError(f"Geçersiz önbellek tipi: {kind} (desteklenenler: memory, disk)")
+
+
+class ResponseCache:
+    """
+    LLM yanıt önbelleği.
+
+    Anahtar normalize edilmiş sorgu + getirilen doküman id'lerinin
+    hash'idir; aynı context'le sorulan aynı soru tekrar LLM'e gitmez.
+    Aynı dokümanlarla sorulmuş benzer sorular ("kitap ne demek" /
+    "kitap nedir") embedding benzerliği eşiği geçerse aynı yanıtı kullanır.
+    Embedding tercihen retrieval'da hesaplanmış olandır; önbelleğin kendi
+    yaptığı encoder çağrıları stats['encoder_calls']'ta sayılır.
+    """
+
+    # Bir doküman kümesi için benzerlik karşılaştırması yapılacak en fazla soru
+    MAX_VARIANTS = 16
+
+    def __init__(self, backend=None, similarity_threshold=0.95):
+        """
+        Args:
+            backend: Önbellek backend'i (None = bellek içi LRUCache)
+            similarity_threshold: Benzer soru eşiği (kosinüs, None = sadece tam eşleşme)
+        """
+        self.backend = backend if backend is not None else LRUCache()
+        self.similarity_threshold = similarity_threshold
+        self._lock = threading.Lock()
+        self.stats = {'exact_hits': 0, 'semantic_hits': 0, 'misses': 0, 'stores': 0, 'encoder_calls': 0}
+
+    @staticmethod
+    def context_key(doc_ids):
+        """Getirilen doküman id'lerinin (sıralı) hash'i."""
+        joined = ','.join(str(doc_id) for doc_id in doc_ids)
+        return hashlib.sha1(joined.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _normalize_embedding(embedding):
+        vector = np.asarray(embedding, dtype='float32').ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, query, doc_ids, encoder=None, embedding=None):
+        """
+        Önbellekte yanıt arar.
+
+        Args:
+            query: Kullanıcı sorusu
+            doc_ids: Getirilen dokümanların id'leri (sıralı)
+            encoder: Benzer soru araması için sorguyu embedding'e çeviren
+                     fonksiyon. Sadece embedding verilmediyse ve aynı
+                     dokümanlarla daha önce sorulmuş soru varsa çağrılır.
+            embedding: Retrieval sırasında hesaplanmış sorgu embedding'i
+                       (embedding ve encoder ikisi de None = sadece tam eşleşme)
+
+        Returns:
+            tuple: (yanıt veya None, {'hit', 'type', 'similarity'})
+        """
+        context = self.context_key(doc_ids)
+        normalized = normalize_query(query)
+
+        response = self.backend.get(f"resp:{context}:{normalized}")
+        if response is not None:
+            self._count('exact_hits')
+            return response, {'hit': True, 'type': 'exact', 'similarity': 1.0}
+
+        if self.similarity_threshold is not None and (embedding is not None or encoder is not None):
+            variants = self.backend.get(f"ctx:{context}") or []
+            if variants:
+                if embedding is None:
+                    embedding = self._encode(encoder, query)
+                if embedding is not None:
+                    vector = self._normalize_embedding(embedding)
+                    best, best_score = None, -1.0
+                    for variant, variant_vector in variants:
+                        score = float(np.dot(vector, variant_vector))
+                        if score > best_score:
+                            best, best_score = variant, score
+
+                    if best_score >= self.similarity_threshold:
+                        response = self.backend.get(f"resp:{context}:{best}")
+                        if response is not None:
+                            self._count('semantic_hits')
+                            return response, {'hit': True, 'type': 'semantic',
+                                              'similarity': round(best_score, 4)}
+
+        self._count('misses')
+        return None, {'hit': False, 'type': None, 'similarity': None}
+
+    def store(self, query, doc_ids, response, encoder=None, embedding=None):
+        """
+        Yanıtı önbelleğe ekler.
+
+        Args:
+            query: Kullanıcı sorusu
+            doc_ids: Getirilen dokümanların id'leri (sıralı)
+            response: LLM yanıtı
+            encoder: Embedding verilmediyse sorguyu encode edip benzer soru
+                     araması için saklar
+            embedding: Retrieval sırasında hesaplanmış sorgu embedding'i
+                       (ikisi de None = sadece tam eşleşme anahtarı saklanır)
+        """
+        context = self.context_key(doc_ids)
+        normalized = normalize_query(query)
+        self.backend.put(f"resp:{context}:{normalized}", response)
+        self._count('stores')
+
+        if self.similarity_threshold is None:
+            return
+
+        if embedding is None:
+            if encoder is None:
+                return
+            embedding = self._encode(encoder, query)
+            if embedding is None:
+                return
+
+        vector = self._normalize_embedding(embedding)
+        with self._lock:
+            variants = [v for v in (self.backend.get(f"ctx:{context}") or []) if v[0] != normalized]
+            variants.append((normalized, vector))
+            self.backend.put(f"ctx:{context}", variants[-self.MAX_VARIANTS:])
+
+    def _encode(self, encoder, query):
+        """Sorguyu encode eder; önbelleğin yaptığı encoder çağrıları sayılır."""
+        self._count('encoder_calls')
+        return encoder(query)
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def clear(self):
+        self.backend.clear()
+
+    def after_fork(self):
+        """Fork sonrası child process'te çağrılır."""
+        self._lock = threading.Lock()
+        self.backend.after_fork()
+
+    def get_stats(self):
+        """Tam/benzer eşleşme sayaçları ve backend istatistikleri."""
+        with self._lock:
+            stats = dict(self.stats)
+        lookups = stats['exact_hits'] + stats['semantic_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['exact_hits'] + stats['semantic_hits']) / lookups if lookups else 0.0
+        stats['similarity_threshold'] = self.similarity_threshold
+        stats['backend'] = self.backend.get_stats()
+        return stats
@@ -10,53 +10,223 @@ Bu modül:
 
 import google.generativeai as genai
 from embeddings import EmbeddingModel
-from vector_store import FAISSVectorStore
+from index_manager import IndexManager
+from retrieval import RetrievalPipeline
+from query_analyzer import STOP_WORDS as QUERY_STOP_WORDS, MIN_PARTIAL_TERM
+from cache import ResponseCache, make_cache_backend
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 
 class TDKChatbot:
     """TDK Sözlük RAG Chatbot."""
 
-    def __init__(self, api_key=None, vector_store_path="./data/vector_store"):
+    # Sorgudan çıkarılacak soru kalıpları ("ne demek", "nedir", "anlamı" vb.)
+    STOP_WORDS = QUERY_STOP_WORDS
+
+    # Isınma (warmup) sırasında kullanılacak örnek sorgular
+    WARMUP_QUERIES = ["kitap ne demek?", "sevgi kelimesinin anlamı nedir?",
+                      "bilgisayar nedir?", "gökyüzünde uçan taşıt"]
+
+    def __init__(self, api_key=None, vector_store_path="./data/vector_store", min_score=None,
+                 use_mmap=None, micro_batching=None, embedding_cache_size=None, response_cache=None,
+                 llm=None, embedding_backend=None, hybrid=None):
         """
         Args:
             api_key: Gemini API anahtarı
             vector_store_path: Vector store dosya yolu
+            min_score: Embedding araması için minimum skor
+                       (None = vector store metriğine göre varsayılan)
+            use_mmap: Vector store'u mmap ile yükle (worker'lar arası paylaşım)
+                      (None = TDK_MMAP environment variable'ı, varsayılan kapalı)
+            micro_batching: Eşzamanlı sorgu embedding'lerini mikro-batch'le
+                            (None = TDK_MICRO_BATCH environment variable'ı, varsayılan kapalı;
+                            bekleme süresi TDK_MICRO_BATCH_WAIT_MS, varsayılan 5 ms)
+            embedding_cache_size: Sorgu embedding önbelleğinin boyutu, 0 = kapalı
+                                  (None = TDK_EMBED_CACHE_SIZE, varsayılan 10000;
+                                  ömür TDK_EMBED_CACHE_TTL saniye, kalıcı disk katmanı
+                                  TDK_EMBED_CACHE_PATH)
+            embedding_backend: 'torch' veya 'onnx' (None = TDK_EMBED_BACKEND, varsayılan 'torch';
+                               ONNX model klasörü TDK_ONNX_DIR, dosyası TDK_ONNX_FILE)
+            response_cache: Yanıt önbelleği: 'memory', 'disk', 'off' veya ResponseCache
+                            (None = TDK_RESPONSE_CACHE, varsayılan 'memory'; ayrıntılar
+                            _create_response_cache'te)
+            llm: Gemini yerine kullanılacak model (generate_content arayüzü olan).
+                 None ve TDK_FAKE_LLM=1 ise API'siz FakeGenerativeModel kullanılır.
+            hybrid: Madde başı tam eşleşmesi yoksa BM25 ve embedding aramasını
+                    paralel çalıştırıp sonuçları reciprocal rank fusion ile birleştir
+                    (None = TDK_HYBRID, varsayılan açık; RRF sabiti TDK_RRF_K,
+                    liste başına aday çarpanı TDK_HYBRID_DEPTH, BM25 thread'i TDK_BM25_THREADS)
+
+        Yeni bir vector store kaydedildiğinde uygulama yeniden başlatılmadan
+        reload_index() ile canlıya alınabilir; TDK_INDEX_WATCH_INTERVAL (saniye)
+        verilirse diskteki sürüm bu aralıkla kontrol edilip otomatik yüklenir.
         """
         # Environment variables yükle
         load_dotenv()
 
-        # API key kontrolü
-        self.api_key = api_key or os.getenv('GEMINI_API_KEY')
-        if not self.api_key:
-            raise ValueError("GEMINI_API_KEY bulunamadı! .env dosyasını kontrol edin.")
+        if llm is None and os.getenv('TDK_FAKE_LLM', '0') == '1':
+            # Sahte model sadece seçildiğinde import edilir
+            from fake_llm import FakeGenerativeModel
+            llm = FakeGenerativeModel(
+                token_delay=float(os.getenv('TDK_FAKE_LLM_TOKEN_DELAY', '0')),
+                latency=float(os.getenv('TDK_FAKE_LLM_LATENCY', '0'))
+            )
 
         print("TDK Chatbot başlatılıyor...")
 
-        # Gemini'yi yapılandır
-        genai.configure(api_key=self.api_key)
+        if llm is not None:
+            self.api_key = api_key
+            self.model = llm
+            print(f"LLM: {type(llm).__name__}")
+        else:
+            # API key kontrolü
+            self.api_key = api_key or os.getenv('GEMINI_API_KEY')
+            if not self.api_key:
+                raise ValueError("GEMINI_API_KEY bulunamadı! .env dosyasını kontrol edin.")
+
+            # Gemini'yi yapılandır
+            genai.configure(api_key=self.api_key)
 
-        # Gemini modelini seç (2.0 Flash - hızlı ve güçlü)
-        self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
-        print("Gemini 2.0 Flash modeli yüklendi")
+            # Gemini modelini seç (2.0 Flash - hızlı ve güçlü)
+            self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
+            print("Gemini 2.0 Flash modeli yüklendi")
 
         # Embedding modelini yükle
         print("Embedding modeli yükleniyor...")
-        self.embedder = EmbeddingModel()
-
-        # Vector store'u yükle
+        if micro_batching is None:
+            micro_batching = os.getenv('TDK_MICRO_BATCH', '0') == '1'
+        if embedding_cache_size is None:
+            embedding_cache_size = int(os.getenv('TDK_EMBED_CACHE_SIZE', '10000'))
+        cache_ttl = os.getenv('TDK_EMBED_CACHE_TTL')
+        self.embedder = EmbeddingModel(
+            micro_batching=micro_batching,
+            max_wait_ms=float(os.getenv('TDK_MICRO_BATCH_WAIT_MS', '5')),
+            cache_size=embedding_cache_size,
+            cache_ttl=float(cache_ttl) if cache_ttl else None,
+            cache_path=os.getenv('TDK_EMBED_CACHE_PATH') or None,
+            backend=embedding_backend or os.getenv('TDK_EMBED_BACKEND', 'torch'),
+            onnx_dir=os.getenv('TDK_ONNX_DIR', './data/onnx_model'),
+            onnx_file=os.getenv('TDK_ONNX_FILE', 'onnx/model.onnx')
+        )
+
+        # Vector store'u ve kelime index'ini yükle (her index sürümü için bir kere)
         print("Vector store yükleniyor...")
-        self.vector_store = FAISSVectorStore()
-        if not self.vector_store.load(vector_store_path):
-            raise ValueError("Vector store yüklenemedi!")
+        if use_mmap is None:
+            use_mmap = os.getenv('TDK_MMAP', '0') == '1'
+        self.index_manager = IndexManager(vector_store_path, use_mmap=use_mmap, warmup=self._warmup_index)
+        self.index_manager.start_watching(float(os.getenv('TDK_INDEX_WATCH_INTERVAL', '0')))
+
+        # Skor eşiği metriğe bağlı (L2 ve kosinüs skorları farklı ölçekte)
+        self._min_score = min_score
+
+        # Aynı soru + aynı dokümanlar için Gemini'yi tekrar çağırmamak için
+        self.response_cache = self._create_response_cache(response_cache)
+
+        # Hibrit arama: BM25 (metin içinde geçen kelimeler) + embedding, RRF ile
+        if hybrid is None:
+            hybrid = os.getenv('TDK_HYBRID', '1') == '1'
+        self.hybrid = hybrid
+        self.rrf_k = int(os.getenv('TDK_RRF_K', '60'))
+        self.hybrid_depth = int(os.getenv('TDK_HYBRID_DEPTH', '4'))
+        self._stop_words = frozenset(self.STOP_WORDS)
+        self._bm25_threads = int(os.getenv('TDK_BM25_THREADS', '4'))
+        self._bm25_executor = ThreadPoolExecutor(max_workers=self._bm25_threads, thread_name_prefix='tdk-bm25')
+
+        # Retrieval aşamaları: ucuz olan önce, embedding en son ve lazy
+        if self.hybrid:
+            search_stage = ('hybrid', self._hybrid_stage, self._hybrid_stage_batch)
+        else:
+            search_stage = ('vector', self._vector_stage, self._vector_stage_batch)
+        self.pipeline = RetrievalPipeline(
+            stages=[
+                ('lexical', self._lexical_stage),
+                search_stage
+            ],
+            encoder=self.embedder.encode_single
+        )
 
         print("Chatbot hazır!\n")
 
+    @property
+    def vector_store(self):
+        """Canlı index sürümünün vector store'u."""
+        return self.index_manager.current.vector_store
+
+    @property
+    def headword_index(self):
+        """Canlı index sürümünün kelime index'i."""
+        return self.index_manager.current.headword_index
+
+    @property
+    def min_score(self):
+        return self._min_score_for(self.index_manager.current)
+
+    def _min_score_for(self, index):
+        """Verilen skor eşiği veya index metriğine göre varsayılan."""
+        if self._min_score is not None:
+            return self._min_score
+        return index.vector_store.default_min_score()
+
+    def reload_index(self, wait=False, force=False):
+        """
+        Diskteki yeni index sürümünü arka planda yükleyip canlıya alır.
+        Devam eden aramalar eski sürümle tamamlanır.
+
+        Args:
+            wait: Yükleme bitene kadar bekle
+            force: Sürüm değişmemiş olsa da yeniden yükle
+
+        Returns:
+            bool: Yeni bir yükleme başlatıldıysa True
+        """
+        return self.index_manager.reload(wait=wait, force=force)
+
+    def get_index_info(self):
+        """Canlı index sürümü, oluşturulma zamanı ve yeniden yükleme durumu."""
+        return self.index_manager.get_info()
+
+    @staticmethod
+    def _create_response_cache(response_cache):
+        """
+        Yanıt önbelleğini oluşturur.
+
+        Environment variables:
+            TDK_RESPONSE_CACHE: 'memory', 'disk' veya 'off' (varsayılan 'memory')
+            TDK_RESPONSE_CACHE_SIZE: En fazla kayıt sayısı (varsayılan 1000)
+            TDK_RESPONSE_CACHE_TTL: Kayıt ömrü, saniye (varsayılan 86400)
+            TDK_RESPONSE_CACHE_PATH: 'disk' için SQLite dosyası
+            TDK_RESPONSE_CACHE_THRESHOLD: Benzer soru eşiği (varsayılan 0.95)
+
+        Args:
+            response_cache: 'memory', 'disk', 'off', ResponseCache veya None
+
+        Returns:
+            ResponseCache veya None (kapalıysa)
+        """
+        if isinstance(response_cache, ResponseCache):
+            return response_cache
+
+        kind = response_cache or os.getenv('TDK_RESPONSE_CACHE', 'memory')
+        if kind == 'off':
+            return None
+
+        backend = make_cache_backend(
+            kind,
+            max_size=int(os.getenv('TDK_RESPONSE_CACHE_SIZE', '1000')),
+            ttl=float(os.getenv('TDK_RESPONSE_CACHE_TTL', '86400')),
+            filepath=os.getenv('TDK_RESPONSE_CACHE_PATH', './data/cache/responses.db')
+        )
+        threshold = float(os.getenv('TDK_RESPONSE_CACHE_THRESHOLD', '0.95'))
+        print(f"Yanıt önbelleği açık ({kind}, benzerlik eşiği: {threshold})")
+        return ResponseCache(backend, similarity_threshold=threshold)
+
     def search_relevant_docs(self, query, top_k=5):
         """
         Sorguyla ilgili dokümanları bulur.
-        Hem embedding benzerliği hem de kelime eşleştirme kullanır.
+        Madde başı eşleştirme, BM25 metin araması ve embedding benzerliği kullanır.
 
         Args:
             query: Kullanıcı sorusu
@@ -65,58 +235,337 @@ class TDKChatbot:
         Returns:
             list: İlgili dokümanlar
         """
-        # Sorguyu embedding'e çevir
-        query_embedding = self.embedder.encode_single(query)
+        results, _ = self.retrieve(query, top_k=top_k)
+        return results
 
-        # 1. Önce kelime bazlı eşleştirme yap (çok daha etkili!)
-        query_lower = query.lower()
-        query_words = query_lower.split()
+    def retrieve(self, query, top_k=5, return_embedding=False):
+        """
+        Retrieval pipeline'ını çalıştırır.
 
-        # Sorgudan "ne demek", "nedir", "anlamı" gibi kelimeleri çıkar
-        stop_words = ['ne', 'nedir', 'demek', 'anlamı', 'anlam', 'kelimesinin',
-                      'kelimesi', 'nedir', 'açıklar', 'mısın', 'misin', 'anlamına',
-                      'hakkında', 'için', 'nasıl', 'bir', 'bu']
+        Önce kelime eşleştirme denenir; sorgu embedding'i sadece
+        kelime aşaması sonuç bulamazsa hesaplanır.
 
-        search_terms = [word for word in query_words if word not in stop_words and len(word) > 2]
+        Args:
+            query: Kullanıcı sorusu
+            top_k: Kaç doküman getirilecek
+            return_embedding: True ise retrieval sırasında hesaplanan sorgu
+                              embedding'i de döndürülür (hesaplanmadıysa None)
 
-        # 2. Önce tam kelime eşleşmesi ara
-        exact_matches = []
-        if search_terms:
-            main_term = search_terms[0]  # İlk anlamlı kelime
-
-            for i, doc in enumerate(self.vector_store.documents):
-                doc_kelime = doc.get('kelime', '').lower()
-
-                # Tam eşleşme
-                if doc_kelime == main_term:
-                    exact_matches.append({
-                        'score': 1.0,  # En yüksek skor
-                        'document': doc,
-                        'distance': 0.0,
-                        'match_type': 'exact'
-                    })
-                # Kısmi eşleşme (kelime içeriyor)
-                elif main_term in doc_kelime or doc_kelime in main_term:
-                    exact_matches.append({
-                        'score': 0.8,
-                        'document': doc,
-                        'distance': 0.2,
-                        'match_type': 'partial'
-                    })
-
-        # 3. Eğer tam eşleşme varsa, önce onları döndür
-        if exact_matches:
-            # Skorlara göre sırala
-            exact_matches.sort(key=lambda x: x['score'], reverse=True)
-            return exact_matches[:top_k]
+        Returns:
+            tuple: (ilgili dokümanlar, hangi aşamaların çalıştığı[, sorgu embedding'i])
+        """
+        with self.index_manager.acquire() as index:
+            results, ctx = self.pipeline.run_context(query, top_k=top_k, index=index)
+        results, trace = self._tag_results(results, ctx.trace(), index)
+        if return_embedding:
+            return results, trace, ctx.computed_embedding
+        return results, trace
+
+    def retrieve_batch(self, queries, top_k=5, return_embedding=False):
+        """
+        retrieve() fonksiyonunun toplu hali (tek encode + tek FAISS araması).
 
+        Returns:
+            list: Her sorgu için (ilgili dokümanlar, trace[, sorgu embedding'i])
+        """
+        with self.index_manager.acquire() as index:
+            retrieved = self.pipeline.run_batch_contexts(queries, top_k=top_k, index=index)
+        output = []
+        for results, ctx in retrieved:
+            results, trace = self._tag_results(results, ctx.trace(), index)
+            output.append((results, trace, ctx.computed_embedding) if return_embedding else (results, trace))
+        return output
+
+    @staticmethod
+    def _tag_results(results, trace, index):
+        """
+        Sonuçlara index sürümünü ekler. Yanıt önbelleği doküman id'lerini
+        bu sürümün id_epoch'u ile birlikte kullanır (tam yeniden oluşturmada
+        id'ler değişir).
+        """
+        for result in results:
+            result['id_epoch'] = index.id_epoch
+        trace['index_version'] = index.version
+        return results, trace
+
+    def _lexical_stage(self, ctx):
+        """Kelime eşleştirme aşaması (embedding gerektirmez)."""
+        # 1. Sorguyu terimlere ayır: Türkçe küçük harf, "ne demek", "nedir" gibi
+        # kalıplar atılır, çekimli kelimeler madde başına indirgenir ("kitabın" -> "kitap")
+        terms = ctx.index.query_analyzer.analyze(ctx.query)
+
+        # 2. Her terim için tam ve kısmi eşleşme ara (önceden oluşturulmuş index ile)
+        exact_matches = []
+        if terms:
+            exact_ids = {}
+            partial_ids = {}
+            for term in terms:
+                # Kısa terimler ("su", "at") binlerce kelimenin içinde geçer:
+                # sadece tam eşleşmeye bakılır
+                term_exact, term_partial = ctx.index.headword_index.lookup(
+                    term.key, limit=ctx.top_k, partial=len(term.key) >= MIN_PARTIAL_TERM)
+                exact_ids.update(dict.fromkeys(term_exact))
+                partial_ids.update(dict.fromkeys(term_partial))
+            documents = ctx.index.vector_store.documents
+
+            # Hibrit modda her terim bir madde başı değilse (ör. "gökyüzünde uçan taşıt")
+            # soru bir tanımı tarif ediyor: BM25 + embedding kelimenin tanım ve
+            # örneklerde geçtiği dokümanları da bulur. Bulunan tam eşleşmeler
+            # ("kitap ve gözlükçü" -> "kitap") hibrit aşamada üçüncü liste olarak kullanılır.
+            if self.hybrid and not (exact_ids and all(term.headword for term in terms)):
+                ctx.exact_ids = list(exact_ids)
+                return []
+
+            # Tam eşleşme (terimlerin sorgudaki sırasıyla)
+            for i in exact_ids:
+                exact_matches.append({
+                    'score': 1.0,  # En yüksek skor
+                    'document': documents[i],
+                    'distance': 0.0,
+                    'match_type': 'exact',
+                    'doc_id': i
+                })
+            # Kısmi eşleşme (kelime içeriyor); başka bir terimin tam eşleşmesi tekrar eklenmez
+            for i in partial_ids:
+                if i in exact_ids:
+                    continue
+                exact_matches.append({
+                    'score': 0.8,
+                    'document': documents[i],
+                    'distance': 0.2,
+                    'match_type': 'partial',
+                    'doc_id': i
+                })
+
+        # 3. Eşleşme varsa onları döndür
+        # Index sonuçları zaten skora göre sıralı (önce tam, sonra kısmi)
+        return exact_matches[:ctx.top_k]
+
+    def _vector_stage(self, ctx):
+        """Embedding araması aşaması (sorgu embedding'i burada hesaplanır)."""
         # 4. Tam eşleşme yoksa embedding araması yap
-        results = self.vector_store.search(query_embedding, top_k=top_k * 2)
+        # 5. Eşiğin altındaki sonuçlar vector store'da atılır
+        index = ctx.index
+        # Anlamlar madde başına bağlıysa aynı maddenin anlamları elenir, fazladan aday alınır
+        depth = ctx.top_k * self.hybrid_depth if index.grouped_senses else ctx.top_k
+        results = index.vector_store.search(ctx.embedding, top_k=depth, min_score=self._min_score_for(index))
+
+        return self._collapse_senses(results, ctx.top_k)
+
+    def _vector_stage_batch(self, contexts):
+        """Embedding aramasının toplu hali: tek encode + tek FAISS araması."""
+        self._encode_missing(contexts)
+
+        index = contexts[0].index
+        top_k = max(ctx.top_k for ctx in contexts)
+        depth = top_k * self.hybrid_depth if index.grouped_senses else top_k
+        embeddings = [ctx.embedding for ctx in contexts]
+        results = index.vector_store.search_batch(embeddings, top_k=depth, min_score=self._min_score_for(index))
+
+        return [self._collapse_senses(r, ctx.top_k) for ctx, r in zip(contexts, results)]
+
+    @staticmethod
+    def _collapse_senses(results, top_k):
+        """
+        Madde başına bağlı anlamlardan (TDK_DEDUP=group) sadece en iyi
+        sıradakini tutar; diğer sonuçlar olduğu gibi kalır.
+
+        Args:
+            results: Sıralı arama sonuçları
+            top_k: Kaç sonuç döndürülecek
+
+        Returns:
+            list: En fazla top_k sonuç
+        """
+        collapsed = []
+        seen = set()
+        for result in results:
+            doc = result['document']
+            if doc.get('anlam_sayisi'):
+                if doc['kelime'] in seen:
+                    continue
+                seen.add(doc['kelime'])
+            collapsed.append(result)
+            if len(collapsed) == top_k:
+                break
+        return collapsed
+
+    def _encode_missing(self, contexts):
+        """Henüz embedding'i olmayan sorguları tek seferde encode eder."""
+        missing = [ctx for ctx in contexts if not ctx.encoded]
+        if missing:
+            embeddings = self.embedder.encode_queries([ctx.query for ctx in missing])
+            for ctx, embedding in zip(missing, embeddings):
+                ctx.set_embedding(embedding)
+
+    def _bm25_search(self, index, queries, depth):
+        """BM25 araması (ayrı thread'de, embedding aramasıyla eşzamanlı çalışır)."""
+        return [index.bm25_index.search(query, top_k=depth, stop_words=self._stop_words) for query in queries]
+
+    def _hybrid_stage(self, ctx):
+        """BM25 ve embedding araması paralel çalışır, sonuçlar RRF ile birleştirilir."""
+        index = ctx.index
+        depth = ctx.top_k * self.hybrid_depth
+        lexical = self._bm25_executor.submit(self._bm25_search, index, [ctx.query], depth)
+
+        # Sorgu encode + FAISS bu thread'de, BM25 ile aynı anda
+        vector = index.vector_store.search(ctx.embedding, top_k=depth, min_score=self._min_score_for(index))
+
+        return self._fuse(index, vector, lexical.result()[0], ctx.top_k, exact_ids=ctx.exact_ids)
+
+    def _hybrid_stage_batch(self, contexts):
+        """Hibrit aramanın toplu hali: tek BM25 görevi, tek encode + tek FAISS araması."""
+        index = contexts[0].index
+        depth = max(ctx.top_k for ctx in contexts) * self.hybrid_depth
+        lexical = self._bm25_executor.submit(self._bm25_search, index, [ctx.query for ctx in contexts], depth)
+
+        self._encode_missing(contexts)
+        vector = index.vector_store.search_batch([ctx.embedding for ctx in contexts], top_k=depth,
+                                                 min_score=self._min_score_for(index))
+
+        return [self._fuse(index, v, l, ctx.top_k, exact_ids=ctx.exact_ids)
+                for ctx, v, l in zip(contexts, vector, lexical.result())]
+
+    def _fuse(self, index, vector_results, bm25_results, top_k, exact_ids=()):
+        """
+        Embedding ve BM25 sonuçlarını reciprocal rank fusion ile birleştirir.
+
+        Her listede r. sıradaki doküman 1 / (k + r) puan alır; birden fazla
+        listede üst sıralarda olan dokümanlar öne çıkar. Skorlar farklı
+        ölçeklerde olduğu için sadece sıralar kullanılır.
+
+        Args:
+            exact_ids: Kelime aşamasının bulduğu madde başı tam eşleşmeleri
+                       (varsa üçüncü sıralı liste olarak eklenir)
+
+        Returns:
+            list: Sonuçlar; skor 0-1 arası (tüm listelerde birinci = 1.0)
+        """
+        fused = {}
+        vector_scores = {}
+        bm25_scores = {}
+        exact = set(exact_ids)
+
+        for rank, result in enumerate(vector_results, 1):
+            doc_id = result['doc_id']
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (self.rrf_k + rank)
+            vector_scores[doc_id] = result['score']
+        for rank, (doc_id, score) in enumerate(bm25_results, 1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (self.rrf_k + rank)
+            bm25_scores[doc_id] = score
+        for rank, doc_id in enumerate(exact_ids, 1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (self.rrf_k + rank)
+
+        best_possible = (3.0 if exact else 2.0) / (self.rrf_k + 1)
+        ranked = sorted(fused.items(), key=lambda item: (-item[1], item[0]))
+        if not index.grouped_senses:
+            ranked = ranked[:top_k]
+        documents = index.vector_store.documents
+
+        results = []
+        for doc_id, score in ranked:
+            score = score / best_possible
+            results.append({
+                'score': score,
+                'document': documents[doc_id],
+                'distance': 1.0 - score,
+                'match_type': 'hybrid',
+                'doc_id': doc_id,
+                'vector_score': vector_scores.get(doc_id),
+                'bm25_score': bm25_scores.get(doc_id),
+                'exact_match': doc_id in exact
+            })
+        return self._collapse_senses(results, top_k)
+
+    def warmup(self, queries=None, rounds=2):
+        """
+        Embedding modelini, FAISS index'ini ve kelime index'ini örnek
+        sorgularla ısıtır. Önbellekler ve retrieval istatistikleri etkilenmez.
+
+        Args:
+            queries: Örnek sorgular (None = WARMUP_QUERIES)
+            rounds: Kaç tur çalıştırılacak
+
+        Returns:
+            dict: {'queries', 'rounds', 'seconds'}
+        """
+        queries = queries or self.WARMUP_QUERIES
+        started = time.perf_counter()
+
+        embeddings = self.embedder.warmup(queries, rounds=rounds)
+        self._warmup_index(self.index_manager.current, queries, embeddings, rounds)
+
+        seconds = time.perf_counter() - started
+        print(f"Isınma tamamlandı ({len(queries)} sorgu x {rounds} tur, {seconds:.2f} sn)")
+        return {'queries': len(queries), 'rounds': rounds, 'seconds': round(seconds, 3)}
+
+    def _warmup_index(self, index, queries=None, embeddings=None, rounds=1):
+        """
+        Bir index sürümünü ısıtır (yeniden yüklemede canlıya alınmadan önce de çağrılır).
+
+        Args:
+            index: IndexGeneration
+            queries: Örnek sorgular (None = WARMUP_QUERIES)
+            embeddings: Sorguların embedding'leri (None = önbellekten / encode ile)
+            rounds: Kaç tur çalıştırılacak
+        """
+        queries = queries or self.WARMUP_QUERIES
+        if embeddings is None:
+            embeddings = self.embedder.encode_queries(queries)
+        min_score = self._min_score_for(index)
+
+        for _ in range(rounds):
+            # Tekli ve toplu FAISS araması (mmap'li index'te sayfalar da belleğe gelir)
+            for embedding in embeddings:
+                index.vector_store.search(embedding, top_k=5, min_score=min_score)
+            results = index.vector_store.search_batch(embeddings, top_k=5, min_score=min_score)
+
+            # Kelime ve BM25 index'leri, prompt oluşturma
+            for query in queries:
+                for term in index.query_analyzer.analyze(query):
+                    index.headword_index.lookup(term.key, limit=5, partial=len(term.key) >= MIN_PARTIAL_TERM)
+                index.bm25_index.search(query, top_k=5, stop_words=self._stop_words)
+            for query, result in zip(queries, results):
+                self.build_prompt(query, self.create_context(result))
+
+    def after_fork(self):
+        """
+        Pre-fork sunucularda worker process'te çağrılır.
 
-        # 5. Sonuçları filtrele - çok düşük skorları at
-        filtered_results = [r for r in results if r['score'] > 0.001]
+        Ana process'te yüklenen model ve index copy-on-write paylaşılır;
+        sadece thread'ler, kilitler ve SQLite bağlantıları yeniden oluşturulur.
+        """
+        self.embedder.after_fork()
+        if self.response_cache is not None:
+            self.response_cache.after_fork()
+        self.pipeline.after_fork()
+        self.index_manager.after_fork()
+        # Thread havuzu fork'ta kopyalanmaz, yeniden oluşturulur
+        self._bm25_executor = ThreadPoolExecutor(max_workers=self._bm25_threads, thread_name_prefix='tdk-bm25')
+
+    def get_retrieval_stats(self):
+        """
+        Retrieval aşamalarının toplam istatistiklerini döndürür.
 
-        return filtered_results[:top_k]
+        Yanıt önbelleğinin yaptığı encoder çağrıları da encoder_calls'a
+        eklenir (chatbot önbelleğe sadece hesaplanmış embedding'i verir,
+        bu sayı normalde 0'dır).
+        """
+        stats = self.pipeline.get_stats()
+        if self.response_cache is not None:
+            cache_calls = self.response_cache.get_stats()['encoder_calls']
+            stats['encoder_calls'] += cache_calls
+            stats['encoder_calls_saved'] -= cache_calls
+        return stats
+
+    def get_stats(self):
+        """Retrieval ve embedding istatistiklerini döndürür."""
+        return {
+            'retrieval': self.get_retrieval_stats(),
+            'embedding': self.embedder.get_stats(),
+            'response_cache': self.response_cache.get_stats() if self.response_cache is not None else None,
+            'index': self.get_index_info()
+        }
 
     def create_context(self, results):
         """
@@ -139,7 +588,11 @@ class TDKChatbot:
             anlam = doc.get('anlam', 'N/A')
             text = doc.get('text', '')
 
-            context += f"{i}. **{kelime}**\n"
+            # Madde başına bağlı anlamlarda hangi anlamın eşleştiği belirtilir
+            if doc.get('anlam_sayisi'):
+                context += f"{i}. **{kelime}** ({doc['anlam_no']}. anlam, toplam {doc['anlam_sayisi']})\n"
+            else:
+                context += f"{i}. **{kelime}**\n"
             context += f"   {anlam}\n"
 
             # Örnek varsa ekle
@@ -163,8 +616,74 @@ class TDKChatbot:
         Returns:
             str: Gemini'nin yanıtı
         """
-        # Prompt oluştur
-        prompt = f"""Sen TDK Sözlük asistanısın. Türkçe kelimeler hakkında bilgi veren yardımcı bir asistandsın.
+        try:
+            return self._generate(query, context)
+
+        except Exception as e:
+            return f"Yanıt oluşturulurken hata: {str(e)}"
+
+    def _generate(self, query, context):
+        """Gemini'den yanıt alır (hataları yukarı iletir)."""
+        prompt = self.build_prompt(query, context)
+        response = self.model.generate_content(prompt)
+        return response.text
+
+    def lookup_cached_response(self, query, results, embedding=None):
+        """
+        Yanıtı önbellekte arar.
+
+        Sorgu burada encode edilmez: benzer soru araması sadece retrieval
+        sırasında embedding hesaplandıysa yapılır, kelime eşleşmesiyle
+        bulunan sorgular sadece tam eşleşmeye bakar.
+
+        Args:
+            query: Kullanıcı sorusu
+            results: Getirilen dokümanlar
+            embedding: Retrieval'da hesaplanan sorgu embedding'i (None = sadece tam eşleşme)
+
+        Returns:
+            tuple: (yanıt veya None, önbellek bilgisi)
+        """
+        if self.response_cache is None:
+            return None, {'hit': False, 'type': None, 'similarity': None}
+        return self.response_cache.lookup(query, self._cache_doc_ids(results), embedding=embedding)
+
+    def store_response(self, query, results, response, embedding=None):
+        """
+        Başarılı yanıtı önbelleğe ekler (embedding varsa benzer soru araması için de).
+
+        Önbellek hatası (ör. SQLite kilitli) yanıtı etkilemez: hata yazdırılır,
+        yanıt kullanıcıya yine döner.
+
+        Returns:
+            bool: Önbelleğe yazıldıysa True
+        """
+        if self.response_cache is None:
+            return False
+        try:
+            self.response_cache.store(query, self._cache_doc_ids(results), response, embedding=embedding)
+        except Exception as e:
+            print(f"Yanıt önbelleğe yazılamadı: {e}")
+            return False
+        return True
+
+    @staticmethod
+    def _cache_doc_ids(results):
+        """Önbellek anahtarı için doküman id'leri (index sürümleri arasında karışmasın)."""
+        return [f"{r.get('id_epoch')}:{r['doc_id']}" for r in results]
+
+    def build_prompt(self, query, context):
+        """
+        Gemini'ye gönderilecek prompt'u oluşturur.
+
+        Args:
+            query: Kullanıcı sorusu
+            context: İlgili dokümanlar
+
+        Returns:
+            str: Prompt metni
+        """
+        return f"""Sen TDK Sözlük asistanısın. Türkçe kelimeler hakkında bilgi veren yardımcı bir asistandsın.
 
 GÖREV:
 Kullanıcının sorusunu aşağıdaki TDK Sözlük bilgilerine göre yanıtla.
@@ -184,14 +703,6 @@ KULLANICI SORUSU:
 
 YANITINIZ:"""
 
-        try:
-            # Gemini'den yanıt al
-            response = self.model.generate_content(prompt)
-            return response.text
-
-        except Exception as e:
-            return f"Yanıt oluşturulurken hata: {str(e)}"
-
     def chat(self, query, top_k=5, show_context=False):
         """
         Ana chatbot fonksiyonu.
@@ -212,26 +723,36 @@ YANITINIZ:"""
             }
 
         # 1. İlgili dokümanları bul
-        results = self.search_relevant_docs(query, top_k=top_k)
+        results, retrieval, embedding = self.retrieve(query, top_k=top_k, return_embedding=True)
 
         if not results:
             return {
                 'response': "Bu konuda TDK Sözlük'te bilgi bulamadım. Başka bir şey sorar mısınız?",
                 'context': None,
-                'results': []
+                'results': [],
+                'retrieval': retrieval
             }
 
         # 2. Context oluştur
         context = self.create_context(results)
 
-        # 3. Gemini ile yanıt üret
-        response = self.generate_response(query, context)
+        # 3. Önbellekte yoksa Gemini ile yanıt üret
+        response, cache = self.lookup_cached_response(query, results, embedding)
+        if response is None:
+            try:
+                response = self._generate(query, context)
+            except Exception as e:
+                response = f"Yanıt oluşturulurken hata: {str(e)}"
+            else:
+                self.store_response(query, results, response, embedding)
 
         # 4. Sonucu döndür
         result = {
             'response': response,
             'results': results,
-            'query': query
+            'query': query,
+            'retrieval': retrieval,
+            'cache': cache
         }
 
         if show_context:
@@ -239,6 +760,145 @@ YANITINIZ:"""
 
         return result
 
+    def chat_stream(self, query, top_k=5):
+        """
+        chat() fonksiyonunun streaming hali.
+
+        Önce retrieval yapılır ve kaynaklar ilk olay olarak gönderilir,
+        ardından Gemini'nin ürettiği parçalar geldikçe iletilir.
+
+        Args:
+            query: Kullanıcı sorusu
+            top_k: Kaç doküman kullanılacak
+
+        Yields:
+            dict: Olaylar, sırasıyla:
+                {'type': 'sources', 'results', 'retrieval', 'cache'}
+                {'type': 'token', 'text'}  (birden fazla)
+                {'type': 'done', 'response'} veya {'type': 'error', 'error'}
+        """
+        if not query or not query.strip():
+            yield {'type': 'sources', 'results': [], 'retrieval': None, 'cache': None}
+            yield {'type': 'token', 'text': "Lütfen bir soru sorun."}
+            yield {'type': 'done', 'response': "Lütfen bir soru sorun."}
+            return
+
+        # 1. İlgili dokümanları bul
+        results, retrieval, embedding = self.retrieve(query, top_k=top_k, return_embedding=True)
+
+        if not results:
+            response = "Bu konuda TDK Sözlük'te bilgi bulamadım. Başka bir şey sorar mısınız?"
+            yield {'type': 'sources', 'results': [], 'retrieval': retrieval, 'cache': None}
+            yield {'type': 'token', 'text': response}
+            yield {'type': 'done', 'response': response}
+            return
+
+        # 2. Önbellekte varsa tek parça halinde gönder
+        response, cache = self.lookup_cached_response(query, results, embedding)
+        yield {'type': 'sources', 'results': results, 'retrieval': retrieval, 'cache': cache}
+
+        if response is not None:
+            yield {'type': 'token', 'text': response}
+            yield {'type': 'done', 'response': response}
+            return
+
+        # 3. Gemini'den parça parça yanıt al
+        context = self.create_context(results)
+        chunks = []
+        try:
+            stream = self.model.generate_content(self.build_prompt(query, context), stream=True)
+            for chunk in stream:
+                text = chunk.text
+                if text:
+                    chunks.append(text)
+                    yield {'type': 'token', 'text': text}
+        except Exception as e:
+            yield {'type': 'error', 'error': f"Yanıt oluşturulurken hata: {str(e)}"}
+            return
+
+        response = ''.join(chunks)
+        self.store_response(query, results, response, embedding)
+        yield {'type': 'done', 'response': response}
+
+    def chat_batch(self, queries, top_k=5, max_workers=8):
+        """
+        Birden fazla soruyu toplu olarak yanıtlar.
+
+        Retrieval tek seferde yapılır (kelime eşleşmesi olmayan sorgular
+        tek bir encode + tek bir FAISS çağrısıyla aranır), Gemini çağrıları
+        paralel çalışır. Bir sorudaki hata diğerlerini etkilemez.
+
+        Args:
+            queries: Kullanıcı soruları
+            top_k: Soru başına kaç doküman kullanılacak
+            max_workers: Aynı anda yapılacak Gemini çağrısı sayısı
+
+        Returns:
+            list: Her soru için chat() formatında sonuç ('error' alanı hata varsa)
+        """
+        items = [None] * len(queries)
+
+        # Boş soruları ayıkla
+        valid = []
+        for i, query in enumerate(queries):
+            if not isinstance(query, str) or not query.strip():
+                items[i] = {
+                    'response': "Lütfen bir soru sorun.",
+                    'context': None,
+                    'results': [],
+                    'error': "Boş mesaj"
+                }
+            else:
+                valid.append(i)
+
+        # 1. İlgili dokümanları toplu bul
+        try:
+            retrieved = self.retrieve_batch([queries[i] for i in valid], top_k=top_k, return_embedding=True)
+        except Exception as e:
+            for i in valid:
+                items[i] = {'response': None, 'results': [], 'query': queries[i],
+                            'error': f"Arama hatası: {str(e)}"}
+            return items
+
+        # 2. Context oluştur, yanıt üretilecekleri belirle
+        to_generate = []
+        embeddings = {}
+        for i, (results, retrieval, embedding) in zip(valid, retrieved):
+            if not results:
+                items[i] = {
+                    'response': "Bu konuda TDK Sözlük'te bilgi bulamadım. Başka bir şey sorar mısınız?",
+                    'context': None,
+                    'results': [],
+                    'query': queries[i],
+                    'retrieval': retrieval
+                }
+            else:
+                response, cache = self.lookup_cached_response(queries[i], results, embedding)
+                embeddings[i] = embedding
+                items[i] = {
+                    'response': response,
+                    'results': results,
+                    'query': queries[i],
+                    'retrieval': retrieval,
+                    'cache': cache
+                }
+                if response is None:
+                    to_generate.append((i, self.create_context(results)))
+
+        # 3. Önbellekte olmayanlar için Gemini çağrılarını paralel yap
+        if to_generate:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(to_generate))) as executor:
+                futures = [(i, executor.submit(self._generate, queries[i], context)) for i, context in to_generate]
+                for i, future in futures:
+                    try:
+                        items[i]['response'] = future.result()
+                    except Exception as e:
+                        items[i]['error'] = f"Yanıt oluşturulurken hata: {str(e)}"
+                    else:
+                        self.store_response(queries[i], items[i]['results'], items[i]['response'], embeddings[i])
+
+        return items
+
     def interactive_mode(self):
         """Terminal'de interaktif sohbet modu."""
         print("=" * 70)
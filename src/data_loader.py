@@ -5,13 +5,257 @@ Bu modül Hugging Face'den veri setini indirir, temizler ve
 RAG sistemi için uygun formata dönüştürür.
 """
 
-from datasets import load_dataset
+from datasets import Features, Value, load_dataset
 import pandas as pd
-from tqdm import tqdm
 import json
 import os
 
 
+# İşlenmiş veri dosyaları (yükleme sırasında bu sırayla aranır)
+PROCESSED_FILENAME = "processed_tdk.jsonl"
+PROCESSED_FILENAMES = [PROCESSED_FILENAME, "processed_tdk.parquet", "processed_tdk.json"]
+
+DOCUMENT_FIELDS = ['text', 'kelime', 'anlam', 'ornek', 'ai_ornek']
+
+# Tüm alanlar string; boş örnekler None (Arrow'da null) olarak saklanır
+DOCUMENT_FEATURES = Features({field: Value('string') for field in DOCUMENT_FIELDS})
+
+
+def build_document(item):
+    """
+    Veri setinin bir satırından RAG dokümanı oluşturur.
+
+    Args:
+        item: madde, anlam, ornek, ai_ornek alanlarını içeren satır
+
+    Returns:
+        dict veya None (kelime ya da anlam boşsa)
+    """
+    # Alanları al - None değerleri boş string'e çevir
+    kelime = str(item.get('madde', '')).strip()
+    anlam = str(item.get('anlam', '')).strip()
+    ornek = str(item.get('ornek', '') or '').strip()
+    ai_ornek = str(item.get('ai_ornek', '') or '').strip()
+
+    # Kelime veya anlam boş ise atla
+    if not kelime or not anlam or kelime == 'None' or anlam == 'None':
+        return None
+
+    # Tam metin oluştur (RAG için zengin context)
+    full_text = f"Kelime: {kelime}\n\n"
+    full_text += f"Anlam: {anlam}\n"
+
+    # Örnek varsa ekle
+    if ornek and ornek != 'None':
+        full_text += f"\nÖrnek kullanım: {ornek}\n"
+
+    # AI örneği varsa ekle (daha detaylı)
+    if ai_ornek and ai_ornek != 'None':
+        full_text += f"\nDetaylı örnek: {ai_ornek}\n"
+
+    return {
+        'text': full_text.strip(),
+        'kelime': kelime,
+        'anlam': anlam,
+        'ornek': ornek if (ornek and ornek != 'None') else None,
+        'ai_ornek': ai_ornek if (ai_ornek and ai_ornek != 'None') else None
+    }
+
+
+def clean_batch(batch):
+    """
+    Batch'li `Dataset.map` fonksiyonu: satırları dokümanlara çevirir,
+    geçersiz satırları atar (çıktı satır sayısı girdiden az olabilir).
+
+    Args:
+        batch: Sütun adı -> değer listesi
+
+    Returns:
+        dict: Doküman alanı -> değer listesi
+    """
+    out = {field: [] for field in DOCUMENT_FIELDS}
+    for item in _batch_rows(batch):
+        try:
+            doc = build_document(item)
+        except Exception:
+            doc = None
+        if doc is None:
+            continue
+        for field in DOCUMENT_FIELDS:
+            out[field].append(doc[field])
+    return out
+
+
+# str.strip() ile aynı boşluk karakterleri (Arrow'un boşluk tanımı farklı)
+_WHITESPACE = ('\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f \x85\xa0\u1680'
+               '\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a'
+               '\u2028\u2029\u202f\u205f\u3000')
+
+
+def clean_table(table):
+    """
+    `clean_batch`'in sütun bazlı (vektörel) karşılığı: Arrow tablosu alır,
+    boşluk temizleme, None/boş filtreleme ve metin birleştirmeyi Arrow
+    string fonksiyonlarıyla yapar. Çıktısı `clean_batch` ile birebir aynıdır.
+
+    Args:
+        table: madde, anlam, ornek, ai_ornek sütunlarını içeren pyarrow.Table
+
+    Returns:
+        pyarrow.Table: Doküman alanları (DOCUMENT_FEATURES şeması)
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    schema = DOCUMENT_FEATURES.arrow_schema
+    n_rows = table.num_rows
+
+    def column(name):
+        if name in table.column_names:
+            return table.column(name)
+        return pa.nulls(n_rows, pa.string())
+
+    columns = {name: column(name) for name in ('madde', 'anlam', 'ornek', 'ai_ornek')}
+    # str() dönüşümü string olmayan tiplerde Arrow cast'inden farklı olabilir
+    if not all(pa.types.is_string(c.type) or pa.types.is_large_string(c.type) or pa.types.is_null(c.type)
+               for c in columns.values()):
+        return pa.Table.from_pydict(clean_batch(table.to_pydict()), schema=schema)
+
+    def strip(values):
+        return pc.utf8_trim(pc.cast(values, pa.string()), characters=_WHITESPACE)
+
+    def present(values):
+        # Boş veya 'None' yazan alanlar yok sayılır (null da 'None' olur)
+        return pc.and_(pc.not_equal(pc.utf8_length(values), 0), pc.not_equal(values, 'None'))
+
+    kelime = strip(columns['madde'])
+    anlam = strip(columns['anlam'])
+    # `or ''`: null örnekler boş string
+    ornek = strip(pc.fill_null(pc.cast(columns['ornek'], pa.string()), ''))
+    ai_ornek = strip(pc.fill_null(pc.cast(columns['ai_ornek'], pa.string()), ''))
+
+    valid = pc.fill_null(pc.and_(present(kelime), present(anlam)), False)
+    kelime, anlam, ornek, ai_ornek = (pc.filter(values, valid) for values in (kelime, anlam, ornek, ai_ornek))
+
+    has_ornek = present(ornek)
+    has_ai_ornek = present(ai_ornek)
+
+    # "Kelime: ...\n\nAnlam: ...\n" + örnekler, sondaki satır sonu strip ile atılır
+    text = pc.binary_join_element_wise(
+        'Kelime: ', kelime, '\n\nAnlam: ', anlam,
+        pc.if_else(has_ornek, pc.binary_join_element_wise('\n\nÖrnek kullanım: ', ornek, ''), ''),
+        pc.if_else(has_ai_ornek, pc.binary_join_element_wise('\n\nDetaylı örnek: ', ai_ornek, ''), ''),
+        ''
+    )
+    null = pa.scalar(None, pa.string())
+
+    return pa.Table.from_arrays([
+        text,
+        kelime,
+        anlam,
+        pc.if_else(has_ornek, ornek, null),
+        pc.if_else(has_ai_ornek, ai_ornek, null)
+    ], schema=schema)
+
+
+def _batch_rows(batch):
+    """Sütun sözlüğü biçimindeki batch'i satır sözlüklerine çevirir."""
+    columns = list(batch.keys())
+    for values in zip(*(batch[column] for column in columns)):
+        yield dict(zip(columns, values))
+
+
+def write_documents(documents, filepath, batch_size=1000):
+    """
+    Dokümanları akış halinde dosyaya yazar (hepsi RAM'de tutulmaz).
+
+    Args:
+        documents: Doküman iterable'ı
+        filepath: .jsonl, .parquet veya .json
+        batch_size: Parquet row group boyutu
+
+    Returns:
+        int: Yazılan doküman sayısı
+    """
+    tmp_path = f"{filepath}.tmp"
+    if filepath.endswith('.parquet'):
+        count = _write_parquet(documents, tmp_path, batch_size)
+    else:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            if filepath.endswith('.jsonl'):
+                count = _write_jsonl(documents, f)
+            else:
+                count = _write_json_array(documents, f)
+    os.replace(tmp_path, filepath)
+    return count
+
+
+def _write_jsonl(documents, f):
+    count = 0
+    for doc in documents:
+        f.write(json.dumps(doc, ensure_ascii=False))
+        f.write('\n')
+        count += 1
+    return count
+
+
+def _write_json_array(documents, f):
+    """json.dump(documents, indent=2) ile aynı çıktıyı doküman doküman yazar."""
+    count = 0
+    for doc in documents:
+        f.write('[\n' if count == 0 else ',\n')
+        item = json.dumps(doc, ensure_ascii=False, indent=2)
+        f.write('\n'.join('  ' + line for line in item.split('\n')))
+        count += 1
+    f.write('\n]' if count else '[]')
+    return count
+
+
+def _write_parquet(documents, filepath, batch_size):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = DOCUMENT_FEATURES.arrow_schema
+    count = 0
+    with pq.ParquetWriter(filepath, schema) as writer:
+        batch = []
+        for doc in documents:
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                count += len(batch)
+                batch = []
+        if batch:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            count += len(batch)
+    return count
+
+
+def iter_documents(filepath, batch_size=1000):
+    """
+    Kaydedilmiş dokümanları dosyadan okudukça üretir.
+
+    .jsonl ve .parquet dosyaları parça parça okunur; eski .json formatı
+    tek bir dizi olduğu için tamamı okunup sonra üretilir.
+
+    Yields:
+        dict: Doküman
+    """
+    if filepath.endswith('.jsonl'):
+        with open(filepath, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif filepath.endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(filepath).iter_batches(batch_size=batch_size):
+            yield from batch.to_pylist()
+    else:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            yield from json.load(f)
+
+
 class TDKDataLoader:
     """TDK Sözlük veri setini yükler ve işler."""
 
@@ -22,7 +266,7 @@ class TDKDataLoader:
         """
         self.cache_dir = cache_dir
         self.dataset = None
-        self.processed_data = []
+        self.processed_data = None
 
         # Klasör yoksa oluştur
         os.makedirs(cache_dir, exist_ok=True)
@@ -100,95 +344,128 @@ class TDKDataLoader:
                 except:
                     print(f"   → {anlam[:100]}")
 
-    def process_data(self):
+    def process_data(self, batch_size=1000, num_proc=None, mode='columnar'):
         """
         Veri setini RAG için uygun formata dönüştürür.
 
         Bu veri setinde her satır tek bir kelime-anlam çifti içeriyor.
-        Çok basit ve düz bir yapı.
+        Temizleme batch'ler halinde Hugging Face `map` ile yapılır; sonuç
+        RAM'de liste olarak değil, diskteki Arrow önbelleğinde tutulur.
+
+        Args:
+            batch_size: map batch boyutu
+            num_proc: Paralel process sayısı (None = tek process)
+            mode: 'columnar' (Arrow string fonksiyonları) veya 'python' (satır satır);
+                  iki mod aynı çıktıyı üretir
+
+        Returns:
+            Dataset: İşlenmiş dokümanlar (mmap'li Arrow tablosu)
         """
 
         if self.dataset is None:
             print("Önce veri setini yüklemelisiniz!")
             return None
 
-        print("\nVeri işleniyor...")
-
-        self.processed_data = []
-        error_count = 0
-
-        # Her kelimeyi işle
-        for item in tqdm(self.dataset['train'], desc="İşleniyor"):
-            try:
-                # Alanları al - None değerleri boş string'e çevir
-                kelime = str(item.get('madde', '')).strip()
-                anlam = str(item.get('anlam', '')).strip()
-                ornek = str(item.get('ornek', '') or '').strip()
-                ai_ornek = str(item.get('ai_ornek', '') or '').strip()
-
-                # Kelime veya anlam boş ise atla
-                if not kelime or not anlam or kelime == 'None' or anlam == 'None':
-                    error_count += 1
-                    continue
-
-                # Tam metin oluştur (RAG için zengin context)
-                full_text = f"Kelime: {kelime}\n\n"
-                full_text += f"Anlam: {anlam}\n"
-
-                # Örnek varsa ekle
-                if ornek and ornek != 'None':
-                    full_text += f"\nÖrnek kullanım: {ornek}\n"
-
-                # AI örneği varsa ekle (daha detaylı)
-                if ai_ornek and ai_ornek != 'None':
-                    full_text += f"\nDetaylı örnek: {ai_ornek}\n"
-
-                # Doküman oluştur
-                doc = {
-                    'text': full_text.strip(),
-                    'kelime': kelime,
-                    'anlam': anlam,
-                    'ornek': ornek if (ornek and ornek != 'None') else None,
-                    'ai_ornek': ai_ornek if (ai_ornek and ai_ornek != 'None') else None
-                }
-
-                self.processed_data.append(doc)
-
-            except Exception as e:
-                error_count += 1
-                continue
-
+        if mode not in ('columnar', 'python'):
+            raise ValueError(f"Bilinmeyen işleme modu: {mode}")
+
+        print(f"\nVeri işleniyor ({mode})...")
+
+        train = self.dataset['train']
+        if mode == 'columnar':
+            # Fonksiyon batch'leri pyarrow.Table olarak alır
+            source, function = train.with_format('arrow'), clean_table
+        else:
+            source, function = train, clean_batch
+
+        self.processed_data = source.map(
+            function,
+            batched=True,
+            batch_size=batch_size,
+            num_proc=num_proc,
+            remove_columns=train.column_names,
+            features=DOCUMENT_FEATURES,
+            desc="İşleniyor"
+        ).with_format(None)
+
+        error_count = len(train) - len(self.processed_data)
         print(f"{len(self.processed_data)} doküman oluşturuldu!")
         if error_count > 0:
             print(f"{error_count} kayıt işlenirken hata oluştu (atlandı)")
 
         return self.processed_data
 
-    def save_processed_data(self, filename="processed_tdk.json"):
-        """İşlenmiş veriyi JSON olarak kaydeder."""
+    def iter_processed(self, batch_size=1000):
+        """
+        İşlenmiş dokümanları tek tek üretir (generator).
+
+        Yields:
+            dict: Doküman
+        """
+        if isinstance(self.processed_data, list):
+            yield from self.processed_data
+            return
+
+        for batch in self.processed_data.iter(batch_size=batch_size):
+            yield from _batch_rows(batch)
+
+    def save_processed_data(self, filename=PROCESSED_FILENAME):
+        """
+        İşlenmiş veriyi dosyaya akış halinde (streaming) kaydeder.
+
+        Format uzantıdan belirlenir: .jsonl (satır başına doküman),
+        .parquet veya .json (eski format, tek JSON dizisi).
+        """
 
-        if not self.processed_data:
+        if self.processed_data is None or len(self.processed_data) == 0:
             print("Önce veriyi işlemelisiniz!")
             return
 
         filepath = os.path.join(self.cache_dir, filename)
+        count = write_documents(self.iter_processed(), filepath)
 
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(self.processed_data, f, ensure_ascii=False, indent=2)
+        print(f"Veri kaydedildi: {filepath} ({count} doküman)")
 
-        print(f"Veri kaydedildi: {filepath}")
+    def processed_path(self, filename=None):
+        """
+        İşlenmiş veri dosyasının yolu.
 
-    def load_processed_data(self, filename="processed_tdk.json"):
-        """Daha önce kaydedilmiş işlenmiş veriyi yükler."""
+        Args:
+            filename: Dosya adı (None = bilinen formatlardan ilk bulunan)
 
-        filepath = os.path.join(self.cache_dir, filename)
+        Returns:
+            str veya None (dosya yoksa)
+        """
+        candidates = [filename] if filename else PROCESSED_FILENAMES
+        for name in candidates:
+            filepath = os.path.join(self.cache_dir, name)
+            if os.path.exists(filepath):
+                return filepath
+        return None
+
+    def load_processed_data(self, filename=None, lazy=False):
+        """
+        Daha önce kaydedilmiş işlenmiş veriyi yükler.
+
+        Args:
+            filename: Dosya adı (None = processed_tdk.jsonl, .parquet veya .json)
+            lazy: True ise dokümanları dosyadan okudukça üreten bir iterator döndürür
+
+        Returns:
+            list veya iterator (lazy=True), dosya yoksa None
+        """
 
-        if not os.path.exists(filepath):
-            print(f"Dosya bulunamadı: {filepath}")
+        filepath = self.processed_path(filename)
+
+        if filepath is None:
+            print(f"Dosya bulunamadı: {os.path.join(self.cache_dir, filename or PROCESSED_FILENAME)}")
             return None
 
-        with open(filepath, 'r', encoding='utf-8') as f:
-            self.processed_data = json.load(f)
+        if lazy:
+            print(f"Dokümanlar okunuyor: {filepath}")
+            return iter_documents(filepath)
+
+        self.processed_data = list(iter_documents(filepath))
 
         print(f"{len(self.processed_data)} doküman yüklendi!")
         return self.processed_data
@@ -213,7 +490,7 @@ if __name__ == "__main__":
         print("\n" + "=" * 60)
         print("İLK 3 İŞLENMİŞ DOKÜMAN")
         print("=" * 60)
-        for i, doc in enumerate(loader.processed_data[:3], 1):
+        for i, doc in zip(range(1, 4), loader.iter_processed()):
             print(f"\n{i}. Doküman:")
             print(f"Kelime: {doc['kelime']}")
             print(f"Text:\n{doc['text']}")
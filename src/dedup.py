@@ -0,0 +1,311 @@
+"""
+Embedding öncesi tekrar eden dokümanların ayıklanması.
+
+TDK veri setinde her satır tek bir kelime anlamıdır; aynı madde başının
+satırlarının çoğu aynı ya da neredeyse aynı anlamı taşır. Bu modül:
+1. Birebir tekrarları (madde başı + normalize edilmiş anlam) atar
+2. Aynı madde başındaki neredeyse aynı anlamları MinHash/LSH ile bulup birleştirir
+3. İstenirse kalan anlamları madde başına bağlar (anlam_no / anlam_sayisi):
+   her anlam kendi vektörüyle kalır, arama madde başı başına en iyi anlamı döndürür
+Böylece index küçülür ve top-k sonuçları aynı anlamın kopyalarıyla dolmaz.
+"""
+
+import random
+import time
+import zlib
+
+import numpy as np
+
+from data_loader import build_document
+from text_utils import normalize_query
+
+
+# MinHash için Mersenne asal sayısı (a * x + b taşmadan uint64'e sığar)
+_PRIME = (1 << 31) - 1
+
+
+class _UnionFind:
+    """Yakın tekrar kümeleri için basit union-find."""
+
+    def __init__(self, n):
+        self.parent = list(range(n))
+
+    def find(self, i):
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i, j):
+        # Küçük index kök olur: küme ilk görülen anlamla temsil edilir
+        ri, rj = self.find(i), self.find(j)
+        if ri != rj:
+            self.parent[max(ri, rj)] = min(ri, rj)
+
+
+class Deduplicator:
+    """Birebir ve yakın tekrar anlamları birleştirir, anlamları madde başına toplar."""
+
+    def __init__(self, threshold=0.8, num_perm=64, bands=16, shingle_size=4, group_senses=True, seed=1):
+        """
+        Args:
+            threshold: Yakın tekrar sayılacak en düşük (tahmini) Jaccard benzerliği
+            num_perm: MinHash imza uzunluğu
+            bands: LSH band sayısı (num_perm'i tam bölmeli)
+            shingle_size: Karakter n-gram uzunluğu
+            group_senses: True ise çok anlamlı madde başlarının anlamları numaralanır
+                          (anlam_no, anlam_sayisi); her anlam ayrı kayıt olarak kalır
+            seed: MinHash permütasyonları için tohum (çalıştırmalar arası aynı sonuç)
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm, bands sayısına tam bölünmeli!")
+
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.group_senses = group_senses
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, size=(num_perm, 1), dtype=np.uint64)
+
+        self.stats = {}
+
+    def _shingles(self, text):
+        """Metnin karakter n-gram hash'leri."""
+        size = self.shingle_size
+        pieces = {text[i:i + size] for i in range(max(1, len(text) - size + 1))}
+        return np.fromiter((zlib.crc32(p.encode('utf-8')) for p in pieces), dtype=np.uint64, count=len(pieces))
+
+    def signature(self, text):
+        """
+        Metnin MinHash imzası.
+
+        Returns:
+            numpy array: (num_perm,) uint64
+        """
+        hashes = self._shingles(text)
+        return ((self._a * hashes + self._b) % _PRIME).min(axis=1)
+
+    def _near_duplicates(self, texts, union_find):
+        """
+        Aynı madde başının anlamları arasındaki yakın tekrarları birleştirir.
+
+        Aynı LSH bucket'ına düşen çiftler aday olur, imza benzerliği
+        eşiği geçenler aynı kümeye alınır.
+
+        Returns:
+            int: Birleştirilen çift sayısı
+        """
+        signatures = np.stack([self.signature(text) for text in texts])
+        buckets = {}
+        for i, signature in enumerate(signatures):
+            for band in range(self.bands):
+                key = (band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+                buckets.setdefault(key, []).append(i)
+
+        merged = 0
+        checked = set()
+        for members in buckets.values():
+            for pos, i in enumerate(members):
+                for j in members[pos + 1:]:
+                    if (i, j) in checked:
+                        continue
+                    checked.add((i, j))
+                    if np.mean(signatures[i] == signatures[j]) >= self.threshold \
+                            and union_find.find(i) != union_find.find(j):
+                        union_find.union(i, j)
+                        merged += 1
+        return merged
+
+    def _merge_senses(self, senses):
+        """
+        Bir madde başının anlamlarını tekrarlardan arındırır.
+
+        Args:
+            senses: Aynı madde başına ait dokümanlar (veri setindeki sırayla)
+
+        Returns:
+            tuple: (birleştirilmiş anlam grupları, birebir tekrar sayısı, yakın tekrar sayısı)
+        """
+        # 1. Birebir tekrarlar: normalize edilmiş anlam aynıysa aynı anlam
+        unique = {}
+        for doc in senses:
+            unique.setdefault(normalize_query(doc['anlam']), []).append(doc)
+        exact_duplicates = len(senses) - len(unique)
+
+        groups = list(unique.values())
+        if len(groups) < 2:
+            return groups, exact_duplicates, 0
+
+        # 2. Yakın tekrarlar: MinHash/LSH
+        union_find = _UnionFind(len(groups))
+        near_duplicates = self._near_duplicates(list(unique), union_find)
+
+        clusters = {}
+        for i, group in enumerate(groups):
+            clusters.setdefault(union_find.find(i), []).extend(group)
+        return list(clusters.values()), exact_duplicates, near_duplicates
+
+    @staticmethod
+    def _sense_document(kelime, members):
+        """
+        Bir anlam kümesini tek dokümana çevirir: en uzun anlam tutulur,
+        eksik örnekler kümenin diğer üyelerinden tamamlanır.
+        """
+        if len(members) == 1:
+            return members[0]
+        best = max(members, key=lambda doc: len(doc['anlam']))
+        ornek = best.get('ornek') or next((d['ornek'] for d in members if d.get('ornek')), None)
+        ai_ornek = best.get('ai_ornek') or next((d['ai_ornek'] for d in members if d.get('ai_ornek')), None)
+        return build_document({'madde': kelime, 'anlam': best['anlam'], 'ornek': ornek, 'ai_ornek': ai_ornek})
+
+    @staticmethod
+    def _grouped_senses(senses):
+        """
+        Madde başının anlamlarını numaralar.
+
+        Anlamlar tek kayıtta birleştirilmez: her anlam ayrı encode edilir
+        (uzun maddelerde modelin token sınırında anlam kaybolmaz) ve
+        prompt'a sadece eşleşen anlam girer. Arama sonuçları anlam_sayisi
+        olan kayıtları madde başı başına teke indirir.
+        """
+        if len(senses) == 1:
+            return senses
+        return [{**doc, 'anlam_no': i, 'anlam_sayisi': len(senses)} for i, doc in enumerate(senses, 1)]
+
+    def deduplicate(self, documents):
+        """
+        Dokümanları tekrarlardan arındırır.
+
+        Sonuç deterministiktir: aynı girdi her zaman aynı çıktıyı verir
+        (artımlı index güncellemesi değişmeyen kayıtları tanıyabilir).
+
+        Args:
+            documents: İşlenmiş doküman listesi (kelime, anlam, ornek, ai_ornek, text)
+
+        Returns:
+            list: Birleştirilmiş dokümanlar (madde başlarının ilk görülme sırasıyla)
+        """
+        headwords = {}
+        for doc in documents:
+            headwords.setdefault(doc['kelime'], []).append(doc)
+
+        output = []
+        exact_total = 0
+        near_total = 0
+        senses_total = 0
+
+        for kelime, senses in headwords.items():
+            clusters, exact_duplicates, near_duplicates = self._merge_senses(senses)
+            exact_total += exact_duplicates
+            near_total += near_duplicates
+
+            merged = [self._sense_document(kelime, members) for members in clusters]
+            senses_total += len(merged)
+            if self.group_senses:
+                merged = self._grouped_senses(merged)
+            output.extend(merged)
+
+        self.stats = {
+            'input_documents': len(documents),
+            'exact_duplicates': exact_total,
+            'near_duplicates': near_total,
+            'senses': senses_total,
+            'headwords': len(headwords),
+            'output_documents': len(output),
+            'input_chars': sum(len(doc['text']) for doc in documents),
+            'output_chars': sum(len(doc['text']) for doc in output)
+        }
+        return output
+
+    def measure_encode(self, encode, documents, sample_headwords=300, seed=0):
+        """
+        Tekrar ayıklamanın encode süresine etkisini ölçer.
+
+        Örneklenen madde başlarının dokümanları önce olduğu gibi, sonra
+        tekrarları ayıklanmış halde aynı modelle encode edilir. Sonuç
+        stats'a yazılır, print_report gösterir.
+
+        Args:
+            encode: Metin listesini encode eden fonksiyon
+            documents: Tekrar ayıklanmamış dokümanlar
+            sample_headwords: Örneklenecek madde başı sayısı
+            seed: Örnekleme tohumu (çalıştırmalar arası aynı örnek)
+
+        Returns:
+            dict: Örnekteki kayıt sayıları ve encode süreleri (saniye)
+        """
+        headwords = sorted({doc['kelime'] for doc in documents})
+        sample = set(random.Random(seed).sample(headwords, min(sample_headwords, len(headwords))))
+        raw = [doc for doc in documents if doc['kelime'] in sample]
+
+        # Örneğin ayıklanması tüm verinin istatistiklerini değiştirmemeli
+        stats = self.stats
+        deduplicated = self.deduplicate(raw)
+        self.stats = stats
+
+        # Isınma: ilk çağrının model yükleme / derleme maliyeti ölçüme girmesin
+        encode([doc['text'] for doc in raw[:8]])
+        seconds = []
+        for docs in (raw, deduplicated):
+            started = time.perf_counter()
+            encode([doc['text'] for doc in docs])
+            seconds.append(time.perf_counter() - started)
+
+        benchmark = {
+            'headwords': len(sample),
+            'documents': len(raw),
+            'seconds': seconds[0],
+            'deduplicated_documents': len(deduplicated),
+            'deduplicated_seconds': seconds[1]
+        }
+        self.stats['encode_benchmark'] = benchmark
+        return benchmark
+
+    def print_report(self, embedding_dim=None, encode_seconds=None):
+        """
+        Tekrar ayıklamanın index boyutuna ve encode süresine etkisini gösterir.
+
+        Args:
+            embedding_dim: Verilirse index boyutu (float32) tahmini de gösterilir
+            encode_seconds: Verilirse tüm kayıtların encode süresi de gösterilir
+                            (measure_encode çalıştırıldıysa ölçülen örnek oranıyla
+                            tekrar ayıklanmamış veri için karşılığı da)
+        """
+        stats = self.stats
+        if not stats:
+            return
+        n_in, n_out = stats['input_documents'], stats['output_documents']
+        chars_in, chars_out = stats['input_chars'], stats['output_chars']
+        benchmark = stats.get('encode_benchmark')
+
+        print("\n" + "=" * 60)
+        print("TEKRAR AYIKLAMA RAPORU")
+        print("=" * 60)
+        print(f"Girdi doküman: {n_in}")
+        print(f"Birebir tekrar: {stats['exact_duplicates']}")
+        print(f"Yakın tekrar (MinHash/LSH, eşik {self.threshold}): {stats['near_duplicates']}")
+        print(f"Farklı anlam: {stats['senses']} ({stats['headwords']} madde başı)")
+        print(f"Index'e eklenecek kayıt: {n_out} "
+              f"(%{100 * (1 - n_out / max(n_in, 1)):.1f} küçülme)")
+        print(f"Encode edilecek metin: {chars_out:,} karakter "
+              f"(%{100 * (1 - chars_out / max(chars_in, 1)):.1f} azalma)")
+        if embedding_dim:
+            bytes_in = n_in * embedding_dim * 4
+            bytes_out = n_out * embedding_dim * 4
+            print(f"Index boyutu: {bytes_in / 1024 ** 2:.1f} MB -> {bytes_out / 1024 ** 2:.1f} MB")
+        if benchmark:
+            print(f"Encode ölçümü ({benchmark['headwords']} madde başı): "
+                  f"tekrar ayıklamadan {benchmark['documents']} kayıt {benchmark['seconds']:.2f} sn, "
+                  f"ayıklayarak {benchmark['deduplicated_documents']} kayıt "
+                  f"{benchmark['deduplicated_seconds']:.2f} sn")
+        if encode_seconds is not None:
+            line = f"Encode süresi: {encode_seconds:.1f} sn"
+            if benchmark and benchmark['deduplicated_seconds']:
+                ratio = benchmark['seconds'] / benchmark['deduplicated_seconds']
+                line += f" (tekrar ayıklanmasaydı ölçülen oranla ~{encode_seconds * ratio:.1f} sn)"
+            print(line)
+        print("=" * 60)
@@ -0,0 +1,270 @@
+"""
+Sütun tabanlı (columnar), mmap edilebilir doküman deposu.
+
+Dokümanlar pickle edilmiş dict listesi yerine tek bir dosyada saklanır.
+Her alan (text, kelime, anlam, ...) ayrı bir sütundur: offset tablosuyla
+indekslenmiş UTF-8 string'ler. Dosya mmap ile açıldığında içerik işletim
+sisteminin page cache'inde kalır; aynı dosyayı açan tüm worker process'ler
+aynı sayfaları paylaşır. Yüklemede hiçbir doküman decode edilmez; bir alan
+sadece erişildiğinde (ör. top-k sonuçlar için) decode edilir.
+
+Dosya formatı:
+    MAGIC (8 byte) | header uzunluğu (uint64) | header (JSON)
+    | sütun bölümleri (8 byte hizalı)
+
+Her sütun bölümü:
+    durum dizisi (uint8, n adet: 0 = değer, 1 = None, 2 = alan yok)
+    | offset tablosu (uint64, n + 1 adet) | veri (UTF-8)
+"""
+
+import json
+import mmap
+import os
+from collections.abc import Mapping
+
+import numpy as np
+
+
+MAGIC = b'TDKDOCS2'
+
+# Alan durumları
+PRESENT = 0
+NULL = 1
+MISSING = 2
+
+
+class LazyDocument(Mapping):
+    """
+    Depodaki tek bir dokümana dict benzeri erişim.
+    Alanlar sadece okunduklarında decode edilir.
+    """
+
+    __slots__ = ('_store', '_row')
+
+    def __init__(self, store, row):
+        self._store = store
+        self._row = row
+
+    def __getitem__(self, key):
+        return self._store.get_value(self._row, key)
+
+    def __iter__(self):
+        return iter(self._store.row_fields(self._row))
+
+    def __len__(self):
+        return len(self._store.row_fields(self._row))
+
+    def __repr__(self):
+        return f"LazyDocument({dict(self)!r})"
+
+
+class DocumentStore:
+    """Sütun tabanlı, salt okunur doküman listesi."""
+
+    def __init__(self, filepath, use_mmap=True):
+        """
+        Args:
+            filepath: Doküman deposu dosyası
+            use_mmap: True ise dosya mmap edilir (process'ler arası paylaşılır),
+                      False ise tek bir bytes nesnesi olarak okunur
+        """
+        self.filepath = filepath
+
+        with open(filepath, 'rb') as f:
+            if use_mmap:
+                self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self._buffer = f.read()
+
+        if self._buffer[:8] != MAGIC:
+            raise ValueError(f"Geçersiz doküman deposu: {filepath}")
+
+        header_len = int(np.frombuffer(self._buffer, dtype='<u8', count=1, offset=8)[0])
+        self.header = json.loads(bytes(self._buffer[16:16 + header_len]).decode('utf-8'))
+        self._count = self.header['count']
+
+        # Sütun adı -> (durumlar, offset'ler, veri başlangıcı, json mu)
+        self._columns = {}
+        for column in self.header['columns']:
+            states = np.frombuffer(self._buffer, dtype='u1', count=self._count,
+                                   offset=column['states_start'])
+            offsets = np.frombuffer(self._buffer, dtype='<u8', count=self._count + 1,
+                                    offset=column['offsets_start'])
+            self._columns[column['name']] = (states, offsets, column['data_start'],
+                                             column['type'] == 'json')
+
+    @staticmethod
+    def write(filepath, documents):
+        """
+        Dokümanları depo dosyasına yazar.
+
+        Args:
+            filepath: Kayıt yolu
+            documents: Doküman listesi (dict)
+        """
+        documents = documents if isinstance(documents, list) else list(documents)
+        count = len(documents)
+
+        # Tüm dokümanlardaki alanlar (ilk görülme sırasıyla)
+        names = list(dict.fromkeys(key for doc in documents for key in doc))
+
+        sections = []
+        header_columns = []
+        position = 0
+
+        for name in names:
+            values = [doc.get(name) for doc in documents]
+            states = np.array([
+                MISSING if name not in doc else (NULL if value is None else PRESENT)
+                for doc, value in zip(documents, values)
+            ], dtype='u1')
+
+            # String olmayan değerler (sayı, liste vb.) JSON olarak saklanır
+            is_json = any(v is not None and not isinstance(v, str) for v in values)
+            if is_json:
+                encoded = [json.dumps(v, ensure_ascii=False).encode('utf-8') if v is not None else b''
+                           for v in values]
+            else:
+                encoded = [v.encode('utf-8') if v is not None else b'' for v in values]
+
+            offsets = np.zeros(count + 1, dtype='<u8')
+            np.cumsum([len(e) for e in encoded], out=offsets[1:])
+
+            states_start = position
+            offsets_start = _align(states_start + states.nbytes)
+            data_start = offsets_start + offsets.nbytes
+            position = _align(data_start + int(offsets[-1]))
+
+            header_columns.append({
+                'name': name,
+                'type': 'json' if is_json else 'str',
+                'states_start': states_start,
+                'offsets_start': offsets_start,
+                'data_start': data_start
+            })
+            sections.append((states_start, states.tobytes(), offsets_start, offsets.tobytes(),
+                             data_start, encoded))
+
+        # Bölüm pozisyonları header'dan sonra başlar
+        header = {'count': count, 'columns': header_columns}
+        # (pozisyonlar mutlak hale gelince header uzar, bunun için yer ayrılır)
+        base = _align(16 + len(json.dumps(header).encode('utf-8')) + 64 * len(names) + 64)
+        for column in header_columns:
+            for key in ('states_start', 'offsets_start', 'data_start'):
+                column[key] += base
+        header_bytes = json.dumps(header).encode('utf-8')
+        if len(header_bytes) > base - 16:
+            raise ValueError("Doküman deposu header'ı ayrılan alana sığmadı!")
+        header_bytes = header_bytes.ljust(base - 16)
+
+        tmp_path = f"{filepath}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(np.array([len(header_bytes)], dtype='<u8').tobytes())
+            f.write(header_bytes)
+            for states_start, states, offsets_start, offsets, data_start, encoded in sections:
+                _pad_to(f, base + states_start)
+                f.write(states)
+                _pad_to(f, base + offsets_start)
+                f.write(offsets)
+                for e in encoded:
+                    f.write(e)
+            _pad_to(f, base + position)
+
+        # Yarım yazılmış dosya okunmasın
+        os.replace(tmp_path, filepath)
+
+    @property
+    def fields(self):
+        """Depodaki alan adları."""
+        return list(self._columns)
+
+    def get_value(self, row, name):
+        """
+        Tek bir alanı decode eder.
+
+        Raises:
+            KeyError: Alan bu dokümanda yoksa
+        """
+        column = self._columns.get(name)
+        if column is None:
+            raise KeyError(name)
+
+        states, offsets, data_start, is_json = column
+        state = states[row]
+        if state == MISSING:
+            raise KeyError(name)
+        if state == NULL:
+            return None
+
+        start = data_start + int(offsets[row])
+        end = data_start + int(offsets[row + 1])
+        value = self._buffer[start:end].decode('utf-8')
+        return json.loads(value) if is_json else value
+
+    def row_fields(self, row):
+        """Bir dokümanda bulunan alan adları."""
+        return [name for name, column in self._columns.items() if column[0][row] != MISSING]
+
+    def column(self, name, default=None):
+        """
+        Bir alanın tüm değerlerini döndürür (diğer sütunlar okunmaz).
+
+        Args:
+            name: Alan adı
+            default: Alanın olmadığı dokümanlar için değer
+        """
+        if name not in self._columns:
+            return [default] * self._count
+
+        values = []
+        for row in range(self._count):
+            try:
+                values.append(self.get_value(row, name))
+            except KeyError:
+                values.append(default)
+        return values
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._count))]
+        i = int(i)
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError(i)
+        return LazyDocument(self, i)
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield LazyDocument(self, i)
+
+
+def field_values(documents, name, default=None):
+    """
+    Doküman listesinden (list veya DocumentStore) tek bir alanı okur.
+    DocumentStore'da sadece ilgili sütun decode edilir.
+    """
+    if isinstance(documents, DocumentStore):
+        return documents.column(name, default)
+    return [doc.get(name, default) for doc in documents]
+
+
+def field_names(documents):
+    """Doküman listesindeki (list veya DocumentStore) alan adları."""
+    if isinstance(documents, DocumentStore):
+        return set(documents.fields)
+    return {name for doc in documents for name in doc}
+
+
+def _align(position, alignment=8):
+    """Pozisyonu alignment'ın katına yuvarlar (numpy okumaları için)."""
+    return (position + alignment - 1) // alignment * alignment
+
+
+def _pad_to(f, position):
+    """Dosyayı verilen pozisyona kadar sıfırla doldurur."""
+    f.write(b'\0' * (position - f.tell()))
@@ -2,11 +2,16 @@
 Embedding modeli yönetimi.
 
 Bu modül metinleri sayısal vektörlere dönüştürmek için
-sentence-transformers kütüphanesini kullanır.
+sentence-transformers kütüphanesini (veya ONNX Runtime'a aktarılmış
+aynı modeli) kullanır.
 """
 
-from sentence_transformers import SentenceTransformer
+from batching import MicroBatcher
+from cache import QueryEmbeddingCache
+from document_store import DocumentStore
+from index_manifest import documents_fingerprint
 import numpy as np
+import json
 from tqdm import tqdm
 import pickle
 import os
@@ -15,16 +20,49 @@ import os
 class EmbeddingModel:
     """Türkçe metinler için embedding modeli."""
 
-    def __init__(self, model_name="emrecan/bert-base-turkish-cased-mean-nli-stsb-tr"):
+    # Desteklenen backend'ler
+    # torch: sentence-transformers (PyTorch)
+    # onnx: ONNX Runtime (torch import edilmez, int8 quantize model kullanılabilir)
+    BACKENDS = ('torch', 'onnx')
+
+    def __init__(self, model_name="emrecan/bert-base-turkish-cased-mean-nli-stsb-tr",
+                 micro_batching=False, max_batch_size=32, max_wait_ms=5.0,
+                 cache_size=0, cache_ttl=None, cache_path=None,
+                 backend='torch', onnx_dir="./data/onnx_model", onnx_file="onnx/model.onnx"):
         """
         Args:
             model_name: Kullanılacak embedding modeli.
                        Türkçe için özel eğitilmiş model kullanıyoruz.
+            micro_batching: True ise eşzamanlı encode_single çağrıları
+                            toplanıp tek bir model çağrısında işlenir
+            max_batch_size: Mikro-batch'teki en fazla sorgu sayısı
+            max_wait_ms: İlk sorgudan sonra diğerleri için beklenecek süre (ms)
+            cache_size: Sorgu embedding önbelleğinin boyutu (0 = kapalı)
+            cache_ttl: Önbellek kayıtlarının ömrü (saniye, None = süresiz)
+            cache_path: Kalıcı önbellek için SQLite dosyası (None = sadece bellek)
+            backend: 'torch' veya 'onnx'
+            onnx_dir: 'onnx' için onnx_export.py ile oluşturulan model klasörü
+            onnx_file: Klasördeki ONNX dosyası (int8 için onnx/model_qint8.onnx)
         """
-        print(f"🤖 Embedding modeli yükleniyor: {model_name}")
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Geçersiz backend: {backend} (desteklenenler: {', '.join(self.BACKENDS)})")
+
+        print(f"🤖 Embedding modeli yükleniyor: {model_name} ({backend})")
+        self.batcher = None
+        self.query_cache = None
+        self.backend = backend
 
         try:
-            self.model = SentenceTransformer(model_name)
+            if backend == 'onnx':
+                from onnx_encoder import OnnxSentenceEncoder
+                self.model = OnnxSentenceEncoder(onnx_dir, file_name=onnx_file)
+                # Önbellek anahtarında torch ve ONNX embedding'leri karışmasın
+                self.model_id = f"{model_name}:onnx:{onnx_file}"
+            else:
+                # torch import'u yavaş, sadece bu backend'de yükle
+                from sentence_transformers import SentenceTransformer
+                self.model = SentenceTransformer(model_name)
+                self.model_id = model_name
             self.model_name = model_name
             print("Model başarıyla yüklendi!")
 
@@ -36,6 +74,80 @@ class EmbeddingModel:
             print(f"Model yüklenirken hata: {e}")
             raise
 
+        if micro_batching:
+            self.enable_micro_batching(max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+
+        if cache_size:
+            self.enable_query_cache(max_size=cache_size, ttl=cache_ttl, filepath=cache_path)
+
+    def enable_micro_batching(self, max_batch_size=32, max_wait_ms=5.0):
+        """
+        Eşzamanlı encode_single çağrıları için mikro-batching'i açar.
+
+        Args:
+            max_batch_size: Mikro-batch'teki en fazla sorgu sayısı
+            max_wait_ms: İlk sorgudan sonra diğerleri için beklenecek süre (ms)
+        """
+        if self.batcher is not None:
+            self.batcher.close()
+
+        self._batch_settings = (max_batch_size, max_wait_ms)
+        self.batcher = MicroBatcher(
+            lambda texts: self.encode_queries(texts, batch_size=max_batch_size, use_cache=False),
+            max_batch_size=max_batch_size,
+            max_wait_ms=max_wait_ms,
+            name="embedding-micro-batcher"
+        )
+        print(f"Mikro-batching açık (batch: {max_batch_size}, bekleme: {max_wait_ms} ms)")
+
+    def enable_query_cache(self, max_size=10000, ttl=None, filepath=None):
+        """
+        Sorgu embedding önbelleğini açar.
+
+        Sorgular normalize edilerek (Türkçe küçük harf, noktalama ve boşluk
+        temizliği) anahtarlanır; tekrar eden sorgularda model çağrılmaz.
+
+        Args:
+            max_size: Bellekteki en fazla kayıt sayısı
+            ttl: Kayıt ömrü (saniye, None = süresiz)
+            filepath: Kalıcı önbellek için SQLite dosyası (None = sadece bellek)
+        """
+        self.query_cache = QueryEmbeddingCache(
+            max_size=max_size,
+            ttl=ttl,
+            filepath=filepath,
+            model_name=self.model_id
+        )
+        disk = f", disk: {filepath}" if filepath else ""
+        print(f"Sorgu embedding önbelleği açık (boyut: {max_size}{disk})")
+
+    def after_fork(self):
+        """
+        Fork sonrası child process'te çağrılır.
+
+        Mikro-batching thread'i fork'ta kopyalanmaz, yeniden başlatılır;
+        disk önbelleğinin bağlantısı yeniden açılır.
+        """
+        if self.batcher is not None:
+            self.batcher = None
+            self.enable_micro_batching(
+                max_batch_size=self._batch_settings[0],
+                max_wait_ms=self._batch_settings[1]
+            )
+        if self.query_cache is not None:
+            self.query_cache.after_fork()
+        if self.backend == 'onnx':
+            self.model.after_fork()
+
+    def get_stats(self):
+        """Embedding istatistikleri (mikro-batching ve önbellek metrikleri)."""
+        return {
+            'model_name': self.model_name,
+            'backend': self.backend,
+            'micro_batching': self.batcher.get_stats() if self.batcher is not None else None,
+            'query_cache': self.query_cache.get_stats() if self.query_cache is not None else None
+        }
+
     def encode_single(self, text):
         """
         Tek bir metni embedding'e çevirir.
@@ -49,13 +161,81 @@ class EmbeddingModel:
         if not text or not isinstance(text, str):
             return None
 
+        if self.query_cache is not None:
+            embedding = self.query_cache.get(text)
+            if embedding is not None:
+                return embedding
+
         try:
-            embedding = self.model.encode(text, convert_to_numpy=True)
-            return embedding
+            if self.batcher is not None:
+                # Diğer thread'lerin sorgularıyla birlikte tek batch'te encode edilir
+                embedding = self.batcher.submit(text)
+            else:
+                embedding = self.model.encode(text, convert_to_numpy=True)
         except Exception as e:
             print(f"Encoding hatası: {e}")
             return None
 
+        if self.query_cache is not None:
+            self.query_cache.put(text, embedding)
+        return embedding
+
+    def encode_queries(self, texts, batch_size=32, use_cache=True):
+        """
+        Sorgu metinlerini tek bir model çağrısıyla embedding'e çevirir.
+        encode_batch'ten farkı: sunucu tarafında kullanım için sessizdir.
+
+        Args:
+            texts: Sorgu metinleri
+            batch_size: Aynı anda işlenecek metin sayısı
+            use_cache: Önbellek açıksa sadece önbellekte olmayanları encode et
+
+        Returns:
+            numpy array: Embedding matrisi (n_texts, embedding_dim)
+        """
+        texts = list(texts)
+        if not use_cache or self.query_cache is None:
+            return self._encode_quiet(texts, batch_size)
+
+        embeddings = [self.query_cache.get(text) for text in texts]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            encoded = self._encode_quiet([texts[i] for i in missing], batch_size)
+            for i, embedding in zip(missing, encoded):
+                self.query_cache.put(texts[i], embedding)
+                embeddings[i] = embedding
+
+        return np.stack(embeddings)
+
+    def _encode_quiet(self, texts, batch_size):
+        """İlerleme çubuğu olmadan model.encode çağrısı."""
+        return self.model.encode(
+            texts,
+            batch_size=batch_size,
+            show_progress_bar=False,
+            convert_to_numpy=True
+        )
+
+    def warmup(self, texts, rounds=2):
+        """
+        Modeli ısıtır: tekli ve toplu encode yollarını önbelleği kullanmadan çalıştırır.
+        İlk çağrılardaki tembel başlatma maliyetleri (kernel seçimi, bellek
+        ayırıcıları) kullanıcı isteklerine yansımaz.
+
+        Args:
+            texts: Örnek sorgular
+            rounds: Kaç tur çalıştırılacak
+
+        Returns:
+            numpy array: Son turdaki embedding matrisi
+        """
+        embeddings = None
+        for _ in range(rounds):
+            for text in texts:
+                self._encode_quiet([text], batch_size=1)
+            embeddings = self._encode_quiet(list(texts), batch_size=32)
+        return embeddings
+
     def encode_batch(self, texts, batch_size=32, show_progress=True):
         """
         Birden fazla metni toplu olarak embedding'e çevirir.
@@ -88,80 +268,173 @@ class EmbeddingModel:
             print(f"Batch encoding hatası: {e}")
             return None
 
-    def encode_documents(self, documents, text_key='text'):
+    def encode_documents(self, documents, text_key='text', deduplicator=None):
         """
         Doküman listesini embedding'e çevirir.
 
         Args:
             documents: Doküman listesi (dict formatında)
             text_key: Metin alanının key'i
+            deduplicator: Verilirse (dedup.Deduplicator) geçerli dokümanlar
+                          encode öncesi tekrarlardan arındırılır (prepare_system
+                          ile aynı aşama)
 
         Returns:
             tuple: (embeddings, valid_documents)
+                   valid_documents deduplicator verildiyse birleştirilmiş kayıtlardır
         """
         if not documents:
             return None, []
 
-        # Metinleri çıkar
-        texts = []
-        valid_docs = []
-
-        for doc in documents:
-            text = doc.get(text_key, '')
-            if text and isinstance(text, str):
-                texts.append(text)
-                valid_docs.append(doc)
+        # Geçerli dokümanları ayır
+        valid_docs = [doc for doc in documents if isinstance(doc.get(text_key), str) and doc[text_key]]
 
         print(f"{len(valid_docs)} geçerli doküman bulundu")
 
+        if deduplicator is not None:
+            valid_docs = deduplicator.deduplicate(valid_docs)
+            print(f"Tekrar ayıklama sonrası {len(valid_docs)} kayıt")
+
+        texts = [doc[text_key] for doc in valid_docs]
+
         # Embedding'leri oluştur
         embeddings = self.encode_batch(texts)
 
         return embeddings, valid_docs
 
-    def save_embeddings(self, embeddings, documents, filepath):
+    def save_embeddings(self, embeddings, documents, filepath, documents_path=None, dtype='float32'):
         """
         Embedding'leri ve dokümanları kaydeder.
 
         Args:
             embeddings: Embedding matrisi
             documents: Doküman listesi
-            filepath: Kayıt yolu
+            filepath: Kayıt yolu (.npy)
+            documents_path: Paylaşılan doküman deposu (None = filepath yanında .docs)
+            dtype: 'float32' veya 'float16'
         """
-        data = {
-            'embeddings': embeddings,
-            'documents': documents,
-            'model_name': self.model_name
-        }
+        self.write_embeddings(embeddings, documents, self.model_name, filepath,
+                              documents_path=documents_path, dtype=dtype)
 
-        # Klasör yoksa oluştur
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    @staticmethod
+    def embedding_paths(filepath):
+        """
+        Embedding matrisi dosyasının yanındaki dosyalar.
+
+        Returns:
+            tuple: (doküman id listesi .ids.npy, metadata .json)
+        """
+        base = filepath[:-4] if filepath.endswith('.npy') else filepath
+        return f"{base}.ids.npy", f"{base}.json"
+
+    @staticmethod
+    def write_embeddings(embeddings, documents, model_name, filepath, documents_path=None,
+                         dtype='float32', fingerprint=None):
+        """
+        Embedding'leri model yüklemeden kaydeder (ör. paralel encode sonrası).
 
-        with open(filepath, 'wb') as f:
-            pickle.dump(data, f)
+        Matris mmap edilebilir bir .npy dosyasına, dokümanlar tek bir
+        paylaşılan doküman deposuna (DocumentStore) yazılır. Matrisin her
+        satırı id listesiyle depodaki bir dokümana bağlanır; vector store
+        aynı depoyu kullanır, dokümanlar ikinci kez saklanmaz.
 
-        print(f"Embedding'ler kaydedildi: {filepath}")
+        Args:
+            embeddings: Embedding matrisi (filepath'ten açılmış memmap ise yeniden yazılmaz)
+            documents: Doküman listesi
+            model_name: Embedding'leri üreten model
+            filepath: Matris dosyası (.npy)
+            documents_path: Paylaşılan doküman deposu (None = filepath yanında .docs)
+            dtype: 'float32' veya 'float16' (yarı boyut; FAISS'e eklerken float32'ye çevrilir)
+            fingerprint: Dokümanların hash'i (None = hesaplanır)
+        """
+        ids_path, meta_path = EmbeddingModel.embedding_paths(filepath)
+        documents_path = documents_path or os.path.splitext(filepath)[0] + '.docs'
+
+        # Klasör yoksa oluştur
+        os.makedirs(os.path.dirname(filepath) or '.', exist_ok=True)
+
+        already_written = (
+            isinstance(embeddings, np.memmap) and embeddings.dtype == dtype
+            and embeddings.filename is not None and os.path.exists(filepath)
+            and os.path.samefile(embeddings.filename, filepath)
+        )
+        if not already_written:
+            np.save(f"{filepath}.tmp.npy", np.asarray(embeddings, dtype=dtype))
+            os.replace(f"{filepath}.tmp.npy", filepath)
+
+        DocumentStore.write(documents_path, documents)
+        np.save(ids_path, np.arange(len(documents), dtype='int64'))
+
+        # Metadata en son yazılır (yarım kayıt güncel sanılmasın)
+        meta_dir = os.path.dirname(os.path.abspath(meta_path))
+        with open(f"{meta_path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump({
+                'model_name': model_name,
+                'dtype': str(np.dtype(dtype)),
+                'shape': list(embeddings.shape),
+                'documents_path': os.path.relpath(os.path.abspath(documents_path), meta_dir),
+                'fingerprint': fingerprint or documents_fingerprint(documents)
+            }, f, indent=2)
+        os.replace(f"{meta_path}.tmp", meta_path)
+
+        print(f"Embedding'ler kaydedildi: {filepath} ({np.dtype(dtype)})")
+        print(f"Dokümanlar kaydedildi: {documents_path}")
 
     @staticmethod
-    def load_embeddings(filepath):
+    def load_embeddings(filepath, use_mmap=True):
         """
         Kaydedilmiş embedding'leri yükler.
 
+        Matris ve doküman deposu mmap ile açılır (kopyalanmaz, decode edilmez).
+
         Args:
-            filepath: Dosya yolu
+            filepath: Matris dosyası (.npy) veya eski format .pkl
+            use_mmap: False ise dosyalar RAM'e okunur
 
         Returns:
-            dict: {'embeddings', 'documents', 'model_name'}
+            dict: {'embeddings', 'documents', 'doc_ids', 'model_name', 'fingerprint'}
         """
         if not os.path.exists(filepath):
             print(f"Dosya bulunamadı: {filepath}")
             return None
 
-        with open(filepath, 'rb') as f:
-            data = pickle.load(f)
+        if filepath.endswith('.pkl'):
+            # Eski format: matris ve dokümanlar tek pickle içinde
+            with open(filepath, 'rb') as f:
+                data = pickle.load(f)
+            data.setdefault('doc_ids', np.arange(len(data['documents']), dtype='int64'))
+            data.setdefault('fingerprint', None)
+        else:
+            ids_path, meta_path = EmbeddingModel.embedding_paths(filepath)
+            if not os.path.exists(meta_path):
+                print(f"Dosya bulunamadı: {meta_path}")
+                return None
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+
+            mmap_mode = 'r' if use_mmap else None
+            embeddings = np.load(filepath, mmap_mode=mmap_mode)
+            doc_ids = np.load(ids_path, mmap_mode=mmap_mode)
+            store = DocumentStore(
+                os.path.join(os.path.dirname(os.path.abspath(meta_path)), meta['documents_path']),
+                use_mmap=use_mmap
+            )
+            # Satırlar depoyla aynı sıradaysa depo doğrudan kullanılır
+            if len(doc_ids) == len(store) and np.array_equal(doc_ids, np.arange(len(store))):
+                documents = store
+            else:
+                documents = [store[i] for i in doc_ids]
+
+            data = {
+                'embeddings': embeddings,
+                'documents': documents,
+                'doc_ids': doc_ids,
+                'model_name': meta['model_name'],
+                'fingerprint': meta.get('fingerprint')
+            }
 
         print(f"Embedding'ler yüklendi: {filepath}")
-        print(f"Embedding shape: {data['embeddings'].shape}")
+        print(f"Embedding shape: {data['embeddings'].shape} ({data['embeddings'].dtype})")
         print(f"Model: {data['model_name']}")
 
         return data
@@ -0,0 +1,89 @@
+"""
+Sahte (fake) LLM.
+
+Gemini API'si olmadan chatbot'u, streaming'i ve yük testlerini
+yerelde çalıştırmak için genai.GenerativeModel arayüzünü taklit eder.
+Sabit bir yanıtı token token (isteğe bağlı gecikmeyle) döndürür.
+
+Kullanım:
+    TDK_FAKE_LLM=1 python app.py
+
+Gecikme ayarları (yük testleri için):
+    TDK_FAKE_LLM_LATENCY: İlk token'dan önceki bekleme (saniye)
+    TDK_FAKE_LLM_TOKEN_DELAY: Token'lar arası bekleme (saniye)
+"""
+
+import asyncio
+import time
+
+
+class FakeResponse:
+    """generate_content çıktısı (ve streaming parçası) taklidi."""
+
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    """genai.GenerativeModel yerine kullanılabilen sahte model."""
+
+    DEFAULT_RESPONSE = "Bu yanıt test için sahte model tarafından üretildi."
+
+    def __init__(self, response=None, token_delay=0.0, latency=0.0):
+        """
+        Args:
+            response: Döndürülecek sabit yanıt (None = DEFAULT_RESPONSE)
+            token_delay: Streaming'de token'lar arası bekleme (saniye)
+            latency: İlk token'dan önceki bekleme (saniye)
+        """
+        self.response = response or self.DEFAULT_RESPONSE
+        self.token_delay = token_delay
+        self.latency = latency
+        self.calls = 0
+
+    def tokens(self):
+        """Yanıtı kelime bazlı token'lara böler (boşluklar korunur)."""
+        words = self.response.split(' ')
+        return [word + ' ' for word in words[:-1]] + [words[-1]]
+
+    def generate_content(self, prompt, stream=False):
+        """
+        Args:
+            prompt: Prompt metni (kullanılmaz)
+            stream: True ise parça parça yanıt döndüren iterator
+
+        Returns:
+            FakeResponse veya FakeResponse iterator'ı
+        """
+        self.calls += 1
+        if stream:
+            return self._stream()
+
+        time.sleep(self.latency + self.token_delay * len(self.tokens()))
+        return FakeResponse(self.response)
+
+    def _stream(self):
+        time.sleep(self.latency)
+        for token in self.tokens():
+            yield FakeResponse(token)
+            time.sleep(self.token_delay)
+
+    async def generate_content_async(self, prompt, stream=False):
+        """
+        generate_content'in asyncio hali (genai.GenerativeModel ile aynı arayüz).
+
+        Returns:
+            FakeResponse veya `async for` ile okunan parça iterator'ı
+        """
+        self.calls += 1
+        if stream:
+            return self._stream_async()
+
+        await asyncio.sleep(self.latency + self.token_delay * len(self.tokens()))
+        return FakeResponse(self.response)
+
+    async def _stream_async(self):
+        await asyncio.sleep(self.latency)
+        for token in self.tokens():
+            yield FakeResponse(token)
+            await asyncio.sleep(self.token_delay)
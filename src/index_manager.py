@@ -0,0 +1,269 @@
+"""
+Çalışan uygulamada index'in kesintisiz yeniden yüklenmesi (hot reload).
+
+Yeni bir vector store kaydedildiğinde (prepare_system.py) uygulama
+yeniden başlatılmaz: yeni sürüm arka planda yüklenip ısıtılır, hazır
+olunca tek bir referans ataması ile canlıya alınır. Her arama başladığı
+sürümü sonuna kadar kullanır; eski sürüm, üzerindeki aramalar bitince
+bırakılır. Embedding ve yanıt önbellekleri korunur.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+from vector_store import FAISSVectorStore
+from document_store import field_names
+from lexical_index import HeadwordIndex
+from bm25_index import BM25Index
+from query_analyzer import QueryAnalyzer
+
+
+def _format_time(timestamp):
+    """Unix zamanını okunabilir hale getirir (None ise None)."""
+    if timestamp is None:
+        return None
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(timestamp))
+
+
+class IndexGeneration:
+    """Bir index sürümü: vector store, kelime/BM25 index'leri, sorgu çözümleyici ve devam eden arama sayısı."""
+
+    def __init__(self, vector_store, vector_store_path=None):
+        """
+        Args:
+            vector_store: Yüklenmiş FAISSVectorStore
+            vector_store_path: Vector store dosya yolu (yanındaki BM25 index'i için)
+        """
+        self.vector_store = vector_store
+        # Kelime index'i sürümle birlikte oluşturulur (dokümanlarla tutarlı kalsın)
+        self.headword_index = HeadwordIndex(vector_store.documents)
+        # Sorgu çözümleyici madde başlarından bir kere oluşturulur
+        self.query_analyzer = QueryAnalyzer(self.headword_index.exact)
+        if vector_store_path is not None:
+            self.bm25_index = BM25Index.for_store(vector_store, vector_store_path)
+        else:
+            self.bm25_index = BM25Index.build(vector_store.documents, **vector_store.bm25_params,
+                                              version=vector_store.version)
+        # TDK_DEDUP=group ile hazırlanan index'te anlamlar madde başına bağlıdır:
+        # arama sonuçları madde başı başına teke indirilir
+        self.grouped_senses = 'anlam_sayisi' in field_names(vector_store.documents)
+        self.version = vector_store.version
+        self.built_at = vector_store.built_at
+        self.id_epoch = vector_store.id_epoch
+        self.loaded_at = time.time()
+
+        self._active = 0
+        self._idle = threading.Condition()
+
+    def acquire(self):
+        with self._idle:
+            self._active += 1
+
+    def release(self):
+        with self._idle:
+            self._active -= 1
+            if self._active == 0:
+                self._idle.notify_all()
+
+    def wait_idle(self, timeout=None):
+        """Bu sürümü kullanan aramalar bitene kadar bekler."""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._active == 0, timeout)
+
+    def after_fork(self):
+        self._active = 0
+        self._idle = threading.Condition()
+
+    def get_info(self):
+        return {
+            'version': self.version,
+            'built_at': _format_time(self.built_at),
+            'loaded_at': _format_time(self.loaded_at),
+            'documents': int(self.vector_store.index.ntotal),
+            'index_type': self.vector_store.index_type,
+            'bm25': self.bm25_index.get_info(),
+            'query_analyzer': self.query_analyzer.get_info(),
+            'active_searches': self._active
+        }
+
+
+class IndexManager:
+    """Canlı index sürümünü tutar, yeni sürümleri arka planda yükleyip değiştirir."""
+
+    def __init__(self, vector_store_path, use_mmap=False, warmup=None):
+        """
+        Args:
+            vector_store_path: Vector store dosya yolu (uzantısız)
+            use_mmap: Index ve dokümanları mmap ile yükle
+            warmup: Yeni sürüm canlıya alınmadan önce çağrılacak fonksiyon (IndexGeneration alır)
+
+        Raises:
+            ValueError: Vector store yüklenemezse
+        """
+        self.vector_store_path = vector_store_path
+        self.use_mmap = use_mmap
+        self._warmup = warmup
+
+        self._lock = threading.Lock()
+        self._current = self._load()
+        self._retiring = []
+        self._reload_thread = None
+        self._reset_state()
+
+        self.watch_interval = 0
+        self._stop_watching = threading.Event()
+
+    def _reset_state(self):
+        self.state = {
+            'status': 'idle',
+            'error': None,
+            'reloads': 0,
+            'last_reload': None,
+            'last_reload_seconds': None
+        }
+
+    def _load(self):
+        store = FAISSVectorStore()
+        if not store.load(self.vector_store_path, use_mmap=self.use_mmap):
+            raise ValueError("Vector store yüklenemedi!")
+        return IndexGeneration(store, self.vector_store_path)
+
+    @property
+    def current(self):
+        """Canlı index sürümü."""
+        return self._current
+
+    @contextmanager
+    def acquire(self):
+        """
+        Bir arama için canlı sürümü alır; arama bitene kadar bu sürüm bırakılmaz.
+
+        Yields:
+            IndexGeneration
+        """
+        generation = self._current
+        generation.acquire()
+        try:
+            yield generation
+        finally:
+            generation.release()
+
+    def reload(self, wait=False, force=False):
+        """
+        Diskteki sürümü arka planda yükler ve hazır olunca canlıya alır.
+
+        Args:
+            wait: Yükleme bitene kadar bekle
+            force: Sürüm değişmemiş olsa da yeniden yükle
+
+        Returns:
+            bool: Yeni bir yükleme başlatıldıysa True (zaten devam ediyorsa False)
+        """
+        with self._lock:
+            thread = self._reload_thread
+            started = thread is None or not thread.is_alive()
+            if started:
+                thread = threading.Thread(target=self._reload, args=(force,),
+                                          name='tdk-index-reload', daemon=True)
+                self._reload_thread = thread
+                thread.start()
+
+        if wait:
+            thread.join()
+        return started
+
+    def _reload(self, force):
+        try:
+            version = FAISSVectorStore.read_version(self.vector_store_path)
+            if not force and version is not None and version == self._current.version:
+                print(f"Index zaten güncel (sürüm {version})")
+                return
+
+            self.state['status'] = 'loading'
+            started = time.perf_counter()
+            print(f"Yeni index yükleniyor (sürüm {version})...")
+            generation = self._load()
+            if self._warmup is not None:
+                self._warmup(generation)
+        except Exception as e:
+            self.state['status'] = 'failed'
+            self.state['error'] = str(e)
+            print(f"Index yeniden yüklenemedi, eski sürüm kullanılmaya devam ediyor: {e}")
+            return
+
+        # Tek referans ataması: yeni aramalar yeni sürümü görür
+        with self._lock:
+            old = self._current
+            self._current = generation
+            self._retiring.append(old)
+
+        self.state.update({
+            'status': 'idle',
+            'error': None,
+            'reloads': self.state['reloads'] + 1,
+            'last_reload': time.time(),
+            'last_reload_seconds': round(time.perf_counter() - started, 3)
+        })
+        print(f"Index değiştirildi: {old.version} -> {generation.version}")
+
+        threading.Thread(target=self._retire, args=(old,), name='tdk-index-retire', daemon=True).start()
+
+    def _retire(self, generation):
+        """Eski sürümü, üzerindeki aramalar bitince bırakır."""
+        generation.wait_idle()
+        with self._lock:
+            self._retiring.remove(generation)
+        # Son referanslar (ör. önceki isteklerin sonuçları) bırakılınca bellek geri verilir
+        print(f"Eski index bırakıldı (sürüm {generation.version})")
+
+    def start_watching(self, interval):
+        """
+        Diskteki sürümü belirli aralıklarla kontrol eder, değişince yeniden yükler.
+
+        Args:
+            interval: Kontrol aralığı (saniye), 0 = kapalı
+        """
+        self.watch_interval = interval
+        if not interval:
+            return
+
+        stop = threading.Event()
+        self._stop_watching = stop
+
+        def watch():
+            while not stop.wait(interval):
+                try:
+                    version = FAISSVectorStore.read_version(self.vector_store_path)
+                except Exception as e:
+                    print(f"Index sürümü okunamadı: {e}")
+                    continue
+                if version is not None and version != self._current.version:
+                    self.reload(wait=True)
+
+        threading.Thread(target=watch, name='tdk-index-watch', daemon=True).start()
+        print(f"Index değişiklikleri izleniyor ({interval} sn aralıkla)")
+
+    def stop_watching(self):
+        self._stop_watching.set()
+
+    def after_fork(self):
+        """Fork sonrası child process'te çağrılır: kilitler, sayaçlar ve izleme thread'i yenilenir."""
+        self._lock = threading.Lock()
+        self._reload_thread = None
+        self._retiring = []
+        self._current.after_fork()
+        self._reset_state()
+        self.start_watching(self.watch_interval)
+
+    def get_info(self):
+        """Canlı sürüm ve yeniden yükleme durumu."""
+        state = dict(self.state)
+        state['last_reload'] = _format_time(state['last_reload'])
+        return {
+            **self._current.get_info(),
+            'path': self.vector_store_path,
+            'reload': state,
+            'retiring': [g.version for g in self._retiring],
+            'watch_interval': self.watch_interval
+        }
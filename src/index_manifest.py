@@ -0,0 +1,134 @@
+"""
+Artımlı (incremental) index güncellemeleri için içerik manifest'i.
+
+Her dokümanın içerik hash'i ve index'teki id'si saklanır. İşlenmiş
+veri değiştiğinde yeni hash'ler manifest ile karşılaştırılır:
+- manifest'te olmayan hash'ler: yeni veya değişmiş doküman (encode edilir)
+- yeni veride olmayan hash'ler: silinmiş veya değişmiş doküman (index'ten çıkarılır)
+Değişmeyen dokümanlar yeniden encode edilmez.
+"""
+
+import hashlib
+import json
+import os
+from collections import defaultdict
+
+
+def document_hash(doc):
+    """Dokümanın içerik hash'i (alan sırasından bağımsız)."""
+    payload = json.dumps(dict(doc), ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def documents_fingerprint(documents):
+    """Doküman listesinin tamamının hash'i (kayıtlı embedding'ler güncel mi?)."""
+    digest = hashlib.sha1()
+    for doc in documents:
+        digest.update(document_hash(doc).encode('ascii'))
+    return digest.hexdigest()
+
+
+class IndexManifest:
+    """Vector store ile birlikte kaydedilen hash -> id eşlemesi."""
+
+    def __init__(self, model_name, entries=None):
+        """
+        Args:
+            model_name: Embedding'leri üreten model (değişirse tam yeniden oluşturma gerekir)
+            entries: hash -> id listesi (aynı içerikli dokümanlar birden fazla id alabilir)
+        """
+        self.model_name = model_name
+        self.entries = {h: list(ids) for h, ids in (entries or {}).items()}
+
+    @classmethod
+    def from_documents(cls, model_name, documents, ids=None):
+        """
+        Dokümanlardan manifest oluşturur.
+
+        Args:
+            model_name: Embedding modeli
+            documents: Index'e eklenmiş dokümanlar
+            ids: Dokümanların index id'leri (None = sıra numarası)
+        """
+        entries = defaultdict(list)
+        ids = range(len(documents)) if ids is None else ids
+        for doc, doc_id in zip(documents, ids):
+            entries[document_hash(doc)].append(int(doc_id))
+        return cls(model_name, entries)
+
+    @staticmethod
+    def path_for(vector_store_path):
+        return f"{vector_store_path}.manifest.json"
+
+    @classmethod
+    def load(cls, vector_store_path):
+        """
+        Vector store'un manifest'ini yükler.
+
+        Returns:
+            IndexManifest veya None (manifest yoksa)
+        """
+        path = cls.path_for(vector_store_path)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['model_name'], data['entries'])
+
+    def save(self, vector_store_path):
+        """Manifest'i vector store'un yanına atomik olarak kaydeder."""
+        path = self.path_for(vector_store_path)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'model_name': self.model_name, 'entries': self.entries}, f)
+        os.replace(tmp_path, path)
+
+    def __len__(self):
+        return sum(len(ids) for ids in self.entries.values())
+
+    def diff(self, documents):
+        """
+        Yeni doküman listesini manifest ile karşılaştırır.
+
+        Args:
+            documents: Güncel doküman listesi
+
+        Returns:
+            tuple: (eklenecek dokümanlar, eklenecek dokümanların hash'leri,
+                    silinecek id'ler)
+        """
+        remaining = {h: list(ids) for h, ids in self.entries.items()}
+        added_docs = []
+        added_hashes = []
+
+        for doc in documents:
+            h = document_hash(doc)
+            ids = remaining.get(h)
+            if ids:
+                # Değişmemiş doküman: mevcut id'lerden birini kullan
+                ids.pop()
+            else:
+                added_docs.append(doc)
+                added_hashes.append(h)
+
+        removed_ids = sorted(i for ids in remaining.values() for i in ids)
+        return added_docs, added_hashes, removed_ids
+
+    def apply(self, added_hashes, added_ids, removed_ids):
+        """
+        Güncelleme sonrası manifest'i günceller.
+
+        Args:
+            added_hashes: Eklenen dokümanların hash'leri
+            added_ids: Eklenen dokümanlara verilen id'ler
+            removed_ids: Index'ten çıkarılan id'ler
+        """
+        removed = set(removed_ids)
+        entries = {}
+        for h, ids in self.entries.items():
+            kept = [i for i in ids if i not in removed]
+            if kept:
+                entries[h] = kept
+        for h, doc_id in zip(added_hashes, added_ids):
+            entries.setdefault(h, []).append(int(doc_id))
+        self.entries = entries
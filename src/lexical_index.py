@@ -0,0 +1,128 @@
+"""
+Kelime (madde başı) index'i.
+
+Chatbot'un kelime eşleştirme adımı için sözlük bir kere taranır ve:
+1. Tam eşleşme için kelime -> doküman listesi hash map'i
+2. Kısmi eşleşme için trigram (3-gram) ve kısa terimler için bigram
+   (2-gram) posting listeleri
+oluşturulur. Böylece her sorguda tüm sözlüğü dolaşmaya gerek kalmaz.
+"""
+
+import heapq
+from collections import defaultdict
+
+from document_store import field_values
+from text_utils import turkish_lower
+
+
+class HeadwordIndex:
+    """Madde başları üzerinde tam ve kısmi eşleşme index'i."""
+
+    NGRAM = 3
+
+    def __init__(self, documents):
+        """
+        Args:
+            documents: Doküman listesi veya DocumentStore
+                       (sadece 'kelime' alanı okunur)
+        """
+        # kelime (küçük harf) -> doküman index'leri (artan sırada)
+        self.exact = defaultdict(list)
+        # trigram ve bigram -> farklı kelimelerin listesi
+        # (bigram'lar NGRAM'dan kısa terimler için)
+        self.postings = defaultdict(set)
+        # Tek harfli kelimeler (bigram'ı da yok, ayrıca kontrol edilir)
+        self.short_words = set()
+
+        for i, kelime in enumerate(field_values(documents, 'kelime', '')):
+            # Artımlı güncellemede silinen dokümanlar boş kalır
+            if not kelime:
+                continue
+            self.exact[turkish_lower(kelime)].append(i)
+
+        for word in self.exact:
+            if len(word) < 2:
+                self.short_words.add(word)
+            for gram in self._ngrams(word) | self._ngrams(word, 2):
+                self.postings[gram].add(word)
+
+        # Posting'leri sabit hale getir
+        self.exact = dict(self.exact)
+        self.postings = {gram: frozenset(words) for gram, words in self.postings.items()}
+        self.max_word_len = max((len(w) for w in self.exact), default=0)
+
+    @classmethod
+    def _ngrams(cls, word, n=None):
+        """Kelimenin benzersiz n-gram'larını döndürür (varsayılan n = NGRAM)."""
+        n = n or cls.NGRAM
+        return {word[i:i + n] for i in range(len(word) - n + 1)}
+
+    def _words_containing(self, term):
+        """term'i içeren tüm kelimeleri bulur (term in kelime)."""
+        if len(term) == 2:
+            # İki harfli terimin posting'i doğrudan bigram listesidir
+            return set(self.postings.get(term, ()))
+        if len(term) < 2:
+            # Tek harf: o harfi içeren bigram'ların birleşimi + tek harfli kelimeler
+            words = {w for w in self.short_words if term in w}
+            for gram, gram_words in self.postings.items():
+                if len(gram) == 2 and term in gram:
+                    words |= gram_words
+            return words
+
+        grams = self._ngrams(term)
+
+        # En kısa posting listesinden başlayarak kesişim al
+        lists = sorted((self.postings.get(g, frozenset()) for g in grams), key=len)
+        candidates = lists[0]
+        for other in lists[1:]:
+            if not candidates:
+                break
+            candidates = candidates & other
+
+        # Trigram'lar aynı sırada olmayabilir, gerçek alt dize kontrolü yap
+        return {w for w in candidates if term in w}
+
+    def _words_contained_in(self, term):
+        """term'in alt dizesi olan kelimeleri bulur (kelime in term)."""
+        found = set()
+        max_len = min(len(term), self.max_word_len)
+        for start in range(len(term)):
+            for end in range(start + 1, min(len(term), start + max_len) + 1):
+                piece = term[start:end]
+                if piece in self.exact:
+                    found.add(piece)
+        return found
+
+    def lookup(self, term, limit=None, partial=True):
+        """
+        Terimle eşleşen dokümanları bulur.
+
+        Sonuç sırası eski lineer tarama ile aynıdır: önce tam eşleşmeler,
+        sonra kısmi eşleşmeler, her grup kendi içinde doküman sırasında.
+
+        Args:
+            term: Aranacak terim (Türkçe küçük harf, bkz. text_utils.turkish_lower)
+            limit: En fazla kaç doküman döndürülecek (None = hepsi)
+            partial: False ise sadece tam eşleşme aranır
+
+        Returns:
+            tuple: (tam eşleşen index'ler, kısmi eşleşen index'ler)
+        """
+        exact_ids = self.exact.get(term, [])
+        if limit is not None and len(exact_ids) >= limit:
+            return exact_ids[:limit], []
+        if not partial:
+            return list(exact_ids), []
+
+        words = self._words_containing(term) | self._words_contained_in(term)
+        words.discard(term)
+
+        ids = (i for w in words for i in self.exact[w])
+        if limit is not None:
+            # Tümünü sıralamadan sadece ilk (limit - tam eşleşme) id
+            partial_ids = heapq.nsmallest(limit - len(exact_ids), ids)
+        else:
+            partial_ids = sorted(ids)
+
+        return list(exact_ids), partial_ids
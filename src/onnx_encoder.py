@@ -0,0 +1,146 @@
+"""
+ONNX Runtime embedding backend.
+
+sentence-transformers modelinin ONNX'e aktarılmış (isteğe bağlı int8
+quantize edilmiş) halini torch olmadan çalıştırır. Tokenizer için
+HuggingFace `tokenizers`, model için `onnxruntime` kullanılır;
+pooling (ortalama) numpy ile yapılır. SentenceTransformer.encode ile
+aynı arayüzü sunduğu için EmbeddingModel içinde doğrudan kullanılabilir.
+
+Model klasörü `python onnx_export.py export` ile oluşturulur.
+"""
+
+import json
+import os
+
+import numpy as np
+
+
+class OnnxSentenceEncoder:
+    """ONNX Runtime ile çalışan SentenceTransformer benzeri encoder."""
+
+    def __init__(self, model_dir, file_name="onnx/model.onnx", num_threads=None):
+        """
+        Args:
+            model_dir: Export edilmiş model klasörü (tokenizer.json, modules.json, onnx/)
+            file_name: Klasör içindeki ONNX dosyası (ör. onnx/model_qint8.onnx)
+            num_threads: ONNX Runtime thread sayısı (None = OMP_NUM_THREADS veya varsayılan)
+        """
+        from tokenizers import Tokenizer
+
+        self.model_dir = model_dir
+        self.file_name = file_name
+        self.num_threads = num_threads
+
+        model_path = os.path.join(model_dir, file_name)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"ONNX modeli bulunamadı: {model_path} (önce onnx_export.py export çalıştırın)")
+
+        config = self._read_json('sentence_bert_config.json', {})
+        self.max_seq_length = config.get('max_seq_length', 128)
+        self.normalize, pooling = self._read_modules()
+        if not pooling.get('pooling_mode_mean_tokens', True):
+            raise ValueError("Sadece ortalama (mean) pooling destekleniyor!")
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, 'tokenizer.json'))
+        self.tokenizer.enable_truncation(max_length=self.max_seq_length)
+        self.tokenizer.enable_padding()
+
+        self._create_session()
+
+    def _read_json(self, name, default):
+        path = os.path.join(self.model_dir, name)
+        if not os.path.exists(path):
+            return default
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _read_modules(self):
+        """modules.json'dan Normalize katmanı ve pooling ayarlarını okur."""
+        normalize = False
+        pooling = {}
+        for module in self._read_json('modules.json', []):
+            if module['type'].endswith('Normalize'):
+                normalize = True
+            elif module['type'].endswith('Pooling'):
+                pooling = self._read_json(os.path.join(module['path'], 'config.json'), {})
+        return normalize, pooling
+
+    def _create_session(self):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        num_threads = self.num_threads or int(os.getenv('OMP_NUM_THREADS', '0'))
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+            options.inter_op_num_threads = 1
+
+        self.session = ort.InferenceSession(
+            os.path.join(self.model_dir, self.file_name),
+            sess_options=options,
+            providers=['CPUExecutionProvider']
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.dimension = self.session.get_outputs()[0].shape[-1]
+        if not isinstance(self.dimension, int):
+            # Boyut dinamik tanımlanmışsa örnek bir çıktıdan al
+            self.dimension = self._encode_batch(["a"]).shape[1]
+
+    def after_fork(self):
+        """Fork sonrası child process'te çağrılır: ONNX Runtime oturumu yeniden oluşturulur."""
+        self._create_session()
+
+    def get_sentence_embedding_dimension(self):
+        return self.dimension
+
+    def _encode_batch(self, texts):
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype='int64')
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype='int64')
+
+        feeds = {'input_ids': input_ids, 'attention_mask': attention_mask}
+        if 'token_type_ids' in self.input_names:
+            feeds['token_type_ids'] = np.array([e.type_ids for e in encodings], dtype='int64')
+
+        token_embeddings = self.session.run(None, feeds)[0]
+
+        # Ortalama pooling (padding token'ları hariç)
+        mask = attention_mask[..., None].astype('float32')
+        summed = (token_embeddings * mask).sum(axis=1)
+        embeddings = summed / np.clip(mask.sum(axis=1), 1e-9, None)
+
+        if self.normalize:
+            embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings.astype('float32')
+
+    def encode(self, sentences, batch_size=32, show_progress_bar=False, convert_to_numpy=True, **kwargs):
+        """
+        SentenceTransformer.encode ile aynı çıktı.
+
+        Args:
+            sentences: Metin veya metin listesi
+            batch_size: Aynı anda işlenecek metin sayısı
+            show_progress_bar: İlerleme çubuğu göster
+
+        Returns:
+            numpy array: (embedding_dim,) veya (n_texts, embedding_dim)
+        """
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.zeros((0, self.dimension), dtype='float32')
+
+        # Benzer uzunluktaki metinleri aynı batch'e koy (daha az padding)
+        order = np.argsort([-len(t) for t in texts], kind='stable')
+        batches = range(0, len(texts), batch_size)
+        if show_progress_bar:
+            from tqdm import tqdm
+            batches = tqdm(batches, desc="Batches")
+
+        embeddings = np.empty((len(texts), self.dimension), dtype='float32')
+        for start in batches:
+            idx = order[start:start + batch_size]
+            embeddings[idx] = self._encode_batch([texts[i] for i in idx])
+
+        return embeddings[0] if single else embeddings
@@ -0,0 +1,236 @@
+"""
+Türkçe sorgu çözümleyici (query analyzer).
+
+Sorgudaki kelimeleri Türkçe kurallarına göre küçük harfe çevirir, soru
+kalıplarını ("ne demek", "nedir") atar ve çekimli kelimeleri sözlükteki
+madde başlarına indirger ("kitabın" -> "kitap", "sevgiyi" -> "sevgi").
+
+Çözümleyici her index sürümü için bir kere oluşturulur:
+- madde başları (ve ünsüz yumuşaması / ünlü düşmesi biçimleri) bir önek
+  ağacında (trie),
+- geçerli ek dizileri ("ın", "ları", "ndan", ...) ters çevrilmiş olarak
+  ikinci bir trie'de tutulur.
+Her kelime için ek trie'si sondan, madde başı trie'si baştan bir kez
+yürünür; sorgu başına iş sorgu uzunluğuyla orantılıdır.
+"""
+
+import re
+import unicodedata
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+from functools import lru_cache
+from itertools import product
+
+from text_utils import turkish_lower
+
+
+# Sorgudan çıkarılacak soru kalıpları ("ne demek", "nedir", "anlamı" vb.)
+STOP_WORDS = ['ne', 'nedir', 'demek', 'anlamı', 'anlam', 'kelimesinin',
+              'kelimesi', 'nedir', 'açıklar', 'mısın', 'misin', 'anlamına',
+              'hakkında', 'için', 'nasıl', 'bir', 'bu', 've']
+
+# Kesme işaretinden sonraki ek atılır ("İstanbul'un" -> "istanbul")
+_TOKEN = re.compile(r"(\w+)(?:['’]\w*)?")
+
+# Çekim ekleri: çoğul + iyelik + hal (+ ek-fiil). Ünlü uyumu kontrol
+# edilmez; ek dizisi sadece madde başı sınırını doğrulamak için kullanılır.
+_PLURAL = ['', 'lar', 'ler']
+_POSSESSIVE = ['', 'm', 'n', 'ım', 'im', 'um', 'üm', 'ın', 'in', 'un', 'ün', 'ı', 'i', 'u', 'ü',
+               'sı', 'si', 'su', 'sü', 'mız', 'miz', 'muz', 'müz', 'ımız', 'imiz', 'umuz', 'ümüz',
+               'nız', 'niz', 'nuz', 'nüz', 'ınız', 'iniz', 'unuz', 'ünüz', 'ları', 'leri']
+_CASE = ['', 'ı', 'i', 'u', 'ü', 'yı', 'yi', 'yu', 'yü', 'nı', 'ni', 'nu', 'nü',
+         'a', 'e', 'ya', 'ye', 'na', 'ne', 'da', 'de', 'ta', 'te', 'nda', 'nde',
+         'dan', 'den', 'tan', 'ten', 'ndan', 'nden', 'ın', 'in', 'un', 'ün',
+         'nın', 'nin', 'nun', 'nün', 'la', 'le', 'yla', 'yle', 'ca', 'ce', 'ça', 'çe',
+         'ki', 'daki', 'deki', 'taki', 'teki', 'ndaki', 'ndeki']
+_COPULA = ['', 'dır', 'dir', 'dur', 'dür', 'tır', 'tir', 'tur', 'tür']
+
+# Ünsüz yumuşaması: "kitap" -> "kitab-ı", "renk" -> "reng-i"
+_SOFTENING = {'p': 'b', 'ç': 'c', 't': 'd', 'k': 'ğ'}
+_VOWELS = set('aeıioöuü')
+# Ünlü düşmesi: "ağız" -> "ağz-ı", "burun" -> "burn-u"
+_DROPPABLE = set('ıiuü')
+
+MIN_STEM = 2
+# Bundan kısa terimler ("su", "at") sadece madde başı olarak aranır; kısmi
+# (alt dize) eşleşmesi anlamsız derecede çok kelime döndürür
+MIN_PARTIAL_TERM = 3
+
+
+class QueryTerm(namedtuple('QueryTerm', ['token', 'headword'])):
+    """Sorgu terimi: kelimenin kendisi ve bulunduysa madde başı."""
+
+    __slots__ = ()
+
+    @property
+    def key(self):
+        """Kelime index'inde aranacak anahtar."""
+        return self.headword or self.token
+
+
+class CompactTrie:
+    """
+    Diziler (array) üzerinde saklanan salt okunur trie.
+
+    Düğümler genişlik öncelikli sırada numaralanır; bir düğümün çocukları
+    ardışıktır ve etiketlerine göre sıralıdır, çocuk arama bisect ile yapılır.
+    Düğüm başına 16 byte yer tutar (iç içe dict'e göre çok daha az).
+    """
+
+    def __init__(self, items):
+        """
+        Args:
+            items: (anahtar, değer) çiftleri; değer negatif olmayan int
+        """
+        root = {}
+        for key, value in items:
+            node = root
+            for ch in key:
+                node = node.setdefault(ch, {})
+            node[None] = value
+
+        self.labels = array('I', [0])      # düğüme gelen kenarın karakteri
+        self.first_child = array('I')
+        self.child_count = array('I')
+        self.values = array('i')           # -1 = anahtar sonu değil
+
+        queue = [root]
+        for node in queue:
+            children = sorted((ord(ch), child) for ch, child in node.items() if ch is not None)
+            self.first_child.append(len(queue))
+            self.child_count.append(len(children))
+            self.values.append(node.get(None, -1))
+            for label, child in children:
+                self.labels.append(label)
+                queue.append(child)
+
+    def __len__(self):
+        return len(self.values)
+
+    def child(self, node, ch):
+        """Düğümün ch etiketli çocuğu (yoksa -1)."""
+        lo = self.first_child[node]
+        hi = lo + self.child_count[node]
+        label = ord(ch)
+        i = bisect_left(self.labels, label, lo, hi)
+        if i < hi and self.labels[i] == label:
+            return i
+        return -1
+
+    def walk(self, chars):
+        """
+        Karakterleri sırayla yürür, anahtar sonu olan her noktayı üretir.
+
+        Yields:
+            tuple: (okunan karakter sayısı, değer)
+        """
+        node = 0
+        if self.values[0] >= 0:
+            yield 0, self.values[0]
+        for depth, ch in enumerate(chars, 1):
+            node = self.child(node, ch)
+            if node < 0:
+                return
+            if self.values[node] >= 0:
+                yield depth, self.values[node]
+
+
+@lru_cache(maxsize=1)
+def suffix_trie():
+    """
+    Geçerli ek dizilerinin (boş dize dahil) ters çevrilmiş trie'si.
+    Madde başlarından bağımsızdır; tüm index sürümleri aynı trie'yi kullanır.
+    """
+    suffixes = {''.join(parts) for parts in product(_PLURAL, _POSSESSIVE, _CASE, _COPULA)}
+    return CompactTrie((suffix[::-1], 0) for suffix in suffixes)
+
+
+def _stem_variants(headword):
+    """Madde başının ek aldığında görülebilen biçimleri (ünsüz yumuşaması, ünlü düşmesi)."""
+    variants = []
+    last = headword[-1]
+    if len(headword) > 2 and last in _SOFTENING:
+        if headword.endswith('nk'):
+            variants.append(headword[:-1] + 'g')
+        else:
+            variants.append(headword[:-1] + _SOFTENING[last])
+    if (len(headword) > 3 and headword[-2] in _DROPPABLE
+            and last not in _VOWELS and headword[-3] not in _VOWELS
+            and any(ch in _VOWELS for ch in headword[:-3])):
+        variants.append(headword[:-2] + last)
+    return variants
+
+
+class QueryAnalyzer:
+    """Sorguyu madde başlarına çözümlenmiş terimlere ayırır."""
+
+    def __init__(self, headwords, stop_words=STOP_WORDS):
+        """
+        Args:
+            headwords: Madde başları (Türkçe küçük harf)
+            stop_words: Sorgudan atılacak kelimeler
+        """
+        self.headwords = [h for h in dict.fromkeys(headwords) if h]
+        self.stop_words = frozenset(stop_words)
+
+        items = {}
+        for i, headword in enumerate(self.headwords):
+            for variant in _stem_variants(headword):
+                items.setdefault(variant, i)
+        # Gerçek madde başları türetilmiş biçimlerin önüne geçer ("at" -> "ad" değil)
+        for i, headword in enumerate(self.headwords):
+            items[headword] = i
+        self.headword_trie = CompactTrie(items.items())
+
+        # Ekler ters çevrilir: kelimenin sonundan yürünerek ek sınırları bulunur
+        self.suffix_trie = suffix_trie()
+
+    def _split_points(self, token):
+        """Kelimenin, sonrası geçerli bir ek dizisi olan konumları."""
+        return {len(token) - depth for depth, _ in self.suffix_trie.walk(reversed(token))}
+
+    def resolve(self, token):
+        """
+        Kelimeyi madde başına indirger: sonrası geçerli ek olan en uzun madde başı öneki.
+
+        Args:
+            token: Küçük harfli kelime
+
+        Returns:
+            str veya None (madde başı bulunamazsa)
+        """
+        split_points = self._split_points(token)
+        best = None
+        for depth, value in self.headword_trie.walk(token):
+            if depth >= MIN_STEM and depth in split_points:
+                best = value
+        return self.headwords[best] if best is not None else None
+
+    def tokenize(self, query):
+        """Sorguyu Türkçe küçük harfli kelimelere ayırır, soru kalıplarını atar."""
+        text = unicodedata.normalize('NFC', turkish_lower(query))
+        return [t for t in _TOKEN.findall(text) if len(t) >= MIN_STEM and t not in self.stop_words]
+
+    def analyze(self, query):
+        """
+        Sorguyu terimlere ayırır.
+
+        Args:
+            query: Kullanıcı sorusu
+
+        Returns:
+            list: QueryTerm listesi (sorgudaki sırayla, tekrarsız)
+        """
+        terms = {}
+        for token in self.tokenize(query):
+            if token not in terms:
+                terms[token] = QueryTerm(token, self.resolve(token))
+        return list(terms.values())
+
+    def get_info(self):
+        return {
+            'headwords': len(self.headwords),
+            'trie_nodes': len(self.headword_trie),
+            'suffix_nodes': len(self.suffix_trie)
+        }
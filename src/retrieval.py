@@ -0,0 +1,200 @@
+"""
+Aşamalı (staged) retrieval pipeline'ı.
+
+Ucuz aşamalar (ör. kelime eşleştirme) önce çalışır, sonuç bulunursa
+pahalı aşamalar (ör. embedding + FAISS) hiç çalıştırılmaz.
+Sorgu embedding'i sadece bir aşama gerçekten ihtiyaç duyduğunda
+hesaplanır. Her istek için hangi aşamaların çalıştığı raporlanır.
+"""
+
+import threading
+
+
+class QueryContext:
+    """Bir sorgunun pipeline boyunca taşıdığı durum."""
+
+    def __init__(self, query, top_k, encoder, index=None):
+        """
+        Args:
+            query: Kullanıcı sorusu
+            top_k: Kaç doküman getirilecek
+            encoder: Metni embedding'e çeviren fonksiyon
+            index: Aşamaların kullanacağı index sürümü (istek boyunca sabit)
+        """
+        self.query = query
+        self.top_k = top_k
+        self.index = index
+        self._encoder = encoder
+        self._embedding = None
+        self.encoded = False
+        # Kelime aşamasının bulduğu madde başı tam eşleşmeleri (hibrit aşamada
+        # BM25 ve embedding sonuçlarıyla birleştirilir)
+        self.exact_ids = []
+        self.stages = []
+        self.answered_by = None
+
+    @property
+    def embedding(self):
+        """Sorgu embedding'i (ilk erişimde hesaplanır)."""
+        if not self.encoded:
+            self.set_embedding(self._encoder(self.query))
+        return self._embedding
+
+    @property
+    def computed_embedding(self):
+        """Hesaplandıysa sorgu embedding'i, değilse None (encode etmez)."""
+        return self._embedding if self.encoded else None
+
+    def set_embedding(self, embedding):
+        """Embedding'i dışarıdan (ör. toplu encode ile) atar."""
+        self._embedding = embedding
+        self.encoded = True
+
+    def trace(self):
+        """Bu istekte hangi aşamaların çalıştığını döndürür."""
+        return {
+            'stages': list(self.stages),
+            'answered_by': self.answered_by,
+            'encoded': self.encoded
+        }
+
+
+class RetrievalPipeline:
+    """Aşamaları sırayla çalıştırır, ilk sonuç veren aşamada durur."""
+
+    def __init__(self, stages, encoder):
+        """
+        Args:
+            stages: (isim, fonksiyon) veya (isim, fonksiyon, toplu_fonksiyon) listesi.
+                    Fonksiyon QueryContext alır, sonuç listesi döndürür
+                    (boş liste = sonraki aşamaya geç). Toplu fonksiyon
+                    QueryContext listesi alır, her biri için sonuç listesi döndürür.
+            encoder: Sorgu metnini embedding'e çeviren fonksiyon
+        """
+        self.stages = [(stage[0], stage[1], stage[2] if len(stage) > 2 else None) for stage in stages]
+        self.encoder = encoder
+
+        self._lock = threading.Lock()
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.stats = {
+            'requests': 0,
+            'encoder_calls': 0,
+            'stage_runs': {name: 0 for name, _, _ in self.stages},
+            'answered_by': {name: 0 for name, _, _ in self.stages}
+        }
+
+    def run(self, query, top_k=5, index=None):
+        """
+        Pipeline'ı bir sorgu için çalıştırır.
+
+        Args:
+            query: Kullanıcı sorusu
+            top_k: Kaç doküman getirilecek
+            index: Aşamalara QueryContext.index olarak iletilir
+
+        Returns:
+            tuple: (sonuçlar, trace)
+        """
+        results, ctx = self.run_context(query, top_k=top_k, index=index)
+        return results, ctx.trace()
+
+    def run_context(self, query, top_k=5, index=None):
+        """
+        run() ile aynı, trace yerine QueryContext'i döndürür
+        (ör. hesaplanmış sorgu embedding'ini yeniden kullanmak için).
+
+        Returns:
+            tuple: (sonuçlar, QueryContext)
+        """
+        ctx = QueryContext(query, top_k, self.encoder, index=index)
+        results = []
+
+        for name, stage, _ in self.stages:
+            ctx.stages.append(name)
+            results = stage(ctx)
+            if results:
+                ctx.answered_by = name
+                break
+
+        self._record(ctx)
+        return results, ctx
+
+    def run_batch(self, queries, top_k=5, index=None):
+        """
+        Pipeline'ı birden fazla sorgu için çalıştırır.
+
+        Her aşama sadece önceki aşamalarda cevaplanmamış sorgular için
+        çalışır. Toplu fonksiyonu olan aşamalar (ör. embedding araması)
+        tüm bekleyen sorguları tek seferde işler.
+
+        Args:
+            queries: Kullanıcı soruları
+            top_k: Sorgu başına kaç doküman getirilecek
+            index: Aşamalara QueryContext.index olarak iletilir
+
+        Returns:
+            list: Her sorgu için (sonuçlar, trace)
+        """
+        return [(results, ctx.trace()) for results, ctx in self.run_batch_contexts(queries, top_k=top_k, index=index)]
+
+    def run_batch_contexts(self, queries, top_k=5, index=None):
+        """
+        run_batch() ile aynı, trace yerine QueryContext'leri döndürür.
+
+        Returns:
+            list: Her sorgu için (sonuçlar, QueryContext)
+        """
+        contexts = [QueryContext(query, top_k, self.encoder, index=index) for query in queries]
+        results = [[] for _ in contexts]
+
+        for name, stage, batch_stage in self.stages:
+            pending = [i for i, ctx in enumerate(contexts) if ctx.answered_by is None]
+            if not pending:
+                break
+
+            for i in pending:
+                contexts[i].stages.append(name)
+
+            if batch_stage is not None:
+                stage_results = batch_stage([contexts[i] for i in pending])
+            else:
+                stage_results = [stage(contexts[i]) for i in pending]
+
+            for i, stage_result in zip(pending, stage_results):
+                results[i] = stage_result
+                if stage_result:
+                    contexts[i].answered_by = name
+
+        for ctx in contexts:
+            self._record(ctx)
+        return list(zip(results, contexts))
+
+    def _record(self, ctx):
+        """İstek istatistiklerini günceller."""
+        with self._lock:
+            self.stats['requests'] += 1
+            if ctx.encoded:
+                self.stats['encoder_calls'] += 1
+            for name in ctx.stages:
+                self.stats['stage_runs'][name] += 1
+            if ctx.answered_by:
+                self.stats['answered_by'][ctx.answered_by] += 1
+
+    def after_fork(self):
+        """Fork sonrası child process'te çağrılır: kilit ve sayaçlar sıfırlanır."""
+        self._lock = threading.Lock()
+        self._reset_stats()
+
+    def get_stats(self):
+        """Toplam istatistikleri döndürür (atlanan encoder çağrıları dahil)."""
+        with self._lock:
+            stats = {
+                'requests': self.stats['requests'],
+                'encoder_calls': self.stats['encoder_calls'],
+                'stage_runs': dict(self.stats['stage_runs']),
+                'answered_by': dict(self.stats['answered_by'])
+            }
+        stats['encoder_calls_saved'] = stats['requests'] - stats['encoder_calls']
+        return stats
@@ -0,0 +1,52 @@
+"""
+Process / thread ayarları.
+
+Birden fazla worker process aynı makinede çalışırken her birinin
+torch ve FAISS (OpenMP) thread havuzu tüm çekirdekleri kullanmaya
+çalışırsa çekirdekler aşırı paylaşılır (oversubscription) ve toplam
+throughput düşer. Bu modül worker başına thread sınırını ayarlar.
+"""
+
+import os
+import sys
+
+
+THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS')
+
+
+def threads_per_worker(workers, cpu_count=None):
+    """
+    Worker başına düşen thread sayısı.
+
+    Args:
+        workers: Worker process sayısı
+        cpu_count: Çekirdek sayısı (None = os.cpu_count())
+
+    Returns:
+        int: En az 1
+    """
+    cpu_count = cpu_count or os.cpu_count() or 1
+    return max(1, cpu_count // max(1, workers))
+
+
+def limit_threads(n_threads):
+    """
+    torch, FAISS ve BLAS thread sayısını sınırlar.
+
+    Environment variable'lar sadece kütüphaneler yüklenmeden önce etkilidir;
+    zaten yüklenmiş torch ve faiss için ayrıca çalışma anında ayarlanır.
+
+    Args:
+        n_threads: Process başına thread sayısı
+    """
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(n_threads)
+    # HuggingFace tokenizers fork sonrası kendi thread'leriyle kilitlenebilir
+    os.environ['TOKENIZERS_PARALLELISM'] = 'false'
+
+    if 'torch' in sys.modules:
+        torch = sys.modules['torch']
+        torch.set_num_threads(n_threads)
+
+    if 'faiss' in sys.modules:
+        sys.modules['faiss'].omp_set_num_threads(n_threads)
@@ -0,0 +1,207 @@
+"""
+Paralel ve kaldığı yerden devam edebilen (resumable) corpus embedding.
+
+Dokümanlar sabit boyutlu parçalara (shard) bölünür, her parça bir
+process havuzunda encode edilip bitince diske .npy olarak yazılır.
+İşlem yarıda kesilirse yeniden çalıştırıldığında sadece eksik
+parçalar encode edilir. Son matris parçalardan diskteki bir memmap'e
+kopyalanarak oluşturulur; tüm embedding'ler RAM'de iki kez tutulmaz.
+"""
+
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing
+
+import numpy as np
+
+from runtime import limit_threads, threads_per_worker
+
+
+# Worker process'teki embedding modeli (her process bir kere yükler)
+_worker_embedder = None
+
+
+def _init_worker(model_name, backend, n_threads):
+    """Worker process başlangıcı: thread sınırı, sonra model yükleme."""
+    global _worker_embedder
+    # torch import edilmeden önce ayarlanmalı
+    limit_threads(n_threads)
+    from embeddings import EmbeddingModel
+    _worker_embedder = EmbeddingModel(model_name, backend=backend)
+
+
+def _encode_shard(shard_path, texts, batch_size):
+    """Bir parçayı encode edip atomik olarak diske yazar."""
+    embeddings = _worker_embedder.encode_queries(texts, batch_size=batch_size, use_cache=False)
+    _save_atomic(shard_path, np.asarray(embeddings, dtype='float32'))
+    return shard_path, len(texts)
+
+
+def _save_atomic(path, array):
+    """Yarım yazılmış dosya kalmaması için önce geçici dosyaya yazar."""
+    tmp_path = path + '.tmp.npy'
+    np.save(tmp_path, array)
+    os.replace(tmp_path, path)
+
+
+class ShardedEmbedder:
+    """Corpus'u parçalar halinde, paralel ve devam ettirilebilir şekilde encode eder."""
+
+    def __init__(self, shard_dir, model_name="emrecan/bert-base-turkish-cased-mean-nli-stsb-tr",
+                 backend='torch', shard_size=2048, workers=None, threads_per_process=None,
+                 batch_size=32, dtype='float32'):
+        """
+        Args:
+            shard_dir: Parça dosyalarının yazılacağı klasör
+            model_name: Embedding modeli
+            backend: 'torch' veya 'onnx'
+            shard_size: Parça başına metin sayısı
+            workers: Process sayısı (None = çekirdek sayısı, en fazla 4; her process modeli yükler)
+            threads_per_process: Process başına torch/BLAS thread'i (None = çekirdek / workers)
+            batch_size: Model batch boyutu
+            dtype: Birleştirilmiş matrisin tipi ('float32' veya 'float16')
+        """
+        cpu_count = os.cpu_count() or 1
+        self.shard_dir = shard_dir
+        self.model_name = model_name
+        self.backend = backend
+        self.shard_size = shard_size
+        self.workers = workers or min(4, cpu_count)
+        self.threads_per_process = threads_per_process or threads_per_worker(self.workers, cpu_count)
+        self.batch_size = batch_size
+        self.dtype = dtype
+
+    def _fingerprint(self, texts):
+        """Metinler ve ayarlar değişirse eski parçalar kullanılmaz."""
+        digest = hashlib.sha1()
+        digest.update(f"{self.model_name}|{self.backend}|{self.shard_size}|{len(texts)}".encode('utf-8'))
+        for text in texts:
+            digest.update(text.encode('utf-8'))
+            digest.update(b'\x00')
+        return digest.hexdigest()
+
+    def _shard_path(self, index):
+        return os.path.join(self.shard_dir, f"shard_{index:05d}.npy")
+
+    def _prepare_dir(self, fingerprint):
+        """Parça klasörünü hazırlar, farklı bir çalıştırmadan kalan parçaları siler."""
+        os.makedirs(self.shard_dir, exist_ok=True)
+        manifest_path = os.path.join(self.shard_dir, 'shards.json')
+
+        if os.path.exists(manifest_path):
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('fingerprint') == fingerprint:
+                return
+            print("Metinler veya ayarlar değişmiş, eski parçalar siliniyor...")
+
+        for name in os.listdir(self.shard_dir):
+            if name.startswith('shard_'):
+                os.remove(os.path.join(self.shard_dir, name))
+
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'fingerprint': fingerprint,
+                'model_name': self.model_name,
+                'backend': self.backend,
+                'shard_size': self.shard_size
+            }, f, indent=2)
+
+    def encode(self, texts, output_path):
+        """
+        Metinleri encode eder ve tek bir .npy dosyasında birleştirir.
+
+        Args:
+            texts: Metin listesi
+            output_path: Birleştirilmiş embedding matrisinin yolu (.npy)
+
+        Returns:
+            numpy memmap: (n_texts, embedding_dim), salt okunur
+        """
+        if not texts:
+            raise ValueError("Encode edilecek metin yok!")
+
+        fingerprint = self._fingerprint(texts)
+        self._prepare_dir(fingerprint)
+
+        n_shards = (len(texts) + self.shard_size - 1) // self.shard_size
+        pending = [i for i in range(n_shards) if not os.path.exists(self._shard_path(i))]
+        done = n_shards - len(pending)
+
+        if done:
+            print(f"{done}/{n_shards} parça daha önce tamamlanmış, kalanlardan devam ediliyor")
+
+        if pending:
+            self._encode_pending(texts, pending, n_shards)
+
+        return self._assemble(n_shards, len(texts), output_path)
+
+    def _encode_pending(self, texts, pending, n_shards):
+        """Eksik parçaları process havuzunda encode eder."""
+        print(f"{len(pending)} parça encode ediliyor "
+              f"({self.workers} process x {self.threads_per_process} thread, parça: {self.shard_size} metin)")
+
+        started = time.perf_counter()
+        completed = n_shards - len(pending)
+        encoded = 0
+
+        # spawn: fork edilmiş process'lerde torch/OpenMP kilitlenebilir
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self.model_name, self.backend, self.threads_per_process)
+        ) as executor:
+            futures = [
+                executor.submit(
+                    _encode_shard,
+                    self._shard_path(i),
+                    texts[i * self.shard_size:(i + 1) * self.shard_size],
+                    self.batch_size
+                )
+                for i in pending
+            ]
+
+            for future in as_completed(futures):
+                _, count = future.result()
+                completed += 1
+                encoded += count
+                elapsed = time.perf_counter() - started
+                print(f"  Parça {completed}/{n_shards} tamamlandı "
+                      f"({encoded / elapsed:.1f} metin/sn)")
+
+    def cleanup(self):
+        """Birleştirme sonrası parça dosyalarını siler."""
+        if not os.path.isdir(self.shard_dir):
+            return
+        for name in os.listdir(self.shard_dir):
+            if name.startswith('shard_') or name == 'shards.json':
+                os.remove(os.path.join(self.shard_dir, name))
+        if not os.listdir(self.shard_dir):
+            os.rmdir(self.shard_dir)
+
+    def _assemble(self, n_shards, n_texts, output_path):
+        """
+        Parçaları diskteki tek bir matrise kopyalar.
+
+        Hedef dosya memmap olarak açılır, parçalar da mmap ile okunur;
+        aynı anda RAM'de en fazla bir parça bulunur.
+        """
+        dim = np.load(self._shard_path(0), mmap_mode='r').shape[1]
+
+        tmp_path = output_path + '.tmp.npy'
+        out = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=self.dtype, shape=(n_texts, dim))
+        for i in range(n_shards):
+            shard = np.load(self._shard_path(i), mmap_mode='r')
+            start = i * self.shard_size
+            out[start:start + len(shard)] = shard
+        out.flush()
+        del out
+        os.replace(tmp_path, output_path)
+
+        print(f"Embedding matrisi birleştirildi: {output_path} ({n_texts} x {dim})")
+        return np.load(output_path, mmap_mode='r')
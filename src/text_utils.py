@@ -0,0 +1,47 @@
+"""
+Türkçe metin yardımcıları.
+
+Python'un str.lower() fonksiyonu Türkçe'deki I/ı ve İ/i ayrımını
+bilmez ("I".lower() == "i", "İ".lower() == "i̇"). Bu modüldeki
+fonksiyonlar Türkçe kurallarına göre küçük harfe çevirir ve
+sorguları önbellek anahtarı olarak kullanılabilecek şekilde normalize eder.
+"""
+
+import re
+import unicodedata
+
+
+_TURKISH_UPPER_MAP = str.maketrans({'I': 'ı', 'İ': 'i'})
+_WHITESPACE = re.compile(r'\s+')
+
+
+def turkish_lower(text):
+    """
+    Türkçe kurallarına göre küçük harfe çevirir.
+
+    Args:
+        text: Metin
+
+    Returns:
+        str: Küçük harfli metin ("IŞIK" -> "ışık", "İSTANBUL" -> "istanbul")
+    """
+    return text.translate(_TURKISH_UPPER_MAP).lower()
+
+
+def normalize_query(text):
+    """
+    Sorguyu karşılaştırma için normalize eder.
+
+    Türkçe küçük harf, noktalama işaretlerini boşluğa çevirme ve
+    boşlukları tekleme yapar. "Kitap ne demek?" ile "kitap  ne demek"
+    aynı anahtarı üretir.
+
+    Args:
+        text: Sorgu metni
+
+    Returns:
+        str: Normalize edilmiş sorgu
+    """
+    text = unicodedata.normalize('NFC', turkish_lower(text))
+    text = ''.join(' ' if unicodedata.category(ch).startswith('P') else ch for ch in text)
+    return _WHITESPACE.sub(' ', text).strip()
@@ -9,29 +9,131 @@ import faiss
 import numpy as np
 import pickle
 import os
+import time
+import uuid
 from typing import List, Tuple
 
+from document_store import DocumentStore
+from bm25_index import BM25Index
+
+# Index'i RAM'e kopyalamadan mmap ile açma bayrağı
+# (IO_FLAG_MMAP_IFC eski FAISS sürümlerinde yok)
+MMAP_FLAGS = getattr(faiss, 'IO_FLAG_MMAP_IFC', faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
+
+def recall_at_k(found_ids, true_ids):
+    """
+    Yaklaşık arama sonuçlarının doğruluğunu ölçer.
+
+    Args:
+        found_ids: Yaklaşık index'in döndürdüğü id'ler (n_queries, k)
+        true_ids: Kesin (flat) aramanın döndürdüğü id'ler (n_queries, k)
+
+    Returns:
+        float: Gerçek top-k sonuçlarından bulunanların oranı (0-1)
+    """
+    hits = 0
+    total = 0
+    for found, truth in zip(found_ids, true_ids):
+        truth = set(int(i) for i in truth if i >= 0)
+        hits += len(truth.intersection(int(i) for i in found))
+        total += len(truth)
+    return hits / total if total else 1.0
+
 
 class FAISSVectorStore:
     """FAISS tabanlı vektör veritabanı."""
 
-    def __init__(self, embedding_dim=768):
+    # Desteklenen mesafe metrikleri
+    # l2: Euclidean mesafe, skor = 1 / (1 + mesafe)
+    # cosine: Normalize edilmiş vektörlerde iç çarpım, skor = kosinüs benzerliği (-1, 1)
+    METRICS = ('l2', 'cosine')
+
+    # Metriğe göre önerilen minimum skor eşikleri
+    DEFAULT_MIN_SCORES = {
+        'l2': 0.001,
+        'cosine': 0.25
+    }
+
+    # Desteklenen index tipleri
+    # flat: Kaba kuvvet (brute-force), tam doğru sonuç
+    # hnsw: Graf tabanlı yaklaşık arama, eğitim gerektirmez
+    # ivf_flat: Vektörler kümelere bölünür, sadece yakın kümeler taranır
+    # ivf_pq: IVF + product quantization (sıkıştırılmış vektörler)
+    # sq8: Scalar quantization, boyut başına 1 byte (4x küçük)
+    # pq: Product quantization, vektör başına pq_m byte
+    # opq: PQ öncesi öğrenilmiş rotasyon (OPQ), aynı boyutta daha iyi recall
+    INDEX_TYPES = ('flat', 'hnsw', 'ivf_flat', 'ivf_pq', 'sq8', 'pq', 'opq')
+
+    # Vektörleri sıkıştırarak saklayan (skorları yaklaşık olan) index tipleri
+    COMPRESSED_TYPES = ('ivf_pq', 'sq8', 'pq', 'opq')
+
+    # Index parametrelerinin varsayılan değerleri
+    DEFAULT_INDEX_PARAMS = {
+        'nlist': None,          # IVF küme sayısı (None = 4 * sqrt(N))
+        'pq_m': 64,             # PQ alt vektör sayısı (embedding_dim'i bölmeli)
+        'pq_nbits': 8,          # PQ alt vektör başına bit
+        'hnsw_m': 32,           # HNSW düğüm başına bağlantı sayısı
+        'ef_construction': 200, # HNSW oluşturma derinliği
+        'nprobe': 16,           # IVF: sorgu başına taranan küme sayısı
+        'ef_search': 64,        # HNSW: sorgu sırasındaki arama derinliği
+        'max_train_size': 100000,
+        'rerank_factor': 0,     # >0: top_k * rerank_factor aday orijinal vektörlerle yeniden sıralanır
+        'min_recall': None,     # Recall bütçesi: oluşturma sırasında parametreler buna göre ayarlanır
+        'recall_sample': 200    # Recall tahmini için kullanılacak sorgu sayısı
+    }
+
+    def __init__(self, embedding_dim=768, metric='l2', index_type='flat', index_params=None, bm25_params=None):
         """
         Args:
             embedding_dim: Embedding vektörlerinin boyutu
+            metric: Mesafe metriği ('l2' veya 'cosine')
+            index_type: Index tipi ('flat', 'hnsw', 'ivf_flat', 'ivf_pq', 'sq8', 'pq', 'opq')
+            index_params: DEFAULT_INDEX_PARAMS üzerine yazılacak parametreler
+            bm25_params: Kayıtta yanına yazılan BM25 index'inin ayarları
+                         ({'field': 'text', 'use_stem': False})
         """
+        if metric not in self.METRICS:
+            raise ValueError(f"Geçersiz metrik: {metric} (desteklenenler: {', '.join(self.METRICS)})")
+        if index_type not in self.INDEX_TYPES:
+            raise ValueError(f"Geçersiz index tipi: {index_type} (desteklenenler: {', '.join(self.INDEX_TYPES)})")
+
         self.embedding_dim = embedding_dim
+        self.metric = metric
+        self.index_type = index_type
+        self.index_params = {**self.DEFAULT_INDEX_PARAMS, **(index_params or {})}
+        self.bm25_params = {'field': 'text', 'use_stem': False, **(bm25_params or {})}
         self.index = None
+        # Yeniden sıralama için orijinal vektörler (yüklemede diskten mmap edilir)
+        self.vectors = None
         self.documents = []
         self.is_trained = False
-
-    def create_index(self, embeddings, documents):
+        # mmap ile yüklenen index salt okunurdur (update() desteklenmez)
+        self.mmapped = False
+        # Kayıtta yazılan BM25 index'i; update() ile artımlı güncellenir,
+        # yoksa save() dokümanlardan oluşturur
+        self.bm25_index = None
+        self.loaded_path = None
+        # Sürüm bilgisi: her kayıtta yeni sürüm; id_epoch sadece tam yeniden
+        # oluşturmada değişir (artımlı güncellemede doküman id'leri korunur)
+        self.version = None
+        self.built_at = None
+        self.id_epoch = None
+
+    @staticmethod
+    def _new_version():
+        return time.strftime('%Y%m%d-%H%M%S') + '-' + uuid.uuid4().hex[:6]
+
+    def create_index(self, embeddings, documents, recall_queries=None):
         """
         FAISS index'i oluşturur ve embedding'leri ekler.
 
         Args:
             embeddings: numpy array (n_docs, embedding_dim)
             documents: Doküman listesi
+            recall_queries: Recall bütçesi ayarında kullanılacak, index'te olmayan
+                            sorgu embedding'leri (None = index'teki vektörlerden
+                            örneklenir, bkz. tune_for_recall)
         """
         print(f"🔨 FAISS index oluşturuluyor...")
         print(f"Embedding shape: {embeddings.shape}")
@@ -41,28 +143,455 @@ class FAISSVectorStore:
             self.embedding_dim = embeddings.shape[1]
             print(f"⚙️  Embedding boyutu güncellendi: {self.embedding_dim}")
 
-        # L2 (Euclidean) mesafe kullanarak index oluştur
-        # IndexFlatL2: En basit ve en doğru index tipi
-        self.index = faiss.IndexFlatL2(self.embedding_dim)
-
         # Embedding'leri float32'ye çevir (FAISS zorunluluğu)
-        embeddings = embeddings.astype('float32')
+        embeddings = self._prepare_vectors(embeddings)
+
+        self.index = self._build_index(len(embeddings))
+
+        # IVF gibi index'ler önce verinin dağılımını öğrenmeli
+        if not self.index.is_trained:
+            self._train_index(embeddings)
 
-        # Index'e embedding'leri ekle
-        self.index.add(embeddings)
+        # Flat / PQ index'lerinde silme sonrası id'ler kaymasın diye id eşlemesi
+        # (IVF index'leri id'leri kendisi saklar)
+        if self.supports_updates() and not self.index_type.startswith('ivf'):
+            self.index = faiss.IndexIDMap(self.index)
+
+        # Index'e embedding'leri ekle (id = doküman sırası)
+        if self.supports_updates():
+            self.index.add_with_ids(embeddings, np.arange(len(embeddings), dtype='int64'))
+        else:
+            self.index.add(embeddings)
         self.documents = documents
         self.is_trained = True
+        self.mmapped = False
+        self.bm25_index = None
+        self.loaded_path = None
+        self.id_epoch = uuid.uuid4().hex[:12]
+        self._apply_search_params()
+
+        # Sıkıştırılmış index'lerde kesin yeniden sıralama için orijinalleri tut
+        # (recall bütçesi varsa yeniden sıralama ayar sırasında açılabilir)
+        min_recall = self.index_params['min_recall']
+        if self.index_type in self.COMPRESSED_TYPES and (self._uses_rerank() or min_recall is not None):
+            self.vectors = embeddings
+        else:
+            self.vectors = None
+
+        # Recall bütçesi verildiyse sorgu parametrelerini ona göre ayarla
+        if min_recall is not None:
+            self.tune_for_recall(embeddings, min_recall, queries=recall_queries)
+            if not self._uses_rerank():
+                self.vectors = None
 
         print(f"Index oluşturuldu!")
+        print(f"Metrik: {self.metric}")
+        print(f"Index tipi: {self.index_type}")
         print(f"Toplam doküman sayısı: {self.index.ntotal}")
 
-    def search(self, query_embedding, top_k=5):
+    def supports_updates(self):
+        """HNSW dışındaki index tipleri id ile ekleme / silmeyi destekler."""
+        return self.index_type != 'hnsw'
+
+    def update(self, embeddings, documents, remove_ids=()):
+        """
+        Index'i yeniden oluşturmadan doküman ekler ve siler.
+
+        Silinen dokümanların yeri doküman deposunda boş bırakılır (id'ler
+        değişmez); yeni dokümanlar sona eklenir. IVF/PQ index'lerinde
+        eğitim (küme merkezleri) güncellenmez; veri çok değiştiyse tam
+        yeniden oluşturma daha iyi sonuç verir.
+
+        Args:
+            embeddings: Yeni dokümanların embedding'leri (n_new, embedding_dim)
+            documents: Yeni dokümanlar
+            remove_ids: Index'ten çıkarılacak doküman id'leri
+
+        Returns:
+            numpy array: Yeni dokümanlara verilen id'ler
+        """
+        if not self.supports_updates():
+            raise ValueError(f"{self.index_type} index'i silmeyi desteklemiyor, tam yeniden oluşturma gerekli!")
+        if not self.is_trained:
+            raise ValueError("Index henüz oluşturulmamış!")
+        if not isinstance(self.index, faiss.IndexIDMap) and not self.index_type.startswith('ivf'):
+            raise ValueError("Index id eşlemesi olmadan kaydedilmiş, tam yeniden oluşturma gerekli!")
+        if self.mmapped:
+            # mmap edilmiş index üzerinde remove_ids / add_with_ids process'i çökertir
+            raise ValueError("Index mmap ile yüklenmiş (salt okunur), güncelleme için use_mmap=False ile yükleyin!")
+
+        # BM25 index'i değişiklikten önceki dokümanlarla eşleşmeli (kayıttan
+        # yüklenir, yoksa oluşturulur); sonra sadece değişen dokümanlar işlenir
+        if self.bm25_index is None:
+            self.bm25_index = self._load_bm25()
+
+        # mmap edilmiş depo salt okunur, güncelleme için listeye çevir
+        if not isinstance(self.documents, list):
+            self.documents = [dict(doc) for doc in self.documents]
+
+        remove_ids = np.asarray(sorted(set(int(i) for i in remove_ids)), dtype='int64')
+        if len(remove_ids):
+            removed = self.index.remove_ids(remove_ids)
+            for doc_id in remove_ids:
+                self.documents[doc_id] = {}
+            print(f"{removed} doküman index'ten çıkarıldı")
+
+        new_ids = np.arange(len(self.documents), len(self.documents) + len(documents), dtype='int64')
+        if len(documents):
+            vectors = self._prepare_vectors(embeddings)
+            self.index.add_with_ids(vectors, new_ids)
+            self.documents.extend(documents)
+            if self.vectors is not None:
+                self.vectors = np.concatenate([np.asarray(self.vectors, dtype='float32'), vectors])
+            print(f"{len(documents)} doküman index'e eklendi")
+
+        self.bm25_index.update(documents, new_ids, remove_ids)
+
+        return new_ids
+
+    def _load_bm25(self):
+        """
+        Yüklenen kaydın yanındaki BM25 index'i (sürümü ve ayarları eşleşiyorsa),
+        yoksa mevcut dokümanlardan oluşturulan index.
+        """
+        if self.loaded_path is not None:
+            index = BM25Index.load(BM25Index.path_for(self.loaded_path))
+            if (index is not None and index.version == self.version
+                    and index.field == self.bm25_params['field'] and index.use_stem == self.bm25_params['use_stem']):
+                return index
+        print("BM25 index'i dokümanlardan oluşturuluyor...")
+        return BM25Index.build(self.documents, **self.bm25_params, version=self.version)
+
+    def _faiss_metric(self):
+        """Metriğin FAISS karşılığı."""
+        if self.metric == 'cosine':
+            # Normalize vektörlerde iç çarpım = kosinüs benzerliği
+            return faiss.METRIC_INNER_PRODUCT
+        return faiss.METRIC_L2
+
+    def _build_index(self, n_vectors):
+        """
+        index_type'a göre boş bir FAISS index'i oluşturur.
+
+        Args:
+            n_vectors: Eklenecek vektör sayısı (IVF küme sayısı için)
+        """
+        params = self.index_params
+        d = self.embedding_dim
+        metric = self._faiss_metric()
+
+        if self.index_type == 'flat':
+            # IndexFlatL2 / IndexFlatIP: En basit ve en doğru index tipi
+            if metric == faiss.METRIC_INNER_PRODUCT:
+                return faiss.IndexFlatIP(d)
+            return faiss.IndexFlatL2(d)
+
+        if self.index_type == 'hnsw':
+            index = faiss.IndexHNSWFlat(d, params['hnsw_m'], metric)
+            index.hnsw.efConstruction = params['ef_construction']
+            return index
+
+        if self.index_type in ('pq', 'opq', 'ivf_pq') and d % params['pq_m'] != 0:
+            raise ValueError(f"pq_m ({params['pq_m']}) embedding boyutunu ({d}) bölmeli!")
+
+        if self.index_type == 'sq8':
+            return faiss.IndexScalarQuantizer(d, faiss.ScalarQuantizer.QT_8bit, metric)
+
+        if self.index_type == 'pq':
+            return faiss.IndexPQ(d, params['pq_m'], params['pq_nbits'], metric)
+
+        if self.index_type == 'opq':
+            # Rotasyon ortogonal olduğu için iç çarpım da korunur
+            return faiss.index_factory(d, f"OPQ{params['pq_m']},PQ{params['pq_m']}x{params['pq_nbits']}", metric)
+
+        # IVF index'leri: küme merkezleri için kaba (coarse) quantizer
+        nlist = params['nlist'] or self._default_nlist(n_vectors)
+        params['nlist'] = nlist
+        if metric == faiss.METRIC_INNER_PRODUCT:
+            quantizer = faiss.IndexFlatIP(d)
+        else:
+            quantizer = faiss.IndexFlatL2(d)
+
+        if self.index_type == 'ivf_flat':
+            index = faiss.IndexIVFFlat(quantizer, d, nlist, metric)
+        else:
+            index = faiss.IndexIVFPQ(quantizer, d, nlist, params['pq_m'], params['pq_nbits'], metric)
+
+        return index
+
+    @staticmethod
+    def _default_nlist(n_vectors):
+        """
+        IVF küme sayısı: ~4 * sqrt(N).
+        FAISS küme başına en az 39 eğitim vektörü ister.
+        """
+        nlist = int(4 * np.sqrt(n_vectors))
+        return max(1, min(nlist, n_vectors // 39))
+
+    def _train_index(self, embeddings):
+        """Index'i embedding'lerin (gerekirse rastgele bir alt kümesi) ile eğitir."""
+        max_train = self.index_params['max_train_size']
+        if len(embeddings) > max_train:
+            rng = np.random.default_rng(0)
+            sample = embeddings[np.sort(rng.choice(len(embeddings), max_train, replace=False))]
+        else:
+            sample = embeddings
+
+        print(f"Index eğitiliyor ({len(sample)} vektör)...")
+        self.index.train(sample)
+
+    def _apply_search_params(self):
+        """Varsayılan sorgu parametrelerini (nprobe / efSearch) index'e uygular."""
+        if self.index_type == 'hnsw':
+            self.index.hnsw.efSearch = self.index_params['ef_search']
+        elif self.index_type.startswith('ivf'):
+            faiss.extract_index_ivf(self.index).nprobe = self.index_params['nprobe']
+
+    def set_search_params(self, nprobe=None, ef_search=None, rerank_factor=None):
+        """
+        Varsayılan sorgu parametrelerini değiştirir.
+
+        Args:
+            nprobe: IVF index'lerinde taranacak küme sayısı
+            ef_search: HNSW arama derinliği
+            rerank_factor: Yeniden sıralanacak aday çarpanı (0 = kapalı)
+        """
+        if nprobe is not None:
+            self.index_params['nprobe'] = nprobe
+        if ef_search is not None:
+            self.index_params['ef_search'] = ef_search
+        if rerank_factor is not None:
+            self.index_params['rerank_factor'] = rerank_factor
+        if self.is_trained:
+            self._apply_search_params()
+
+    def _uses_rerank(self):
+        """Sıkıştırılmış index + rerank_factor > 0 ise yeniden sıralama yapılır."""
+        return self.index_type in self.COMPRESSED_TYPES and self.index_params['rerank_factor'] > 0
+
+    def _rerank(self, queries, candidates, top_k):
+        """
+        Aday sonuçları orijinal vektörlerle kesin mesafeye göre yeniden sıralar.
+
+        Args:
+            queries: Hazırlanmış sorgu matrisi (n_queries, dim)
+            candidates: Index'in döndürdüğü aday id'ler (n_queries, n_candidates)
+            top_k: Sorgu başına kaç sonuç döndürülecek
+
+        Returns:
+            tuple: (mesafeler, index'ler) - FAISS ile aynı format
+        """
+        inner_product = self.metric == 'cosine'
+        distances = np.full((len(queries), top_k), -np.inf if inner_product else np.inf, dtype='float32')
+        indices = np.full((len(queries), top_k), -1, dtype='int64')
+
+        for row, (query, ids) in enumerate(zip(queries, candidates)):
+            # Sıralı okuma mmap edilmiş dosyada daha az sayfa hatası demek
+            ids = np.unique(ids[ids >= 0])
+            if len(ids) == 0:
+                continue
+            vectors = np.asarray(self.vectors[ids], dtype='float32')
+
+            if inner_product:
+                exact = vectors @ query
+                order = np.argsort(-exact)[:top_k]
+            else:
+                exact = ((vectors - query) ** 2).sum(axis=1)
+                order = np.argsort(exact)[:top_k]
+
+            distances[row, :len(order)] = exact[order]
+            indices[row, :len(order)] = ids[order]
+
+        return distances, indices
+
+    def estimate_recall(self, embeddings, top_k=10, sample_size=None, queries=None, **search_params):
+        """
+        Index'in kesin (brute-force) aramaya göre recall@k değerini tahmin eder.
+
+        Args:
+            embeddings: Index'teki vektörler (veya aynı dağılımdan bir küme)
+            top_k: Recall hesaplanacak sonuç sayısı
+            sample_size: Sorgu olarak kullanılacak vektör sayısı
+            queries: Index'te olmayan sorgu embedding'leri (None = embeddings'ten
+                     örneklenir, sorgunun kendisi sonuçlardan çıkarılır)
+            **search_params: search_raw'a geçirilecek parametreler
+
+        Returns:
+            float: Tahmini recall@k (0-1)
+        """
+        ground_truth = self._recall_ground_truth(embeddings, top_k, sample_size, queries)
+        return self._measure_recall(ground_truth, top_k, **search_params)
+
+    def _recall_ground_truth(self, embeddings, top_k, sample_size=None, queries=None):
+        """
+        Recall ölçümü için sorgular ve kesin top-k sonuçları.
+
+        Sorgu verilmezse index'teki vektörlerden örneklenir. Bu durumda her
+        sorgunun en yakın komşusu kendisidir ve recall iyimser çıkar; bunu
+        önlemek için sorgunun kendi id'si hem kesin sonuçtan hem de aramadan
+        çıkarılır (leave-one-out, benchmark_index.py'deki ayrılmış sorgular gibi).
+
+        Returns:
+            tuple: (sorgular, kesin id'ler, sorguların kendi id'leri veya None)
+        """
+        embeddings = self._prepare_vectors(embeddings)
+        # faiss.knn ayrı bir flat index kopyası oluşturmadan kesin arama yapar
+        if queries is not None:
+            queries = self._prepare_vectors(queries)
+            _, true_ids = faiss.knn(queries, embeddings, top_k, metric=self._faiss_metric())
+            return queries, true_ids, None
+
+        sample_size = min(sample_size or self.index_params['recall_sample'], len(embeddings))
+        rng = np.random.default_rng(0)
+        self_ids = rng.choice(len(embeddings), sample_size, replace=False)
+        queries = embeddings[self_ids]
+        _, true_ids = faiss.knn(queries, embeddings, top_k + 1, metric=self._faiss_metric())
+        return queries, self._drop_self(true_ids, self_ids, top_k), self_ids
+
+    @staticmethod
+    def _drop_self(ids, self_ids, top_k):
+        """Her satırdan sorgunun kendi id'sini çıkarıp ilk top_k id'yi tutar."""
+        if self_ids is None:
+            return ids[:, :top_k]
+        kept = np.full((len(ids), top_k), -1, dtype=ids.dtype)
+        for row, (row_ids, self_id) in enumerate(zip(ids, self_ids)):
+            others = row_ids[row_ids != self_id][:top_k]
+            kept[row, :len(others)] = others
+        return kept
+
+    def _measure_recall(self, ground_truth, top_k, **search_params):
+        """Güncel arama ayarlarıyla recall@k (leave-one-out'ta bir fazla sonuç istenir)."""
+        queries, true_ids, self_ids = ground_truth
+        k = top_k if self_ids is None else top_k + 1
+        _, found_ids = self.search_raw(queries, k, **search_params)
+        return recall_at_k(self._drop_self(found_ids, self_ids, top_k), true_ids)
+
+    def tune_for_recall(self, embeddings, min_recall, top_k=10, queries=None):
+        """
+        Recall bütçesini sağlayan en ucuz sorgu parametrelerini seçer.
+
+        Arama derinliği (nprobe / efSearch) küçükten büyüğe denenir, her
+        derinlikte yeniden sıralama çarpanı artırılır; bütçeyi sağlayan ilk
+        ayar seçilir. Sağlanamazsa en iyi bulunan ayar kalır ve uyarı verilir.
+
+        Args:
+            embeddings: Index'teki vektörler
+            min_recall: Hedef recall@k (ör. 0.95)
+            top_k: Recall hesaplanacak sonuç sayısı
+            queries: Index'te olmayan sorgu embedding'leri (ör. gerçek kullanıcı
+                     sorguları); None ise index'teki vektörlerden leave-one-out
+
+        Returns:
+            float: Seçilen ayarla tahmini recall
+        """
+        ground_truth = self._recall_ground_truth(embeddings, top_k, queries=queries)
+
+        def measure():
+            return self._measure_recall(ground_truth, top_k)
+
+        # Denenecek ayarlar: önce arama derinliği (nprobe / efSearch),
+        # her derinlik için yeniden sıralama çarpanı (ucuzdan pahalıya)
+        if self.index_type == 'hnsw':
+            depths = [{'ef_search': ef} for ef in (16, 32, 64, 128, 256, 512)]
+        elif self.index_type.startswith('ivf'):
+            nlist = self.index_params['nlist']
+            depths = [{'nprobe': n} for n in (1, 2, 4, 8, 16, 32, 64, 128, 256) if n < nlist]
+            depths.append({'nprobe': nlist})
+        else:
+            depths = [{}]
+
+        if self.index_type in self.COMPRESSED_TYPES and self.vectors is not None:
+            rerank_factors = [0, 2, 4, 8, 16]
+        else:
+            rerank_factors = [self.index_params['rerank_factor']]
+
+        best = (-1.0, None)
+        for depth in depths:
+            for rerank_factor in rerank_factors:
+                setting = dict(depth, rerank_factor=rerank_factor)
+                self.set_search_params(**setting)
+                recall = measure()
+                if recall > best[0]:
+                    best = (recall, setting)
+                if recall >= min_recall:
+                    break
+            if best[0] >= min_recall:
+                break
+
+        # Bütçeyi sağlayan ilk ayar ya da (sağlanamadıysa) en iyi ayar
+        recall, setting = best
+        self.set_search_params(**setting)
+
+        if recall < min_recall:
+            print(f"⚠️  Recall bütçesi sağlanamadı: {recall:.4f} < {min_recall}")
+        else:
+            print(f"Recall@{top_k}: {recall:.4f} (hedef: {min_recall})")
+        return recall
+
+    def _search_parameters(self, nprobe=None, ef_search=None):
+        """
+        Tek bir sorgu için FAISS SearchParameters nesnesi oluşturur.
+        Index'in kendisi değişmediği için thread-safe'dir.
+        """
+        if self.index_type == 'hnsw' and ef_search is not None:
+            return faiss.SearchParametersHNSW(efSearch=ef_search)
+        if self.index_type.startswith('ivf') and nprobe is not None:
+            return faiss.SearchParametersIVF(nprobe=nprobe)
+        return None
+
+    def _prepare_vectors(self, vectors):
+        """
+        Vektörleri FAISS formatına (float32, C-contiguous) çevirir.
+        Kosinüs metriğinde vektörler ayrıca L2 normalize edilir.
+        """
+        vectors = np.array(vectors, dtype='float32', order='C', ndmin=2)
+        if self.metric == 'cosine':
+            faiss.normalize_L2(vectors)
+        return vectors
+
+    def default_min_score(self):
+        """Kullanılan metrik için önerilen minimum skor eşiği."""
+        return self.DEFAULT_MIN_SCORES[self.metric]
+
+    def search_raw(self, query_embeddings, top_k=5, nprobe=None, ef_search=None):
+        """
+        Ham FAISS araması yapar (doküman eşlemesi olmadan).
+
+        Args:
+            query_embeddings: Sorgu vektörü veya matrisi
+            top_k: Sorgu başına kaç sonuç döndürülecek
+            nprobe: Bu arama için IVF nprobe (None = varsayılan)
+            ef_search: Bu arama için HNSW efSearch (None = varsayılan)
+
+        Returns:
+            tuple: (mesafeler, index'ler) - her biri (n_queries, top_k)
+        """
+        query_embeddings = self._prepare_vectors(query_embeddings)
+
+        # Yeniden sıralama varsa index'ten daha fazla aday iste
+        rerank = self._uses_rerank() and self.vectors is not None
+        n_candidates = top_k * self.index_params['rerank_factor'] if rerank else top_k
+
+        params = self._search_parameters(nprobe=nprobe, ef_search=ef_search)
+        if params is not None:
+            distances, indices = self.index.search(query_embeddings, n_candidates, params=params)
+        else:
+            distances, indices = self.index.search(query_embeddings, n_candidates)
+
+        if rerank:
+            return self._rerank(query_embeddings, indices, top_k)
+        return distances, indices
+
+    def search(self, query_embedding, top_k=5, min_score=None, nprobe=None, ef_search=None):
         """
         Sorgu embedding'ine en benzer dokümanları bulur.
 
         Args:
             query_embedding: Sorgu vektörü
             top_k: Kaç sonuç döndürülecek
+            min_score: Bu skorun altındaki sonuçlar atılır (None = filtre yok)
+            nprobe: IVF index'lerinde taranacak küme sayısı (None = varsayılan)
+            ef_search: HNSW arama derinliği (None = varsayılan)
 
         Returns:
             list: (skor, doküman) tuple'larının listesi
@@ -71,22 +600,60 @@ class FAISSVectorStore:
             print("Index henüz oluşturulmamış!")
             return []
 
-        # Query'yi doğru formata çevir
-        query_embedding = np.array([query_embedding]).astype('float32')
-
         # Arama yap
-        distances, indices = self.index.search(query_embedding, top_k)
+        distances, indices = self.search_raw(query_embedding, top_k, nprobe=nprobe, ef_search=ef_search)
 
-        # Sonuçları hazırla
+        return self._to_results(distances[0], indices[0], min_score)
+
+    def search_batch(self, query_embeddings, top_k=5, min_score=None, nprobe=None, ef_search=None):
+        """
+        Birden fazla sorguyu tek bir FAISS çağrısıyla arar.
+
+        Args:
+            query_embeddings: Sorgu matrisi (n_queries, embedding_dim)
+            top_k: Sorgu başına kaç sonuç döndürülecek
+            min_score: Bu skorun altındaki sonuçlar atılır (None = filtre yok)
+            nprobe: IVF index'lerinde taranacak küme sayısı (None = varsayılan)
+            ef_search: HNSW arama derinliği (None = varsayılan)
+
+        Returns:
+            list: Her sorgu için search() ile aynı formatta sonuç listesi
+        """
+        if not self.is_trained:
+            print("Index henüz oluşturulmamış!")
+            return [[] for _ in query_embeddings]
+
+        if len(query_embeddings) == 0:
+            return []
+
+        distances, indices = self.search_raw(query_embeddings, top_k, nprobe=nprobe, ef_search=ef_search)
+
+        return [self._to_results(d, i, min_score) for d, i in zip(distances, indices)]
+
+    def _to_results(self, distances, indices, min_score=None):
+        """Tek bir sorgunun FAISS çıktısını doküman sonuçlarına çevirir."""
         results = []
-        for dist, idx in zip(distances[0], indices[0]):
-            if idx < len(self.documents):
-                # Mesafeyi benzerlik skoruna çevir (düşük mesafe = yüksek benzerlik)
-                similarity = 1 / (1 + dist)
+        for dist, idx in zip(distances, indices):
+            # -1: index'te yeterli sonuç yok
+            if 0 <= idx < len(self.documents):
+                if self.metric == 'cosine':
+                    # İç çarpım zaten kosinüs benzerliği
+                    similarity = float(dist)
+                    distance = 1.0 - similarity
+                else:
+                    # Mesafeyi benzerlik skoruna çevir (düşük mesafe = yüksek benzerlik)
+                    similarity = float(1 / (1 + dist))
+                    distance = float(dist)
+
+                # Sonuçlar skora göre sıralı, eşiğin altına düşünce dur
+                if min_score is not None and similarity < min_score:
+                    break
+
                 results.append({
-                    'score': float(similarity),
+                    'score': similarity,
                     'document': self.documents[idx],
-                    'distance': float(dist)
+                    'distance': distance,
+                    'doc_id': int(idx)
                 })
 
         return results
@@ -105,68 +672,214 @@ class FAISSVectorStore:
         # Klasör yoksa oluştur
         os.makedirs(os.path.dirname(filepath) if os.path.dirname(filepath) else '.', exist_ok=True)
 
+        # Dosyalar geçici isimle yazılıp os.replace ile değiştirilir: çalışan
+        # uygulama eski dosyaları (mmap dahil) okumaya devam edebilir.
+        # Metadata en son yazılır; yeni sürüm ancak tüm dosyalar hazırken görünür.
+        # BM25 index'i eski sürümle eşleştirilerek yüklenir (sürüm değişmeden önce)
+        if self.bm25_index is None:
+            self.bm25_index = self._load_bm25()
+        self.version = self._new_version()
+        self.built_at = time.time()
+
         # FAISS index'i kaydet
         index_path = f"{filepath}.index"
-        faiss.write_index(self.index, index_path)
-
-        # Dokümanları kaydet
-        docs_path = f"{filepath}.pkl"
-        with open(docs_path, 'wb') as f:
+        faiss.write_index(self.index, f"{index_path}.tmp")
+        os.replace(f"{index_path}.tmp", index_path)
+
+        # Yeniden sıralama vektörlerini kaydet (yüklemede mmap edilir)
+        vectors_path = f"{filepath}.vectors.npy"
+        if self.vectors is not None:
+            np.save(f"{filepath}.vectors.tmp.npy", self.vectors)
+            os.replace(f"{filepath}.vectors.tmp.npy", vectors_path)
+        elif os.path.exists(vectors_path):
+            os.remove(vectors_path)
+
+        # Dokümanları mmap edilebilir depoya kaydet. Dokümanlar başka bir
+        # depodan (ör. embedding'lerle paylaşılan) geliyorsa kopyalanmaz,
+        # metadata'ya o deponun yolu yazılır.
+        docs_path = f"{filepath}.docs"
+        documents_path = None
+        if isinstance(self.documents, DocumentStore) and not self._same_file(self.documents.filepath, docs_path):
+            docs_path = self.documents.filepath
+            documents_path = os.path.relpath(os.path.abspath(docs_path), os.path.dirname(os.path.abspath(filepath)))
+            if os.path.exists(f"{filepath}.docs"):
+                os.remove(f"{filepath}.docs")
+        else:
+            DocumentStore.write(docs_path, self.documents)
+
+        # Metin araması için BM25 index'i (aynı sürümle; yüklemede eşleşmezse yeniden oluşturulur).
+        # update() ile güncellenen index olduğu gibi yazılır, sadece yoksa oluşturulur.
+        bm25_path = BM25Index.path_for(filepath)
+        self.bm25_index.version = self.version
+        self.bm25_index.save(bm25_path)
+
+        # Metadata'yı kaydet
+        meta_path = f"{filepath}.pkl"
+        with open(f"{meta_path}.tmp", 'wb') as f:
             pickle.dump({
-                'documents': self.documents,
-                'embedding_dim': self.embedding_dim
+                'embedding_dim': self.embedding_dim,
+                'metric': self.metric,
+                'index_type': self.index_type,
+                'index_params': self.index_params,
+                'bm25_params': self.bm25_params,
+                'version': self.version,
+                'built_at': self.built_at,
+                'id_epoch': self.id_epoch,
+                'documents_path': documents_path
             }, f)
+        os.replace(f"{meta_path}.tmp", meta_path)
 
-        print(f"Vector store kaydedildi:")
+        print(f"Vector store kaydedildi (sürüm {self.version}):")
         print(f"  - Index: {index_path}")
         print(f"  - Dokümanlar: {docs_path}")
+        print(f"  - BM25: {bm25_path}")
+        print(f"  - Metadata: {meta_path}")
+        if self.vectors is not None:
+            print(f"  - Yeniden sıralama vektörleri: {vectors_path}")
 
-    def load(self, filepath):
+    def load(self, filepath, use_mmap=False):
         """
         Kaydedilmiş index ve dokümanları yükler.
 
         Args:
             filepath: Dosya yolu (uzantısız)
+            use_mmap: True ise index ve dokümanlar mmap edilir. Veriler
+                      process'e kopyalanmaz, OS page cache'inden okunur;
+                      aynı dosyaları açan worker'lar sayfaları paylaşır.
+                      mmap edilmiş index salt okunurdur, update() yapılamaz.
         """
         index_path = f"{filepath}.index"
-        docs_path = f"{filepath}.pkl"
+        meta_path = f"{filepath}.pkl"
+        docs_path = f"{filepath}.docs"
 
         # Dosya kontrolü
-        if not os.path.exists(index_path) or not os.path.exists(docs_path):
+        if not os.path.exists(index_path) or not os.path.exists(meta_path):
             print("Dosyalar bulunamadı!")
             return False
 
         # Index'i yükle
-        self.index = faiss.read_index(index_path)
+        if use_mmap:
+            self.index = faiss.read_index(index_path, MMAP_FLAGS)
+        else:
+            self.index = faiss.read_index(index_path)
 
-        # Dokümanları yükle
-        with open(docs_path, 'rb') as f:
+        # Metadata ve dokümanları yükle
+        with open(meta_path, 'rb') as f:
             data = pickle.load(f)
-            self.documents = data['documents']
+            if 'documents' in data:
+                # Eski format: dokümanlar pickle içinde
+                self.documents = data['documents']
+            else:
+                if data.get('documents_path'):
+                    # Paylaşılan doküman deposu (yol vector store'a göre)
+                    docs_path = os.path.join(os.path.dirname(os.path.abspath(filepath)), data['documents_path'])
+                self.documents = DocumentStore(docs_path, use_mmap=use_mmap)
             self.embedding_dim = data['embedding_dim']
+            # Eski kayıtlarda metrik yok, bunlar L2 ile oluşturuldu
+            self.metric = data.get('metric', 'l2')
+            self.index_type = data.get('index_type', 'flat')
+            self.index_params = {**self.DEFAULT_INDEX_PARAMS, **data.get('index_params', {})}
+            self.bm25_params = {'field': 'text', 'use_stem': False, **data.get('bm25_params', {})}
+            # Eski kayıtlarda sürüm bilgisi yok
+            self.version = data.get('version')
+            self.built_at = data.get('built_at')
+            self.id_epoch = data.get('id_epoch')
+
+        # Yeniden sıralama vektörleri RAM'e kopyalanmaz, diskten mmap edilir
+        vectors_path = f"{filepath}.vectors.npy"
+        if self._uses_rerank() and os.path.exists(vectors_path):
+            self.vectors = np.load(vectors_path, mmap_mode='r')
+        else:
+            self.vectors = None
 
         self.is_trained = True
+        self.mmapped = use_mmap
+        self.bm25_index = None
+        self.loaded_path = filepath
+        self._apply_search_params()
 
         print(f"Vector store yüklendi:")
         print(f"Doküman sayısı: {len(self.documents)}")
         print(f"Embedding boyutu: {self.embedding_dim}")
+        print(f"Metrik: {self.metric}")
+        print(f"Index tipi: {self.index_type}")
+        if self.version:
+            print(f"Sürüm: {self.version}")
+        if use_mmap:
+            print("Yükleme modu: mmap (paylaşımlı)")
 
         return True
 
+    @staticmethod
+    def _same_file(a, b):
+        return os.path.exists(a) and os.path.exists(b) and os.path.samefile(a, b)
+
+    @staticmethod
+    def read_version(filepath):
+        """
+        Kayıtlı vector store'un sürümünü index'i yüklemeden okur.
+
+        Args:
+            filepath: Dosya yolu (uzantısız)
+
+        Returns:
+            str veya None (dosya yoksa ya da eski formatsa)
+        """
+        meta_path = f"{filepath}.pkl"
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, 'rb') as f:
+            data = pickle.load(f)
+        return data.get('version')
+
+    def memory_usage(self):
+        """
+        Index'in bellek kullanımını hesaplar.
+
+        Returns:
+            dict: index_bytes, bytes_per_vector, flat_bytes_per_vector,
+                  rerank_bytes (diskte, mmap ile okunur)
+        """
+        ntotal = max(self.index.ntotal, 1)
+        index_bytes = faiss.serialize_index(self.index).nbytes
+        return {
+            'index_bytes': int(index_bytes),
+            'bytes_per_vector': index_bytes / ntotal,
+            'flat_bytes_per_vector': self.embedding_dim * 4,
+            'rerank_bytes': int(self.vectors.nbytes) if self.vectors is not None else 0
+        }
+
     def get_stats(self):
         """Index istatistiklerini gösterir."""
         if not self.is_trained:
             print("Index henüz oluşturulmamış!")
             return
 
+        memory = self.memory_usage()
+
         print("\n" + "=" * 60)
         print("VECTOR STORE İSTATİSTİKLERİ")
         print("=" * 60)
         print(f"Toplam doküman: {self.index.ntotal}")
         print(f"Embedding boyutu: {self.embedding_dim}")
-        print(f"Index tipi: {type(self.index).__name__}")
+        print(f"Index tipi: {self.index_type} ({type(self.index).__name__})")
+        print(f"Metrik: {self.metric}")
+        if self.index_type == 'hnsw':
+            print(f"efSearch: {self.index_params['ef_search']}")
+        elif self.index_type.startswith('ivf'):
+            print(f"nlist: {self.index_params['nlist']}, nprobe: {self.index_params['nprobe']}")
+        if self._uses_rerank():
+            print(f"Yeniden sıralama: top_k x {self.index_params['rerank_factor']}")
+        print(f"Index boyutu: {memory['index_bytes'] / 1024 ** 2:.1f} MB")
+        print(f"Vektör başına: {memory['bytes_per_vector']:.1f} byte "
+              f"(flat: {memory['flat_bytes_per_vector']} byte, "
+              f"{memory['flat_bytes_per_vector'] / memory['bytes_per_vector']:.1f}x sıkıştırma)")
+        if memory['rerank_bytes']:
+            print(f"Yeniden sıralama vektörleri (mmap): {memory['rerank_bytes'] / 1024 ** 2:.1f} MB")
         print("=" * 60)
 
+        return memory
+
 
 # Test için main fonksiyonu
 if __name__ == "__main__":
@@ -0,0 +1,43 @@
+"""
+Flask (app.py) ve ASGI (asgi_app.py) uygulamalarının ortak yardımcıları.
+
+Web framework'üne bağlı değildir; ASGI sunucusu Flask'ı import etmez.
+"""
+
+import hmac
+import json
+import os
+
+
+# /chat/batch isteğinde izin verilen en fazla mesaj sayısı
+MAX_BATCH_SIZE = 64
+
+
+def format_sources(results):
+    """Arama sonuçlarından arayüzde gösterilecek kaynakları oluşturur."""
+    sources = []
+    for r in results[:3]:  # İlk 3 kaynağı göster
+        doc = r['document']
+        sources.append({
+            'kelime': doc.get('kelime', ''),
+            'anlam': doc.get('anlam', '')[:200] + '...' if len(doc.get('anlam', '')) > 200 else doc.get('anlam',
+                                                                                                        ''),
+            'score': round(r.get('score', 0), 4)
+        })
+    return sources
+
+
+def sse_event(event, data):
+    """Server-Sent Events formatında bir olay oluşturur."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def admin_authorized(headers):
+    """
+    X-Admin-Token header'ı TDK_ADMIN_TOKEN ile eşleşmeli.
+    TDK_ADMIN_TOKEN ayarlanmamışsa admin endpoint'leri kapalıdır.
+    """
+    token = os.getenv('TDK_ADMIN_TOKEN')
+    if not token:
+        return False
+    return hmac.compare_digest(headers.get('X-Admin-Token', ''), token)
@@ -0,0 +1,91 @@
+"""
+Test ayarları.
+
+Testler model, index veya Gemini API'si gerektirmez: retrieval sabit
+dokümanlar döndüren bir chatbot ile, LLM FakeGenerativeModel ile
+değiştirilir.
+"""
+
+import os
+import sys
+
+import pytest
+
+# Kök klasör (app.py, asgi_app.py) ve src klasörünü path'e ekle
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'src'))
+
+from cache import ResponseCache
+from chatbot import TDKChatbot
+from fake_llm import FakeGenerativeModel, FakeResponse
+
+
+DOCUMENTS = [
+    {'kelime': 'kitap', 'anlam': 'Ciltli veya ciltsiz olarak bir araya getirilmiş basılı veya yazılı kâğıt yaprakların bütünü',
+     'ornek': None, 'ai_ornek': None, 'text': 'Kelime: kitap'},
+    {'kelime': 'kitapçı', 'anlam': 'Kitap satan kimse veya dükkân',
+     'ornek': None, 'ai_ornek': None, 'text': 'Kelime: kitapçı'},
+]
+
+
+class StubChatbot(TDKChatbot):
+    """Embedding modeli ve index yüklemeden sabit dokümanlar döndüren chatbot."""
+
+    def __init__(self, llm, documents=DOCUMENTS):
+        self.model = llm
+        self.response_cache = ResponseCache()
+        self.documents = documents
+
+    def retrieve(self, query, top_k=5, return_embedding=False):
+        results = [
+            {'score': 1.0, 'document': doc, 'match_type': 'exact', 'doc_id': i, 'id_epoch': 0}
+            for i, doc in enumerate(self.documents[:top_k])
+        ]
+        trace = {'stages': ['lexical'], 'answered_by': 'lexical' if results else None, 'encoded': False}
+        if return_embedding:
+            return results, trace, None
+        return results, trace
+
+    def retrieve_batch(self, queries, top_k=5, return_embedding=False):
+        return [self.retrieve(query, top_k=top_k, return_embedding=return_embedding) for query in queries]
+
+
+class FailingModel(FakeGenerativeModel):
+    """Streaming sırasında fail_after token'dan sonra hata veren sahte model."""
+
+    def __init__(self, fail_after=0, **kwargs):
+        super().__init__(**kwargs)
+        self.fail_after = fail_after
+
+    def _stream(self):
+        for i, token in enumerate(self.tokens()):
+            if i == self.fail_after:
+                raise RuntimeError("kota aşıldı")
+            yield FakeResponse(token)
+
+    async def _stream_async(self):
+        for i, token in enumerate(self.tokens()):
+            if i == self.fail_after:
+                raise RuntimeError("kota aşıldı")
+            yield FakeResponse(token)
+
+
+@pytest.fixture
+def fake_llm():
+    return FakeGenerativeModel()
+
+
+@pytest.fixture
+def bot(fake_llm):
+    return StubChatbot(fake_llm)
+
+
+@pytest.fixture
+def make_bot():
+    """StubChatbot oluşturucu: make_bot(llm=None, documents=DOCUMENTS, fail_after=None)."""
+    def make(llm=None, documents=DOCUMENTS, fail_after=None):
+        if llm is None:
+            llm = FailingModel(fail_after) if fail_after is not None else FakeGenerativeModel()
+        return StubChatbot(llm, documents=documents)
+    return make
@@ -0,0 +1,59 @@
+"""
+BM25Index testleri: artımlı güncelleme tam yeniden oluşturma ile aynı sonucu vermeli.
+"""
+
+import random
+
+import pytest
+
+from bm25_index import BM25Index
+
+
+WORDS = ['kitap', 'kalem', 'defter', 'okul', 'öğrenci', 'yazı', 'sayfa', 'cilt', 'basım', 'ışık',
+         'göz', 'gözlük', 'cam', 'su', 'deniz', 'gemi', 'liman', 'yol', 'çiçek', 'bahçe']
+
+
+def make_documents(rng, n):
+    return [{'text': ' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 12)))} for _ in range(n)]
+
+
+def assert_same_results(index, expected, queries):
+    assert index.n_docs == expected.n_docs
+    assert index.avg_length == pytest.approx(expected.avg_length)
+    for query in queries:
+        results = index.search(query, top_k=10)
+        reference = expected.search(query, top_k=10)
+        assert [doc_id for doc_id, _ in results] == [doc_id for doc_id, _ in reference]
+        assert [score for _, score in results] == pytest.approx([score for _, score in reference])
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_update_matches_rebuild(seed):
+    rng = random.Random(seed)
+    documents = make_documents(rng, 200)
+    index = BM25Index.build(documents)
+
+    remove_ids = rng.sample(range(len(documents)), 30)
+    added = make_documents(rng, 40) + [{'text': 'yepyeni terim'}]
+    new_ids = list(range(len(documents), len(documents) + len(added)))
+    index.update(added, new_ids, remove_ids)
+
+    for doc_id in remove_ids:
+        documents[doc_id] = {}
+    expected = BM25Index.build(documents + added)
+
+    assert_same_results(index, expected, WORDS + ['yepyeni', 'kitap kalem', 'gözlük cam deniz'])
+    assert not {doc_id for doc_id, _ in index.search('kitap', top_k=300)} & set(remove_ids)
+
+
+def test_update_remove_only(tmp_path):
+    documents = [{'text': 'kitap kalem'}, {'text': 'kitap defter'}, {'text': 'kalem'}]
+    index = BM25Index.build(documents)
+    index.update([], [], remove_ids=[0])
+
+    path = str(tmp_path / 'index.bm25.npz')
+    index.save(path)
+    loaded = BM25Index.load(path)
+
+    assert [doc_id for doc_id, _ in loaded.search('kitap')] == [1]
+    assert loaded.n_docs == 2
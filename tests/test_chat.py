@@ -0,0 +1,49 @@
+"""
+chat() / AsyncTDKChatbot.chat() testleri: önbellek hataları yanıtı değiştirmemeli.
+"""
+
+import asyncio
+import sqlite3
+
+import pytest
+
+from async_chatbot import AsyncTDKChatbot
+
+
+@pytest.fixture
+def locked_cache(bot, monkeypatch):
+    """Yazma sırasında hata veren yanıt önbelleği (ör. kilitli SQLite)."""
+    def store(*args, **kwargs):
+        raise sqlite3.OperationalError("database is locked")
+    monkeypatch.setattr(bot.response_cache, 'store', store)
+    return bot
+
+
+def test_chat_keeps_response_when_cache_store_fails(locked_cache, fake_llm):
+    result = locked_cache.chat("kitap ne demek?")
+
+    assert result['response'] == fake_llm.response
+
+
+def test_async_chat_keeps_response_when_cache_store_fails(locked_cache, fake_llm):
+    async def run():
+        async_bot = AsyncTDKChatbot(locked_cache, cpu_workers=1)
+        try:
+            return await async_bot.chat("kitap ne demek?")
+        finally:
+            async_bot.close()
+
+    assert asyncio.run(run())['response'] == fake_llm.response
+
+
+def test_chat_stream_finishes_when_cache_store_fails(locked_cache, fake_llm):
+    events = list(locked_cache.chat_stream("kitap ne demek?"))
+
+    assert events[-1] == {'type': 'done', 'response': fake_llm.response}
+
+
+def test_chat_batch_keeps_responses_when_cache_store_fails(locked_cache, fake_llm):
+    items = locked_cache.chat_batch(["kitap ne demek?", "kitapçı nedir?"])
+
+    assert [item['response'] for item in items] == [fake_llm.response] * 2
+    assert not any('error' in item for item in items)
@@ -0,0 +1,200 @@
+"""
+Streaming yanıt testleri: TDKChatbot.chat_stream ve /chat/stream (Flask ve ASGI).
+
+Olay sırası her zaman: sources -> token (bir veya daha fazla) -> done,
+hata olursa sources -> (token) -> error.
+"""
+
+import asyncio
+import json
+import subprocess
+import sys
+
+import pytest
+
+from async_chatbot import AsyncTDKChatbot
+from conftest import ROOT_DIR
+from fake_llm import FakeGenerativeModel
+
+
+def event_types(events):
+    return [event['type'] for event in events]
+
+
+def assert_stream_order(types):
+    """sources, ardından en az bir token, sonunda tek bir done."""
+    assert types[0] == 'sources'
+    assert types[-1] == 'done'
+    assert len(types) >= 3
+    assert set(types[1:-1]) == {'token'}
+
+
+def body_text(response):
+    """Flask ve Starlette test yanıtlarının gövdesi."""
+    return response.get_data(as_text=True) if hasattr(response, 'get_data') else response.text
+
+
+def parse_sse(body):
+    """SSE gövdesini (olay, veri) listesine çevirir."""
+    events = []
+    for block in body.strip().split('\n\n'):
+        lines = dict(line.split(': ', 1) for line in block.split('\n'))
+        events.append((lines['event'], json.loads(lines['data'])))
+    return events
+
+
+# --- TDKChatbot.chat_stream ---
+
+def test_chat_stream_event_order(bot, fake_llm):
+    events = list(bot.chat_stream("kitap ne demek?"))
+
+    assert_stream_order(event_types(events))
+    tokens = [event['text'] for event in events if event['type'] == 'token']
+    assert tokens == fake_llm.tokens()
+    assert events[-1]['response'] == ''.join(tokens) == fake_llm.response
+    assert [r['document']['kelime'] for r in events[0]['results']] == ['kitap', 'kitapçı']
+    assert events[0]['cache']['hit'] is False
+
+
+def test_chat_stream_matches_chat(make_bot):
+    streamed = list(make_bot().chat_stream("kitap ne demek?"))
+    result = make_bot().chat("kitap ne demek?")
+
+    assert streamed[-1]['response'] == result['response']
+    assert streamed[0]['results'] == result['results']
+
+
+def test_chat_stream_uses_response_cache(bot, fake_llm):
+    list(bot.chat_stream("kitap ne demek?"))
+    events = list(bot.chat_stream("kitap ne demek?"))
+
+    # Önbellekteki yanıt tek token olarak gönderilir, model tekrar çağrılmaz
+    assert event_types(events) == ['sources', 'token', 'done']
+    assert events[0]['cache']['hit'] is True
+    assert events[-1]['response'] == fake_llm.response
+    assert fake_llm.calls == 1
+
+
+def test_chat_stream_no_results(make_bot):
+    llm = FakeGenerativeModel()
+    events = list(make_bot(llm=llm, documents=[]).chat_stream("xyz nedir?"))
+
+    assert event_types(events) == ['sources', 'token', 'done']
+    assert events[0]['results'] == []
+    assert "bilgi bulamadım" in events[-1]['response']
+    assert llm.calls == 0
+
+
+def test_chat_stream_empty_query(bot, fake_llm):
+    events = list(bot.chat_stream("   "))
+
+    assert event_types(events) == ['sources', 'token', 'done']
+    assert fake_llm.calls == 0
+
+
+@pytest.mark.parametrize('fail_after', [0, 2])
+def test_chat_stream_error(make_bot, fail_after):
+    bot = make_bot(fail_after=fail_after)
+    events = list(bot.chat_stream("kitap ne demek?"))
+    types = event_types(events)
+
+    assert types == ['sources'] + ['token'] * fail_after + ['error']
+    assert "kota aşıldı" in events[-1]['error']
+
+    # Yarım kalan yanıt önbelleğe yazılmaz
+    events = list(bot.chat_stream("kitap ne demek?"))
+    assert events[0]['cache']['hit'] is False
+    assert bot.response_cache.get_stats()['stores'] == 0
+
+
+# --- AsyncTDKChatbot.chat_stream ---
+
+def collect_async(bot, query):
+    async def run():
+        async_bot = AsyncTDKChatbot(bot, cpu_workers=1)
+        try:
+            return [event async for event in async_bot.chat_stream(query)]
+        finally:
+            async_bot.close()
+    return asyncio.run(run())
+
+
+def test_async_chat_stream_event_order(bot, fake_llm):
+    events = collect_async(bot, "kitap ne demek?")
+
+    assert_stream_order(event_types(events))
+    assert events[-1]['response'] == fake_llm.response
+
+
+def test_async_chat_stream_error(make_bot):
+    events = collect_async(make_bot(fail_after=1), "kitap ne demek?")
+
+    assert event_types(events) == ['sources', 'token', 'error']
+
+
+# --- /chat/stream ---
+
+@pytest.fixture
+def flask_client(monkeypatch):
+    import app as web_app
+
+    def client_for(bot):
+        monkeypatch.setattr(web_app, 'chatbot', bot)
+        monkeypatch.setitem(web_app.init_state, 'status', 'ready')
+        return web_app.app.test_client()
+    return client_for
+
+
+@pytest.fixture
+def asgi_client():
+    from starlette.testclient import TestClient
+    import asgi_app
+
+    def client_for(bot):
+        # Lifespan çalıştırılmaz (gerçek modeli yükler), bot doğrudan atanır
+        asgi_app.app.state.bot = AsyncTDKChatbot(bot, cpu_workers=1)
+        return TestClient(asgi_app.app)
+    yield client_for
+    if hasattr(asgi_app.app.state, 'bot'):
+        asgi_app.app.state.bot.close()
+        del asgi_app.app.state.bot
+
+
+@pytest.fixture(params=['flask', 'asgi'])
+def client_for(request, flask_client, asgi_client):
+    return flask_client if request.param == 'flask' else asgi_client
+
+
+def test_stream_endpoint_event_order(client_for, bot, fake_llm):
+    response = client_for(bot).post('/chat/stream', json={'message': "kitap ne demek?"})
+
+    assert response.status_code == 200
+    assert response.headers['Content-Type'].startswith('text/event-stream')
+    events = parse_sse(body_text(response))
+
+    assert_stream_order([name for name, _ in events])
+    assert [source['kelime'] for source in events[0][1]['sources']] == ['kitap', 'kitapçı']
+    assert ''.join(data['text'] for name, data in events if name == 'token') == fake_llm.response
+    assert events[-1][1] == {'response': fake_llm.response}
+
+
+def test_stream_endpoint_error(client_for, make_bot):
+    response = client_for(make_bot(fail_after=1)).post('/chat/stream', json={'message': "kitap ne demek?"})
+    events = parse_sse(body_text(response))
+
+    assert [name for name, _ in events] == ['sources', 'token', 'error']
+    assert "kota aşıldı" in events[-1][1]['error']
+
+
+def test_stream_endpoint_rejects_empty_message(client_for, bot):
+    response = client_for(bot).post('/chat/stream', json={'message': "  "})
+
+    assert response.status_code == 400
+
+
+def test_asgi_app_does_not_import_flask():
+    # Ortak yardımcılar web_common'da; ASGI sunucusu Flask uygulamasını yüklemez
+    code = "import sys, asgi_app; print('flask' in sys.modules or 'app' in sys.modules)"
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                            cwd=ROOT_DIR, check=True).stdout
+    assert output.strip().splitlines()[-1] == 'False'
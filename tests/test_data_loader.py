@@ -0,0 +1,72 @@
+"""
+Veri işleme testleri: sütun bazlı temizlik (clean_table) satır bazlı
+temizlikle (clean_batch) birebir aynı çıktıyı vermeli.
+"""
+
+import sys
+
+import pyarrow as pa
+import pytest
+
+from data_loader import DOCUMENT_FIELDS, _WHITESPACE, clean_batch, clean_table, iter_documents, write_documents
+
+
+EDGE_ROWS = {
+    'madde': ['kitap', '  kitap\t', None, 'None', '', '   ', 'ışık\x85', '　su　',
+              'sevgi', 'göz\u200b', 'a\xa0', 'el', 'kalem', ' None ', 'çiçek'],
+    'anlam': ['Basılı yapraklar', ' anlam \n', 'yok', 'anlam', 'anlam', 'anlam', '\x85ışık anlamı\x85',
+              '　Sıvı ', None, 'görme organı', 'harf ', 'None', '', 'yazı aracı', 'bitki'],
+    'ornek': [None, '  ', 'örnek', None, None, None, 'None', '　örnek　', 'x', '\x85',
+              'ö', None, None, None, ' Çiçek açtı. '],
+    'ai_ornek': [None, 'ai', None, None, None, None, '\tai örnek\t', 'None', None, '', None, None, None, None,
+                 '  uzun örnek  '],
+}
+
+
+def rows_from(columns):
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+
+def test_whitespace_matches_str_strip():
+    # Arrow'a verilen boşluk kümesi Python'un str.strip() kümesiyle aynı olmalı
+    expected = {chr(c) for c in range(sys.maxunicode + 1) if chr(c).isspace()}
+    assert set(_WHITESPACE) == expected
+
+
+def test_clean_table_matches_clean_batch_on_edge_cases():
+    expected = clean_batch(EDGE_ROWS)
+    result = clean_table(pa.table(EDGE_ROWS)).to_pydict()
+
+    assert result == expected
+    # Geçersiz satırlar (boş / None / 'None' kelime veya anlam) atıldı
+    assert expected['kelime'] == ['kitap', 'kitap', 'ışık', 'su', 'göz\u200b', 'a', 'çiçek']
+
+
+def test_clean_table_missing_and_null_columns():
+    columns = {'madde': ['kitap', 'kalem'], 'anlam': ['a', 'b']}
+    assert clean_table(pa.table(columns)).to_pydict() == clean_batch(columns)
+
+    columns = {**columns, 'ornek': pa.nulls(2, pa.string()), 'ai_ornek': pa.nulls(2)}
+    assert clean_table(pa.table(columns)).to_pydict() == clean_batch(
+        {'madde': ['kitap', 'kalem'], 'anlam': ['a', 'b'], 'ornek': [None, None], 'ai_ornek': [None, None]})
+
+
+def test_clean_table_non_string_columns_fall_back():
+    columns = {'madde': [1, 2, None], 'anlam': ['bir', ' iki ', 'üç'], 'ornek': [None, 'x', None],
+               'ai_ornek': [None, None, None]}
+    assert clean_table(pa.table(columns)).to_pydict() == clean_batch(columns)
+
+
+@pytest.mark.parametrize('extension', ['jsonl', 'json'])
+def test_written_files_are_byte_identical(tmp_path, extension):
+    python_path = tmp_path / f"python.{extension}"
+    columnar_path = tmp_path / f"columnar.{extension}"
+
+    python_docs = rows_from(clean_batch(EDGE_ROWS))
+    columnar_docs = rows_from(clean_table(pa.table(EDGE_ROWS)).to_pydict())
+    write_documents(python_docs, str(python_path))
+    write_documents(columnar_docs, str(columnar_path))
+
+    assert python_path.read_bytes() == columnar_path.read_bytes()
+    assert [doc['kelime'] for doc in iter_documents(str(python_path))] == clean_batch(EDGE_ROWS)['kelime']
+    assert set(python_docs[0]) == set(DOCUMENT_FIELDS)
@@ -0,0 +1,60 @@
+"""
+Deduplicator testleri: tekrar ayıklama ve madde başına bağlı anlamlar.
+"""
+
+from data_loader import build_document
+from dedup import Deduplicator
+from chatbot import TDKChatbot
+
+
+def doc(kelime, anlam, ornek=None):
+    return build_document({'madde': kelime, 'anlam': anlam, 'ornek': ornek, 'ai_ornek': None})
+
+
+DOCUMENTS = [
+    doc('kitap', 'Basılı yaprakların bütünü'),
+    doc('kitap', 'basılı yaprakların bütünü.'),
+    doc('kitap', 'Kutsal kitap', ornek='Kitaba el basmak'),
+    doc('kalem', 'Yazı yazmaya yarayan araç'),
+]
+
+
+def test_merge_keeps_one_document_per_sense():
+    output = Deduplicator(group_senses=False).deduplicate(DOCUMENTS)
+
+    assert [(d['kelime'], d['anlam']) for d in output] == [
+        ('kitap', 'basılı yaprakların bütünü.'), ('kitap', 'Kutsal kitap'), ('kalem', 'Yazı yazmaya yarayan araç')]
+    assert not any('anlam_sayisi' in d for d in output)
+
+
+def test_group_links_senses_to_headword():
+    output = Deduplicator(group_senses=True).deduplicate(DOCUMENTS)
+
+    # Her anlam ayrı kayıt (ayrı vektör); metin tek anlamlık kalır
+    assert [(d['kelime'], d.get('anlam_no'), d.get('anlam_sayisi')) for d in output] == [
+        ('kitap', 1, 2), ('kitap', 2, 2), ('kalem', None, None)]
+    assert output[1]['text'] == DOCUMENTS[2]['text']
+
+
+def test_collapse_senses_keeps_best_sense_per_headword():
+    output = Deduplicator(group_senses=True).deduplicate(DOCUMENTS)
+    results = [{'document': d, 'doc_id': i} for i, d in zip([1, 0, 2], [output[1], output[0], output[2]])]
+
+    collapsed = TDKChatbot._collapse_senses(results, top_k=5)
+
+    assert [r['doc_id'] for r in collapsed] == [1, 2]
+
+
+def test_measure_encode_times_both_variants():
+    dedup = Deduplicator(group_senses=False)
+    dedup.deduplicate(DOCUMENTS)
+    stats = dict(dedup.stats)
+    calls = []
+
+    benchmark = dedup.measure_encode(lambda texts: calls.append(len(texts)), DOCUMENTS, sample_headwords=10)
+
+    assert benchmark['documents'] == 4 and benchmark['deduplicated_documents'] == 3
+    # Isınma + tekrar ayıklanmamış + ayıklanmış örnek
+    assert calls == [4, 4, 3]
+    assert {key: dedup.stats[key] for key in stats} == stats
+    assert dedup.stats['encode_benchmark'] == benchmark
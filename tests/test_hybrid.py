@@ -0,0 +1,64 @@
+"""
+Hibrit arama testleri: madde başı tam eşleşmeleri RRF birleştirmesinde kaybolmamalı.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from lexical_index import HeadwordIndex
+from query_analyzer import QueryAnalyzer
+from retrieval import QueryContext
+
+
+DOCUMENTS = [
+    {'kelime': 'kitap', 'anlam': 'Basılı yaprakların bütünü'},
+    {'kelime': 'gözlük', 'anlam': 'Görmeyi kolaylaştıran camlar'},
+    {'kelime': 'kalem', 'anlam': 'Yazı aracı'},
+]
+
+
+@pytest.fixture
+def hybrid_bot(bot):
+    bot.hybrid = True
+    bot.rrf_k = 60
+    return bot
+
+
+@pytest.fixture
+def index():
+    headword_index = HeadwordIndex(DOCUMENTS)
+    return SimpleNamespace(headword_index=headword_index,
+                           query_analyzer=QueryAnalyzer(headword_index.exact),
+                           vector_store=SimpleNamespace(documents=DOCUMENTS), grouped_senses=False)
+
+
+def test_lexical_stage_keeps_exact_ids_for_hybrid(hybrid_bot, index):
+    # "gözlükçü" madde başı değil: sorgu hibrit aşamaya kalır
+    ctx = QueryContext("kitap ve gözlükçü", 5, encoder=None, index=index)
+
+    assert hybrid_bot._lexical_stage(ctx) == []
+    assert ctx.exact_ids == [0]
+
+
+def test_fuse_includes_exact_ids(hybrid_bot, index):
+    vector = [{'doc_id': 1, 'score': 0.7}, {'doc_id': 2, 'score': 0.6}]
+    bm25 = [(1, 4.2)]
+
+    results = hybrid_bot._fuse(index, vector, bm25, top_k=5, exact_ids=[0])
+
+    by_id = {result['doc_id']: result for result in results}
+    assert by_id[0]['exact_match'] is True
+    assert by_id[0]['vector_score'] is None and by_id[0]['bm25_score'] is None
+    assert [result['doc_id'] for result in results] == [1, 0, 2]
+    assert all(0.0 < result['score'] <= 1.0 for result in results)
+
+
+def test_fuse_without_exact_ids_unchanged(hybrid_bot, index):
+    vector = [{'doc_id': 1, 'score': 0.7}]
+    bm25 = [(1, 4.2)]
+
+    results = hybrid_bot._fuse(index, vector, bm25, top_k=5)
+
+    assert results[0]['score'] == pytest.approx(1.0)
+    assert results[0]['exact_match'] is False
@@ -0,0 +1,70 @@
+"""
+HeadwordIndex testleri: sonuçlar eski lineer tarama ile aynı olmalı.
+"""
+
+import random
+
+import pytest
+
+from lexical_index import HeadwordIndex
+from text_utils import turkish_lower
+
+
+def linear_lookup(documents, term, limit=None):
+    """Index'ten önceki davranış: tüm madde başlarını tek tek dolaşır."""
+    exact_ids, partial_ids = [], []
+    for i, doc in enumerate(documents):
+        kelime = turkish_lower(doc['kelime'])
+        # Silinmiş (boş) dokümanlar atlanır
+        if not kelime:
+            continue
+        if kelime == term:
+            exact_ids.append(i)
+        elif term in kelime or kelime in term:
+            partial_ids.append(i)
+    if limit is not None:
+        exact_ids = exact_ids[:limit]
+        partial_ids = partial_ids[:max(0, limit - len(exact_ids))]
+    return exact_ids, partial_ids
+
+
+@pytest.fixture(scope='module')
+def documents():
+    rng = random.Random(0)
+    alphabet = 'abcçdeğıiklmnoöprsştuü'
+    words = [''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 7))) for _ in range(3000)]
+    # Aynı madde başının birden fazla anlamı, büyük harf ve silinmiş dokümanlar
+    words += ['kitap', 'kitap', 'Kitapçı', 'IŞIK', 'su', 'a', '', 'kitaplık']
+    rng.shuffle(words)
+    return [{'kelime': word} for word in words]
+
+
+@pytest.fixture(scope='module')
+def index(documents):
+    return HeadwordIndex(documents)
+
+
+TERMS = ['kitap', 'kitapçı', 'ışık', 'su', 'a', 'ab', 'çek', 'kitaplıklar', 'zzz', 'ğı', 'abcdefg']
+
+
+@pytest.mark.parametrize('term', TERMS)
+@pytest.mark.parametrize('limit', [None, 1, 5, 50])
+def test_lookup_matches_linear_scan(documents, index, term, limit):
+    assert index.lookup(term, limit=limit) == linear_lookup(documents, term, limit=limit)
+
+
+def test_lookup_random_terms(documents, index):
+    rng = random.Random(1)
+    for _ in range(200):
+        doc = rng.choice(documents)
+        word = turkish_lower(doc['kelime'])
+        start = rng.randint(0, max(0, len(word) - 1))
+        term = word[start:start + rng.randint(1, 4)] or 'a'
+        assert index.lookup(term, limit=5) == linear_lookup(documents, term, limit=5)
+
+
+def test_lookup_exact_only(documents, index):
+    exact_ids, partial_ids = index.lookup('su', limit=5, partial=False)
+
+    assert exact_ids == linear_lookup(documents, 'su', limit=5)[0]
+    assert partial_ids == []
@@ -0,0 +1,67 @@
+"""
+FAISSVectorStore testleri: artımlı güncelleme ve kayıt / yükleme.
+"""
+
+import numpy as np
+import pytest
+
+from bm25_index import BM25Index
+from vector_store import FAISSVectorStore
+
+
+DIM = 8
+
+
+def make_documents(words):
+    return [{'kelime': word, 'anlam': f"{word} anlamı", 'ornek': None, 'ai_ornek': None,
+             'text': f"Kelime: {word}\nAnlam: {word} anlamı"} for word in words]
+
+
+def make_embeddings(n, seed=0):
+    return np.random.default_rng(seed).random((n, DIM), dtype='float32')
+
+
+@pytest.fixture
+def saved_store(tmp_path):
+    store = FAISSVectorStore(embedding_dim=DIM)
+    store.create_index(make_embeddings(4), make_documents(['kitap', 'kalem', 'silgi', 'defter']))
+    path = str(tmp_path / 'store')
+    store.save(path)
+    return path
+
+
+def test_update_rejects_mmapped_store(saved_store):
+    store = FAISSVectorStore(embedding_dim=DIM)
+    assert store.load(saved_store, use_mmap=True)
+
+    with pytest.raises(ValueError, match='mmap'):
+        store.update(make_embeddings(1, seed=1), make_documents(['cetvel']), remove_ids=[1])
+
+
+def test_update_after_regular_load(saved_store):
+    store = FAISSVectorStore(embedding_dim=DIM)
+    assert store.load(saved_store)
+
+    new_ids = store.update(make_embeddings(1, seed=1), make_documents(['cetvel']), remove_ids=[1])
+
+    assert list(new_ids) == [4]
+    assert store.index.ntotal == 4
+    assert store.documents[1] == {}
+    assert store.documents[4]['kelime'] == 'cetvel'
+
+
+def test_save_after_update_does_not_rebuild_bm25(saved_store, monkeypatch):
+    store = FAISSVectorStore(embedding_dim=DIM)
+    assert store.load(saved_store)
+
+    def build(*args, **kwargs):
+        raise AssertionError("BM25 index'i yeniden oluşturuldu")
+    monkeypatch.setattr(BM25Index, 'build', build)
+
+    store.update(make_embeddings(1, seed=1), make_documents(['cetvel']), remove_ids=[1])
+    store.save(saved_store)
+
+    bm25 = BM25Index.load(BM25Index.path_for(saved_store))
+    assert bm25.version == store.version
+    assert [doc_id for doc_id, _ in bm25.search('cetvel')] == [4]
+    assert bm25.search('kalem') == []